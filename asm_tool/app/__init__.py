@@ -1,10 +1,39 @@
 from flask import Flask
 from flask_socketio import SocketIO
 import os
+from app.utils.rate_limit import limiter
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
 app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'outputs')
+app.config['SCAN_CONCURRENCY'] = int(os.getenv('SCAN_CONCURRENCY', 8))
+app.config['SCAN_ENGINE'] = os.getenv('SCAN_ENGINE', 'threads')
+app.config['STATUS_INTERVAL'] = float(os.getenv('STATUS_INTERVAL', 0.5))
+app.config['RESUME_SCANS'] = os.getenv('RESUME_SCANS', 'true').lower() == 'true'
+app.config['SCAN_MODE'] = os.getenv('SCAN_MODE', 'local')
+app.config['WORKER_METRICS_PORT'] = int(os.getenv('WORKER_METRICS_PORT', 0))
+app.config['WORK_QUEUE'] = os.getenv('WORK_QUEUE', os.path.join(app.config['UPLOAD_FOLDER'], 'queue.db'))
+app.config['RESULT_DB'] = os.getenv('RESULT_DB', os.path.join(app.config['UPLOAD_FOLDER'], 'results.db'))
+app.config['INCREMENTAL_SCANS'] = os.getenv('INCREMENTAL_SCANS', 'false').lower() == 'true'
+app.config['INCREMENTAL_MAX_AGE_DAYS'] = float(os.getenv('INCREMENTAL_MAX_AGE_DAYS', 7))
+app.config['DOMAIN_TIMEOUT'] = float(os.getenv('DOMAIN_TIMEOUT', 900))
+app.config['DISCOVERY_CACHE'] = os.getenv('DISCOVERY_CACHE', os.path.join(app.config['UPLOAD_FOLDER'], 'discovery_cache.db'))
+app.config['DISCOVERY_CACHE_TTL_HOURS'] = float(os.getenv('DISCOVERY_CACHE_TTL_HOURS', 24))
+app.config['DISCOVERY_CACHE_MAX_MB'] = float(os.getenv('DISCOVERY_CACHE_MAX_MB', 256))
+app.config['SCAN_PROFILE'] = os.getenv('SCAN_PROFILE', 'off')
+app.config['SCAN_PROFILE_TOP'] = int(os.getenv('SCAN_PROFILE_TOP', 10))
+app.config['RATE_LIMIT_HOST'] = float(os.getenv('RATE_LIMIT_HOST', 5))
+app.config['RATE_LIMIT_HOST_BURST'] = int(os.getenv('RATE_LIMIT_HOST_BURST', 10))
+app.config['RATE_LIMIT_IP'] = float(os.getenv('RATE_LIMIT_IP', 10))
+app.config['RATE_LIMIT_IP_BURST'] = int(os.getenv('RATE_LIMIT_IP_BURST', 20))
 socketio = SocketIO(app)
 
+# Every outbound probe goes through one per-host / per-IP limiter
+limiter.configure(
+    host_rate=app.config['RATE_LIMIT_HOST'],
+    host_burst=app.config['RATE_LIMIT_HOST_BURST'],
+    ip_rate=app.config['RATE_LIMIT_IP'],
+    ip_burst=app.config['RATE_LIMIT_IP_BURST']
+)
+
 from app import routes 
\ No newline at end of file
@@ -0,0 +1,692 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import aiohttp
+import dns.asyncresolver
+from requests.structures import CaseInsensitiveDict
+from app.utils.ct_log import JSONArrayParser, entry_names
+from app.utils.deadline import DeadlineExceeded
+from app.utils.metrics import instrument, track
+from app.utils.network import configure_resolver, ct_log_host, ct_log_url
+from app.utils.rate_limit import limiter
+from app.utils.scan_control import ScanInterrupted
+from app.utils.wildcard_dns import WildcardZones, lookup_async, page_fingerprint, random_name
+from .scanner import (
+    DNSAnalyzer,
+    PortScanner,
+    SSLAnalyzer,
+    HeaderAnalyzer,
+    TechStackDetector,
+    RiskAnalyzer,
+    PageFetcher
+)
+from .subdomain_enum import SubdomainCandidates, SubdomainEnumerator, lookup_reason, probe_reason, status_reason
+
+class AsyncPageResponse:
+    """
+    Landing page response read with aiohttp, exposing the parts of
+    requests.Response the analyzers rely on
+    """
+    def __init__(self, url, status_code, headers, content, encoding, tls_info):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+        self.tls_info = tls_info
+        
+        # Merge repeated headers the same way requests does
+        self.headers = CaseInsensitiveDict()
+        for key, value in headers.items():
+            if key in self.headers:
+                self.headers[key] = f'{self.headers[key]}, {value}'
+            else:
+                self.headers[key] = value
+    
+    @property
+    def ok(self):
+        return self.status_code < 400
+    
+    def __bool__(self):
+        return self.ok
+    
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+class AsyncWildcardDetector(WildcardZones):
+    """
+    WildcardDetector for the event loop: random labels are resolved with
+    dns.asyncresolver and landing pages fetched with the validator's
+    request coroutine
+    """
+    def __init__(self, apex, resolver, request, deadline=None, timeout=3, page_timeout=5):
+        super().__init__(apex, deadline, timeout, page_timeout)
+        self.resolver = resolver
+        self.request = request
+    
+    async def fingerprint(self, zone):
+        """
+        Return the wildcard fingerprint of a zone, or None if it has no wildcard
+        """
+        with self.lock:
+            future = self.zones.get(zone)
+            if future is None:
+                future = self.zones[zone] = asyncio.ensure_future(self._detect(zone))
+        # One name giving up must not cancel the detection others wait for
+        return await asyncio.shield(future)
+    
+    async def _detect(self, zone):
+        addresses = set()
+        targets = set()
+        for _ in range(self.PROBES):
+            try:
+                found, target = await lookup_async(self.resolver, random_name(zone), self.deadline.timeout(self.timeout, 'wildcard_dns'))
+            except Exception:
+                # NXDOMAIN (no wildcard), or no reliable answer
+                return None
+            addresses |= found
+            if target:
+                targets.add(target)
+        
+        return {'addresses': addresses, 'targets': targets, 'pages': await self._page_fingerprints(zone)}
+    
+    async def _page_fingerprints(self, zone):
+        host = random_name(zone)
+        pages = {}
+        for scheme in ('https', 'http'):
+            try:
+                status, headers = await self.request('HEAD', f'{scheme}://{host}/', host, self.page_timeout, 'wildcard_dns')
+            except Exception:
+                continue
+            fingerprint = page_fingerprint(status, headers, host)
+            if fingerprint is not None:
+                pages[scheme] = fingerprint
+        return pages
+    
+    async def matches_answer(self, name, addresses, target):
+        zone = self.zone_of(name)
+        return self.answer_matches(await self.fingerprint(zone) if zone else None, addresses, target)
+
+class AsyncSubdomainValidator:
+    """
+    Subdomain validation on the event loop: the same DNS lookup, wildcard
+    check and raced HTTPS/HTTP probe as SubdomainEnumerator, made with
+    dns.asyncresolver and aiohttp instead of thread pools. Candidate
+    bookkeeping and the result are shared through SubdomainCandidates.
+    """
+    def __init__(self, session, candidates, probe_limit):
+        self.session = session
+        self.candidates = candidates
+        self.deadline = candidates.deadline
+        self.probe_limit = probe_limit
+        self.resolver = configure_resolver(dns.asyncresolver.Resolver())
+        self.resolver.timeout = SubdomainEnumerator.DNS_TIMEOUT
+        self.wildcards = AsyncWildcardDetector(
+            candidates.apex, self.resolver, self._request, self.deadline,
+            timeout=SubdomainEnumerator.DNS_TIMEOUT, page_timeout=SubdomainEnumerator.PROBE_TIMEOUT
+        )
+        # The same per-domain concurrency as the threaded enumerator's pools
+        self.lookups = asyncio.Semaphore(SubdomainEnumerator.DNS_WORKERS)
+        self.checks = asyncio.Semaphore(SubdomainEnumerator.PROBE_WORKERS)
+        self.tasks = []
+    
+    def found(self, name):
+        """
+        Queue a discovered name for validation; must be called on the event loop
+        """
+        subdomain = self.candidates.add(name)
+        if subdomain is not None:
+            self.tasks.append(asyncio.ensure_future(self._validate(subdomain)))
+    
+    async def finish(self):
+        """
+        Wait for every queued lookup and probe once the sources are done
+        """
+        done = 0
+        while done < len(self.tasks):
+            await self.tasks[done]
+            done += 1
+    
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
+    
+    def result(self):
+        return self.candidates.result(self.wildcards.wildcard_zones())
+    
+    async def _validate(self, subdomain):
+        async with self.lookups:
+            with track('subdomain_dns'):
+                reason, suspect = await self._resolve(subdomain)
+        if not self.candidates.looked_up(subdomain, reason, suspect):
+            return
+        async with self.checks:
+            with track('subdomain_probe'):
+                reason = await self._probe(subdomain, suspect)
+        self.candidates.probed(subdomain, reason)
+    
+    async def _resolve(self, subdomain):
+        try:
+            async with self.probe_limit:
+                addresses, target = await lookup_async(
+                    self.resolver, subdomain, self.deadline.timeout(SubdomainEnumerator.DNS_TIMEOUT, 'subdomain_dns')
+                )
+            suspect = await self.wildcards.matches_answer(subdomain, addresses, target)
+            # The liveness probes are throttled per IP without resolving again
+            limiter.remember(subdomain, min(addresses, default=None))
+            return None, suspect
+        except Exception as e:
+            return lookup_reason(e), False
+    
+    async def _probe(self, subdomain, suspect):
+        """
+        Race HTTPS and HTTP liveness probes and stop at the first that answers
+        """
+        probes = [asyncio.ensure_future(self._probe_scheme(scheme, subdomain, suspect)) for scheme in ('https', 'http')]
+        reasons = []
+        try:
+            for probe in asyncio.as_completed(probes):
+                reason = await probe
+                if reason is None or reason == 'wildcard':
+                    return reason
+                reasons.append(reason)
+        finally:
+            # The probe that lost the race is not needed
+            for probe in probes:
+                probe.cancel()
+        return probe_reason(reasons)
+    
+    async def _probe_scheme(self, scheme, subdomain, suspect):
+        """
+        HEAD the name's landing page, or send a one-byte ranged GET if HEAD
+        is refused. No body is read and redirects are not followed.
+        """
+        url = f'{scheme}://{subdomain}/'
+        try:
+            status, headers = await self._request('HEAD', url, subdomain, SubdomainEnumerator.PROBE_TIMEOUT, 'subdomain_validation')
+            if suspect and self.wildcards.matches_page(subdomain, scheme, status, headers):
+                return 'wildcard'
+            if status in (405, 501):
+                status, _ = await self._request(
+                    'GET', url, subdomain, SubdomainEnumerator.PROBE_TIMEOUT, 'subdomain_validation',
+                    headers={'Range': 'bytes=0-0'}
+                )
+            return status_reason(status)
+        except DeadlineExceeded:
+            return 'deadline'
+        except asyncio.TimeoutError:
+            return 'http_timeout'
+        except Exception:
+            return 'http_unreachable'
+    
+    async def _request(self, method, url, host, timeout, probe, headers=None):
+        """
+        Send one request through the rate limiter and return its status and headers
+        """
+        await limiter.acquire_async(host, 'subdomain_validation', deadline=self.deadline)
+        timeout = aiohttp.ClientTimeout(total=self.deadline.timeout(timeout, probe))
+        async with self.probe_limit:
+            async with self.session.request(method, url, headers=headers, allow_redirects=False, timeout=timeout) as response:
+                return response.status, response.headers
+
+class AsyncScanEngine:
+    """
+    Asyncio scan engine: network probes run as coroutines on a single event
+    loop, only nmap, WHOIS, HTML parsing and the OpenAI call use threads,
+    from a pool sized for max_workers domains
+    """
+    CT_CHUNK_SIZE = 64 * 1024
+    # Blocking calls a domain can have in threads at once: nmap, WHOIS,
+    # the header and tech stack analyzers, and discovery cache reads.
+    # Subdomain validation runs on the event loop.
+    THREADS_PER_DOMAIN = 4
+    
+    def __init__(self, scanner, max_probes=500, timeout=10):
+        self.scanner = scanner
+        self.max_domains = scanner.max_workers
+        self.max_probes = max_probes
+        self.timeout = timeout
+    
+    def run(self, domains):
+        """
+        Scan all domains, reporting progress through the owning scanner
+        """
+        asyncio.run(self._run(domains))
+    
+    async def _run(self, domains):
+        # asyncio's default executor is capped at min(32, cpus + 4) threads,
+        # so a few long nmap scans would starve every other blocking stage
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(
+            max_workers=self.max_domains * self.THREADS_PER_DOMAIN,
+            thread_name_prefix='async-stage'
+        ))
+        self.probe_limit = asyncio.Semaphore(self.max_probes)
+        connector = aiohttp.TCPConnector(limit=self.max_probes, ssl=False)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            domains = iter(domains)
+            
+            async def worker():
+                for domain in domains:
+                    if self.scanner.control.stopped:
+                        break
+                    async with self._domain_slot():
+                        if self.scanner.control.stopped:
+                            break
+                        self.scanner.start_domain(domain)
+                        try:
+                            result = await self.scan_domain(session, domain)
+                        except ScanInterrupted:
+                            self.scanner.abandon_domain(domain)
+                            continue
+                        except Exception as e:
+                            result = self.scanner.empty_result(domain)
+                            result['error'] = str(e)
+                        self.scanner.finish_domain(domain, result)
+            
+            await asyncio.gather(*(worker() for _ in range(self.max_domains)))
+    
+    @asynccontextmanager
+    async def _domain_slot(self):
+        """
+        Hold one of the shared scheduler's workers while a domain is scanned,
+        so async jobs get the same global budget and round-robin share as
+        threaded ones. Without a scheduler the engine's own workers suffice.
+        """
+        scheduler = self.scanner.scheduler
+        if scheduler is None:
+            yield
+            return
+        
+        loop = asyncio.get_running_loop()
+        acquired = loop.create_future()
+        release = threading.Event()
+        
+        def hold():
+            def grant():
+                if not acquired.done():
+                    acquired.set_result(None)
+                else:
+                    # The domain stopped waiting for its slot
+                    release.set()
+            try:
+                loop.call_soon_threadsafe(grant)
+            except RuntimeError:
+                # The event loop has already closed
+                return
+            release.wait()
+        
+        slot = scheduler.submit(self.scanner.job_id, hold)
+        try:
+            await acquired
+        except BaseException:
+            slot.cancel()
+            acquired.cancel()
+            raise
+        try:
+            yield
+        finally:
+            release.set()
+    
+    async def scan_domain(self, session, domain):
+        """
+        Run every scan module against a single domain
+        """
+        result = self.scanner.empty_result(domain)
+        deadline = self.scanner.control.deadline(self.scanner.domain_timeout)
+        
+        # Landing pages are fetched once and handed to the synchronous analyzers
+        fetcher = PageFetcher(domain, deadline=deadline)
+        pages = asyncio.ensure_future(self._fetch_pages(session, domain, fetcher))
+        
+        async def after_pages(func):
+            await pages
+            return await asyncio.to_thread(func)
+        
+        stages = {
+            'subdomains': self._enumerate_subdomains(session, domain, deadline),
+            'dns_records': self._analyze_dns(domain, deadline),
+            'open_ports': asyncio.to_thread(lambda: PortScanner(domain, deadline=deadline).scan()),
+            'ssl_info': self._analyze_ssl(domain, fetcher, pages),
+            'headers': after_pages(lambda: HeaderAnalyzer(domain, fetcher=fetcher).analyze()),
+            'tech_stack': after_pages(lambda: TechStackDetector(domain, fetcher=fetcher).detect())
+        }
+        tasks = {name: asyncio.ensure_future(stage) for name, stage in stages.items()}
+        
+        # Pausing or cancelling the job comes from another thread
+        loop = asyncio.get_running_loop()
+        
+        def cancel_stages():
+            for task in (pages, *tasks.values()):
+                task.cancel()
+        
+        deadline.on_cancel(lambda: loop.is_closed() or loop.call_soon_threadsafe(cancel_stages))
+        
+        # Stages still running once the deadline (plus grace) passes are cancelled
+        remaining = deadline.remaining()
+        timeout = None if remaining is None else remaining + self.scanner.DEADLINE_GRACE_SECONDS
+        _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if not pages.done():
+            pages.cancel()
+        self.scanner.control.check()
+        
+        error = None
+        for name, task in tasks.items():
+            if task in pending:
+                deadline.mark(name)
+            elif task.exception() is not None:
+                error = error or task.exception()
+            else:
+                result[name] = task.result()
+        
+        if error is not None:
+            result['error'] = str(error)
+        else:
+            result['risk_score'], result['risk_summary'] = await asyncio.to_thread(RiskAnalyzer(result, deadline=deadline).analyze)
+        
+        timed_out = deadline.probes_timed_out()
+        if timed_out:
+            result['timed_out'] = timed_out
+        return result
+    
+    async def _fetch_pages(self, session, domain, fetcher):
+        """
+        Fetch the landing page over HTTPS, falling back to HTTP
+        """
+        response = await self._fetch_page(session, 'https', domain, fetcher.deadline)
+        fetcher.prime('https', response)
+        if not response:
+            fetcher.prime('http', await self._fetch_page(session, 'http', domain, fetcher.deadline))
+    
+    async def _fetch_page(self, session, protocol, domain, deadline):
+        try:
+            await limiter.acquire_async(domain, 'http', deadline=deadline)
+            timeout = aiohttp.ClientTimeout(total=deadline.timeout(self.timeout, 'http'))
+            async with session.get(f'{protocol}://{domain}', timeout=timeout) as response:
+                # After a redirect to another host the connection's TLS is that
+                # host's; the SSL stage then makes its own handshake instead
+                same_host = not response.history or (response.url.host or '').lower() == domain.lower()
+                tls_info = self._tls_info(response) if same_host else None
+                content = await response.read()
+                return AsyncPageResponse(
+                    str(response.url),
+                    response.status,
+                    response.headers,
+                    content,
+                    response.charset,
+                    tls_info
+                )
+        except Exception:
+            return None
+    
+    def _tls_info(self, response):
+        """
+        Extract protocol and cipher from the connection's TLS transport, if any
+        """
+        try:
+            ssl_object = response.connection.transport.get_extra_info('ssl_object')
+            if ssl_object is None:
+                return None
+            
+            cipher = ssl_object.cipher()
+            return {
+                'version': ssl_object.version(),
+                'cipher': cipher[0] if cipher else None,
+                'bits': cipher[2] if cipher else None
+            }
+        except Exception:
+            return None
+    
+    @instrument('subdomains')
+    async def _enumerate_subdomains(self, session, domain, deadline):
+        """
+        Enumerate subdomains from all sources. Names are validated on the
+        event loop as they arrive, with the same checks and bookkeeping as
+        the threads engine, so both engines produce the same result.
+        """
+        candidates = SubdomainCandidates(
+            domain,
+            deadline=deadline,
+            cache=self.scanner.discovery_cache,
+            refresh=self.scanner.refresh_discovery
+        )
+        validator = AsyncSubdomainValidator(session, candidates, self.probe_limit)
+        try:
+            sources = await asyncio.gather(
+                self._discover(candidates, validator, 'amass', lambda found: self._run_tool(
+                    f"amass enum -d {domain} -passive".split(), found, deadline
+                )),
+                self._discover(candidates, validator, 'subfinder', lambda found: self._run_tool(
+                    f"subfinder -d {domain} -silent".split(), found, deadline
+                )),
+                self._discover(candidates, validator, 'crt_sh', lambda found: self._certificate_transparency(
+                    session, domain, found, deadline
+                )),
+                return_exceptions=True
+            )
+            for outcome in sources:
+                if isinstance(outcome, Exception):
+                    print(f"Error in subdomain enumeration: {str(outcome)}")
+            # A cancelled deadline makes the remaining lookups and probes fail fast
+            await validator.finish()
+        finally:
+            # Only has work left if the stage itself was cancelled
+            validator.cancel()
+        
+        return validator.result()
+    
+    async def _discover(self, candidates, validator, source, fetch):
+        """
+        Run a discovery source, or replay its cached names unless the job
+        asked for a refresh. fetch(found) returns whether the source
+        completed; only complete outputs are cached.
+        """
+        names = await asyncio.to_thread(candidates.cached, source)
+        if names is not None:
+            for name in names:
+                validator.found(name)
+            return
+        
+        found, names = candidates.collector(validator.found)
+        if await fetch(found):
+            await asyncio.to_thread(candidates.store, source, names)
+    
+    async def _run_tool(self, cmd, found, deadline):
+        """
+        Run an enumeration tool, validating each name as soon as it prints
+        it. The tool is killed when the deadline runs out; names printed
+        before that are kept. Returns whether it ran to completion.
+        """
+        try:
+            timeout = deadline.timeout(None, cmd[0])
+            with track(cmd[0]):
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                
+                async def read():
+                    async for line in process.stdout:
+                        found(line.decode(errors='replace').rstrip('\r\n'))
+                    return await process.wait()
+                
+                try:
+                    return await asyncio.wait_for(read(), timeout) == 0
+                except asyncio.TimeoutError:
+                    deadline.mark(cmd[0])
+                    return False
+                finally:
+                    # Stopped, cancelled or out of time; don't leave the tool
+                    # running, and reap it so no zombie is left behind
+                    if process.returncode is None:
+                        process.kill()
+                        await process.wait()
+        except Exception as e:
+            print(f"{cmd[0]} enumeration error: {str(e)}")
+            return False
+    
+    async def _certificate_transparency(self, session, domain, found, deadline):
+        """
+        Query certificate transparency logs, validating each name as the
+        response is parsed. Returns whether the whole response was read.
+        """
+        try:
+            url = ct_log_url(domain)
+            await limiter.acquire_async(ct_log_host(), 'ct_log', deadline=deadline)
+            with track('crt_sh'):
+                async with session.get(url, timeout=aiohttp.ClientTimeout(total=None, sock_read=deadline.timeout(60, 'crt_sh'))) as response:
+                    if response.status != 200:
+                        return False
+                    
+                    parser = JSONArrayParser()
+                    async for chunk in response.content.iter_chunked(self.CT_CHUNK_SIZE):
+                        for entry in parser.feed(chunk):
+                            for name in entry_names(entry):
+                                found(name)
+                        if deadline.expired():
+                            # Keep the names read so far
+                            deadline.mark('crt_sh')
+                            return False
+                    parser.close()
+                    return True
+        except Exception as e:
+            print(f"Certificate transparency query error: {str(e)}")
+            return False
+    
+    @instrument('dns')
+    async def _analyze_dns(self, domain, deadline):
+        """
+        Resolve DNS records asynchronously; WHOIS has no async client and runs in a thread
+        """
+        analyzer = DNSAnalyzer(domain, deadline=deadline)
+        resolver = configure_resolver(dns.asyncresolver.Resolver())
+        resolver.timeout = analyzer.resolver.timeout
+        resolver.lifetime = analyzer.resolver.lifetime
+        
+        record_types = ('A', 'AAAA', 'MX', 'NS', 'TXT')
+        whois_info, dmarc_records, *records = await asyncio.gather(
+            asyncio.to_thread(analyzer.whois_info),
+            self._resolve(resolver, f'_dmarc.{domain}', 'TXT', deadline),
+            *(self._resolve(resolver, domain, record_type, deadline) for record_type in record_types)
+        )
+        records = dict(zip(record_types, records))
+        
+        return deadline.annotate('dns', {
+            'whois': whois_info,
+            'a_records': records['A'],
+            'aaaa_records': records['AAAA'],
+            'mx_records': records['MX'],
+            'ns_records': records['NS'],
+            'txt_records': records['TXT'],
+            'spf_record': next((record for record in records['TXT'] if record.startswith('v=spf1')), None),
+            'dmarc_record': next((record for record in dmarc_records if record.startswith('v=DMARC1')), None)
+        })
+    
+    async def _resolve(self, resolver, name, record_type, deadline):
+        try:
+            async with self.probe_limit:
+                answers = await resolver.resolve(name, record_type, lifetime=deadline.timeout(resolver.lifetime, 'dns'))
+            return [str(rdata) for rdata in answers]
+        except Exception:
+            return []
+    
+    @instrument('ssl')
+    async def _analyze_ssl(self, domain, fetcher, pages):
+        """
+        Run the SSLAnalyzer checks with concurrent asyncio handshakes
+        """
+        analyzer = SSLAnalyzer(domain, fetcher=fetcher, deadline=fetcher.deadline)
+        try:
+            certificate, protocol_support, _ = await asyncio.gather(
+                self._certificate_info(analyzer),
+                asyncio.gather(*(
+                    self._supports(domain, lambda protocol=protocol: analyzer.protocol_context(protocol), analyzer.deadline)
+                    for protocol in analyzer.PROTOCOLS
+                )),
+                pages
+            )
+            ciphers, vulnerabilities = await asyncio.gather(
+                self._check_ciphers(analyzer),
+                self._check_vulnerabilities(analyzer)
+            )
+            
+            return analyzer.deadline.annotate('ssl', {
+                'certificate': certificate,
+                'protocols': dict(zip(analyzer.PROTOCOLS, protocol_support)),
+                'ciphers': ciphers,
+                'vulnerabilities': vulnerabilities
+            })
+        
+        except Exception as e:
+            return {'error': str(e)}
+    
+    async def _handshake(self, domain, make_context, deadline):
+        """
+        Complete a TLS handshake on port 443 and return the peer certificate and cipher
+        """
+        context = make_context()
+        await limiter.acquire_async(domain, 'tls', deadline=deadline)
+        async with self.probe_limit:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(domain, 443, ssl=context, server_hostname=domain),
+                deadline.timeout(self.timeout, 'tls')
+            )
+            try:
+                ssl_object = writer.get_extra_info('ssl_object')
+                return ssl_object.getpeercert(binary_form=True), ssl_object.cipher()
+            finally:
+                writer.close()
+    
+    async def _supports(self, domain, make_context, deadline):
+        try:
+            await self._handshake(domain, make_context, deadline)
+            return True
+        except Exception:
+            return False
+    
+    async def _certificate_info(self, analyzer):
+        try:
+            cert, _ = await self._handshake(analyzer.domain, lambda: analyzer.context, analyzer.deadline)
+            return analyzer.parse_certificate(cert)
+        except Exception as e:
+            return {'error': str(e)}
+    
+    async def _check_ciphers(self, analyzer):
+        # Reuse the handshake made when fetching the landing page, if there was one
+        tls_info = getattr(analyzer.fetcher.get('https'), 'tls_info', None)
+        if tls_info and tls_info.get('cipher'):
+            return {
+                'name': tls_info['cipher'],
+                'version': tls_info['version'],
+                'bits': tls_info['bits']
+            }
+        
+        try:
+            _, cipher = await self._handshake(analyzer.domain, lambda: analyzer.context, analyzer.deadline)
+            return {
+                'name': cipher[0],
+                'version': cipher[1],
+                'bits': cipher[2]
+            }
+        except Exception:
+            return None
+    
+    async def _check_vulnerabilities(self, analyzer):
+        response = analyzer.fetcher.get('https')
+        poodle, beast = await asyncio.gather(
+            self._supports(analyzer.domain, analyzer.poodle_context, analyzer.deadline),
+            self._supports(analyzer.domain, analyzer.beast_context, analyzer.deadline)
+        )
+        
+        return {
+            'heartbleed': response is not None and 'heartbleed' in response.headers.get('server', '').lower(),
+            'poodle': poodle,
+            'beast': beast,
+            'freak': False,
+            'logjam': False
+        }
\ No newline at end of file
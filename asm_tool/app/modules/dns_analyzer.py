@@ -1,20 +1,28 @@
 import dns.resolver
 import whois
 from datetime import datetime
+from app.utils.deadline import Deadline, DeadlineExceeded, run_with_timeout
+from app.utils.metrics import instrument
+from app.utils.network import configure_resolver
 
 class DNSAnalyzer:
-    def __init__(self, domain):
+    # python-whois has no timeout of its own
+    WHOIS_TIMEOUT = 30
+    
+    def __init__(self, domain, deadline=None):
         self.domain = domain
-        self.resolver = dns.resolver.Resolver()
+        self.deadline = deadline or Deadline()
+        self.resolver = configure_resolver(dns.resolver.Resolver())
         self.resolver.timeout = 5
         self.resolver.lifetime = 5
     
+    @instrument('dns')
     def analyze(self):
         """
         Analyze DNS records and WHOIS information
         """
         result = {
-            'whois': self._get_whois_info(),
+            'whois': self.whois_info(),
             'a_records': self._get_records('A'),
             'aaaa_records': self._get_records('AAAA'),
             'mx_records': self._get_records('MX'),
@@ -24,20 +32,23 @@ class DNSAnalyzer:
             'dmarc_record': self._get_dmarc_record()
         }
         
-        return result
+        return self.deadline.annotate('dns', result)
     
-    def _get_whois_info(self):
+    def whois_info(self):
         """
         Get WHOIS information for the domain
         """
         try:
-            w = whois.whois(self.domain)
+            w = run_with_timeout(whois.whois, self.deadline.timeout(self.WHOIS_TIMEOUT, 'whois'), self.domain)
             return {
                 'registrar': w.registrar,
                 'creation_date': w.creation_date.isoformat() if isinstance(w.creation_date, datetime) else None,
                 'expiration_date': w.expiration_date.isoformat() if isinstance(w.expiration_date, datetime) else None,
                 'name_servers': w.name_servers if isinstance(w.name_servers, list) else [w.name_servers] if w.name_servers else []
             }
+        except DeadlineExceeded as e:
+            self.deadline.mark('whois')
+            return {'error': str(e), 'timed_out': True}
         except Exception as e:
             return {'error': str(e)}
     
@@ -46,7 +57,7 @@ class DNSAnalyzer:
         Get DNS records of specified type
         """
         try:
-            answers = self.resolver.resolve(self.domain, record_type)
+            answers = self.resolver.resolve(self.domain, record_type, lifetime=self.deadline.timeout(5, 'dns'))
             return [str(rdata) for rdata in answers]
         except Exception:
             return []
@@ -70,7 +81,7 @@ class DNSAnalyzer:
         """
         try:
             dmarc_domain = f'_dmarc.{self.domain}'
-            answers = self.resolver.resolve(dmarc_domain, 'TXT')
+            answers = self.resolver.resolve(dmarc_domain, 'TXT', lifetime=self.deadline.timeout(5, 'dns'))
             for rdata in answers:
                 if str(rdata).startswith('v=DMARC1'):
                     return str(rdata)
@@ -1,12 +1,10 @@
-import requests
-from urllib3.exceptions import InsecureRequestWarning
-
-# Disable SSL verification warnings
-requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+from app.utils.page_fetcher import PageFetcher
+from app.utils.metrics import instrument
 
 class HeaderAnalyzer:
-    def __init__(self, domain):
+    def __init__(self, domain, fetcher=None):
         self.domain = domain
+        self.fetcher = fetcher or PageFetcher(domain)
         self.headers = {}
         self.security_headers = {
             'Strict-Transport-Security': {
@@ -46,6 +44,7 @@ class HeaderAnalyzer:
             }
         }
     
+    @instrument('headers')
     def analyze(self):
         """
         Analyze HTTP security headers
@@ -72,12 +71,7 @@ class HeaderAnalyzer:
         """
         Make HTTP request to the domain
         """
-        try:
-            url = f'{protocol}://{self.domain}'
-            response = requests.get(url, verify=False, timeout=10)
-            return response
-        except:
-            return None
+        return self.fetcher.get(protocol)
     
     def _analyze_headers(self):
         """
@@ -0,0 +1,286 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from app import socketio
+from app.utils.checkpoint import ScanCheckpoint
+from app.utils.domain_reader import DomainReader
+from app.utils.result_sink import ResultSink
+from app.utils.scheduler import FairScheduler
+from app.utils.status_publisher import StatusPublisher
+from .scanner import ASMScanner
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class JobManager:
+    """
+    Give every upload its own job directory (input, status and results) and
+    run all jobs on one FairScheduler so they share the concurrency budget.
+    With a WorkQueue, domains are queued for worker processes instead.
+    """
+    def __init__(self, output_dir, max_workers=8, queue=None, **scanner_options):
+        self.jobs_dir = os.path.join(output_dir, 'jobs')
+        self.scheduler = FairScheduler(max_workers)
+        self.queue = queue
+        self.scanner_options = scanner_options
+        self.scanners = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.jobs_dir, exist_ok=True)
+    
+    def create(self, file, refresh_discovery=False):
+        """
+        Store an uploaded CSV and start scanning it. An unfinished job with
+        the same input is resumed instead of starting a new one.
+        refresh_discovery makes the job run every subdomain discovery source
+        instead of reusing cached outputs.
+        """
+        fd, upload_file = tempfile.mkstemp(dir=self.jobs_dir, suffix='.csv')
+        os.close(fd)
+        file.save(upload_file)
+        
+        job_id = self._find_resumable(ScanCheckpoint.fingerprint(upload_file))
+        if job_id is None:
+            job_id = uuid.uuid4().hex
+            os.makedirs(self.job_dir(job_id))
+            self._write_meta(job_id, {
+                'job_id': job_id,
+                'filename': file.filename,
+                'created': datetime.now().isoformat(),
+                'refresh_discovery': refresh_discovery
+            })
+        elif refresh_discovery:
+            meta = self._read_meta(job_id) or {'job_id': job_id}
+            meta['refresh_discovery'] = True
+            self._write_meta(job_id, meta)
+        
+        os.replace(upload_file, os.path.join(self.job_dir(job_id), 'input.csv'))
+        self.start(job_id)
+        return job_id
+    
+    def start(self, job_id, resume=None):
+        """
+        Start (or resume) scanning a job in the background. resume overrides
+        the configured resume option.
+        """
+        options = dict(self.scanner_options)
+        if resume is not None:
+            options['resume'] = resume
+        meta = self._read_meta(job_id) or {}
+        options['refresh_discovery'] = meta.get('refresh_discovery', False)
+        
+        with self.lock:
+            if job_id in self.scanners:
+                return self.scanners[job_id]
+            
+            if self.queue is not None:
+                self.scanners[job_id] = None
+                socketio.start_background_task(self._run_queued, job_id)
+                return None
+            
+            scanner = ASMScanner(
+                os.path.join(self.job_dir(job_id), 'input.csv'),
+                max_workers=self.scheduler.max_workers,
+                job_id=job_id,
+                scheduler=self.scheduler,
+                **options
+            )
+            self.scanners[job_id] = scanner
+        
+        socketio.start_background_task(self._run, job_id, scanner)
+        return scanner
+    
+    def _run(self, job_id, scanner):
+        try:
+            scanner.scan_domains()
+        except Exception as e:
+            print(f"Error in scan job {job_id}: {str(e)}")
+        finally:
+            with self.lock:
+                self.scanners.pop(job_id, None)
+    
+    def _run_queued(self, job_id):
+        """
+        Queue a job's domains for the worker processes and mirror the
+        aggregated progress into the job's status file until it completes
+        """
+        job_dir = self.job_dir(job_id)
+        interval = self.scanner_options.get('status_interval', 0.5)
+        publisher = StatusPublisher(
+            os.path.join(job_dir, 'scan_status.json'),
+            emit=lambda status: socketio.emit('status_update', status),
+            min_interval=interval
+        )
+        
+        try:
+            self.queue.add_job(job_id, job_dir)
+            self.queue.enqueue(job_id, DomainReader(os.path.join(job_dir, 'input.csv')))
+            self.queue.finish_enqueue(job_id)
+            
+            while True:
+                status = self.queue.job_status(job_id)
+                publisher.publish(status)
+                if status['status'] in ('completed', 'cancelled'):
+                    break
+                socketio.sleep(max(interval, 1))
+            
+            ResultSink(job_dir).compact_if_stale()
+        except Exception as e:
+            print(f"Error in queued job {job_id}: {str(e)}")
+        finally:
+            publisher.close()
+            with self.lock:
+                self.scanners.pop(job_id, None)
+    
+    def pause(self, job_id):
+        """
+        Pause a running job. Domains in flight are interrupted and scanned
+        again when the job is resumed. Raises ValueError if it is not running.
+        """
+        if self.queue is not None:
+            return self._set_queue_state(job_id, 'paused', ('active',))
+        return self._running_scanner(job_id).pause()
+    
+    def cancel(self, job_id):
+        """
+        Stop a running or paused job for good, keeping the results found so far
+        """
+        if self.queue is not None:
+            return self._set_queue_state(job_id, 'cancelled', ('active', 'paused'))
+        
+        with self.lock:
+            scanner = self.scanners.get(job_id)
+        if scanner is not None:
+            return scanner.cancel()
+        
+        checkpoint = ScanCheckpoint(self.job_dir(job_id))
+        state = checkpoint.load()
+        if not state or state.get('status') != 'paused':
+            raise ValueError('Job is not running')
+        checkpoint.save(state['input'], 'cancelled')
+        
+        status = self.status(job_id) or {'job_id': job_id}
+        status['status'] = 'cancelled'
+        publisher = StatusPublisher(
+            os.path.join(self.job_dir(job_id), 'scan_status.json'),
+            emit=lambda status: socketio.emit('status_update', status)
+        )
+        publisher.publish(status)
+        publisher.close()
+        return 'cancelled'
+    
+    def resume(self, job_id):
+        """
+        Continue a paused job from where it stopped
+        """
+        if self.queue is not None:
+            self._set_queue_state(job_id, 'active', ('paused',))
+            self.start(job_id)
+            return 'scanning'
+        
+        with self.lock:
+            if job_id in self.scanners:
+                raise ValueError('Job is still running')
+        state = ScanCheckpoint(self.job_dir(job_id)).load()
+        if not state or state.get('status') != 'paused':
+            raise ValueError('Job is not paused')
+        self.start(job_id, resume=True)
+        return 'scanning'
+    
+    def _running_scanner(self, job_id):
+        with self.lock:
+            scanner = self.scanners.get(job_id)
+        if scanner is None:
+            raise ValueError('Job is not running')
+        return scanner
+    
+    def _set_queue_state(self, job_id, state, current):
+        status = self.queue.job_status(job_id)
+        if status is None or status['status'] == 'completed' or not self.queue.set_job_state(job_id, state, current):
+            raise ValueError(f"Job cannot be {'resumed' if state == 'active' else state}")
+        return state
+    
+    def _find_resumable(self, fingerprint):
+        if not self.scanner_options.get('resume', True):
+            return None
+        
+        with self.lock:
+            running = set(self.scanners)
+        
+        for job in self.list_jobs():
+            job_id = job['job_id']
+            if job_id not in running and ScanCheckpoint(self.job_dir(job_id)).can_resume(fingerprint):
+                return job_id
+        return None
+    
+    def job_dir(self, job_id):
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            raise KeyError(job_id)
+        return os.path.join(self.jobs_dir, job_id)
+    
+    def exists(self, job_id):
+        try:
+            return os.path.isdir(self.job_dir(job_id))
+        except KeyError:
+            return False
+    
+    def status(self, job_id):
+        """
+        Return the last published status of a job, or None if it has none yet.
+        In queue mode the status is aggregated across workers from the queue.
+        """
+        if self.queue is not None:
+            status = self.queue.job_status(job_id)
+            if status is not None:
+                return status
+        
+        try:
+            with open(os.path.join(self.job_dir(job_id), 'scan_status.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def results_file(self, job_id):
+        """
+        Return the path of the job's scan_results.json if it is up to date,
+        or None while the job is still running and the document has to be
+        streamed from the records instead. Jobs compact it when they end, so
+        only a job that stopped before doing so is compacted here.
+        """
+        sink = ResultSink(self.job_dir(job_id))
+        if not sink.is_stale():
+            return sink.results_file
+        with self.lock:
+            if job_id in self.scanners:
+                return None
+        return sink.compact()
+    
+    def list_jobs(self):
+        """
+        Return metadata for every job, newest first
+        """
+        jobs = []
+        for job_id in os.listdir(self.jobs_dir):
+            if not JOB_ID_PATTERN.match(job_id):
+                continue
+            meta = self._read_meta(job_id)
+            if meta is not None:
+                jobs.append(meta)
+        return sorted(jobs, key=lambda job: job.get('created', ''), reverse=True)
+    
+    def latest(self):
+        jobs = self.list_jobs()
+        return jobs[0]['job_id'] if jobs else None
+    
+    def _read_meta(self, job_id):
+        try:
+            with open(os.path.join(self.job_dir(job_id), 'job.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_meta(self, job_id, meta):
+        with open(os.path.join(self.job_dir(job_id), 'job.json'), 'w') as f:
+            json.dump(meta, f)
\ No newline at end of file
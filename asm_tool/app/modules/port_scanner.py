@@ -1,15 +1,25 @@
 import nmap
+import shlex
 import socket
+import subprocess
 from concurrent.futures import ThreadPoolExecutor
+from app.utils.deadline import Deadline
+from app.utils.rate_limit import limiter
+from app.utils.metrics import instrument
 
 class PortScanner:
-    def __init__(self, domain):
+    # Extra time python-nmap waits beyond nmap's own --host-timeout
+    NMAP_GRACE_SECONDS = 30
+    
+    def __init__(self, domain, deadline=None):
         self.domain = domain
+        self.deadline = deadline or Deadline()
         self.nm = nmap.PortScanner()
         self.common_ports = [
             21, 22, 23, 25, 53, 80, 110, 143, 443, 465, 587, 993, 995, 3306, 3389, 5432, 8080
         ]
     
+    @instrument('ports')
     def scan(self):
         """
         Perform port scan on the domain
@@ -22,8 +32,20 @@ class PortScanner:
             common_results = self._scan_ports(ip, self.common_ports)
             
             # If common ports are open, perform a full scan
-            if any(port['state'] == 'open' for port in common_results):
+            if any(port.get('state') == 'open' for port in common_results):
+                if self.deadline.expired():
+                    self.deadline.mark('nmap_full_scan')
+                    return common_results
+                
                 full_results = self._full_scan(ip)
+                if self.deadline.expired():
+                    # The full scan was cut short; keep what the common scan found
+                    self.deadline.mark('nmap_full_scan')
+                    found = {port['port'] for port in full_results if 'port' in port}
+                    return [port for port in full_results if 'port' in port] + [
+                        port for port in common_results
+                        if port.get('state') == 'open' and port['port'] not in found
+                    ]
                 return full_results
             
             return common_results
@@ -40,7 +62,9 @@ class PortScanner:
             port_str = ','.join(map(str, ports))
             
             # Perform the scan
-            self.nm.scan(ip, port_str, arguments='-sV -T4')
+            limiter.acquire(self.domain, 'nmap', ip=ip, deadline=self.deadline)
+            arguments, timeout = self._nmap_arguments('-sV -T4', 'nmap')
+            self._run_nmap(ip, arguments, timeout, ports=port_str)
             
             results = []
             for port in ports:
@@ -67,13 +91,16 @@ class PortScanner:
         except Exception as e:
             return [{'error': str(e)}]
     
+    @instrument('ports_full_scan')
     def _full_scan(self, ip):
         """
         Perform a full port scan
         """
         try:
             # Perform a full scan with service detection
-            self.nm.scan(ip, arguments='-sV -T4 -p-')
+            limiter.acquire(self.domain, 'nmap', ip=ip, deadline=self.deadline)
+            arguments, timeout = self._nmap_arguments('-sV -T4 -p-', 'nmap_full_scan')
+            self._run_nmap(ip, arguments, timeout)
             
             results = []
             if ip in self.nm.all_hosts():
@@ -92,6 +119,54 @@ class PortScanner:
         except Exception as e:
             return [{'error': str(e)}]
     
+    def _nmap_arguments(self, arguments, probe):
+        """
+        Bound an nmap run by the remaining budget: nmap gives up on the host
+        itself, and python-nmap kills the process if that does not happen
+        """
+        remaining = self.deadline.timeout(None, probe)
+        if remaining is None:
+            return arguments, 0
+        return f'{arguments} --host-timeout {max(1, int(remaining))}s', int(remaining) + self.NMAP_GRACE_SECONDS
+    
+    def _run_nmap(self, ip, arguments, timeout, ports=None):
+        """
+        Run nmap and load its XML report into self.nm. The process is started
+        here rather than by python-nmap so it can be killed when the scan is
+        paused or cancelled.
+        """
+        cmd = [getattr(self.nm, '_nmap_path', 'nmap'), '-oX', '-', ip]
+        if ports:
+            cmd += ['-p', ports]
+        cmd += shlex.split(arguments)
+        
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with self.deadline.watch(process):
+            try:
+                output, error = process.communicate(timeout=timeout or None)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise nmap.PortScannerTimeout('Timeout from nmap process')
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+        
+        if self.deadline.cancelled:
+            raise nmap.PortScannerError('nmap stopped')
+        
+        # Warnings are reported on stderr even when the scan succeeds
+        error = error.decode(errors='replace')
+        warnings = '\n'.join(line for line in error.splitlines() if line.startswith('Warning: '))
+        errors = '\n'.join(line for line in error.splitlines() if line and not line.startswith('Warning: '))
+        return self.nm.analyse_nmap_xml_scan(
+            nmap_xml_output=output.decode(errors='replace'),
+            nmap_err=errors,
+            nmap_err_keep_trace=errors,
+            nmap_warn_keep_trace=warnings
+        )
+    
     def _is_port_open(self, ip, port):
         """
         Quick check if a port is open
@@ -0,0 +1,183 @@
+import json
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.utils.result_sink import ResultSink
+from app.utils.scan_control import ScanInterrupted
+from .scanner import ASMScanner
+
+class QueueWorker:
+    """
+    Worker process for queue mode: leases domains from the shared WorkQueue,
+    scans them, appends results to the job's result file and marks the task
+    done. Run as many of these as there are cores, on as many hosts as share
+    the outputs directory.
+    """
+    def __init__(self, queue, worker_id=None, concurrency=4, lease_seconds=120, poll_interval=2,
+                 result_index=None, **scanner_options):
+        self.queue = queue
+        self.worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+        self.concurrency = max(1, int(concurrency))
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.result_index = result_index
+        self.scanner_options = scanner_options
+        self.active = {}
+        self.scanners = {}
+        self.sinks = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+    
+    def stop(self):
+        """
+        Stop leasing new work; tasks already running are finished
+        """
+        self.stopping.set()
+        self.wakeup.set()
+    
+    def run(self, exit_when_idle=False):
+        heartbeat = threading.Thread(target=self._heartbeat, name='queue-heartbeat', daemon=True)
+        heartbeat.start()
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while not self.stopping.is_set():
+                self.wakeup.clear()
+                self._check_jobs()
+                self._reap_failed()
+                with self.lock:
+                    free = self.concurrency - len(self.active)
+                
+                tasks = self.queue.lease(self.worker_id, self.lease_seconds, free) if free > 0 else []
+                for task in tasks:
+                    with self.lock:
+                        self.active[task['task_id']] = task
+                    executor.submit(self._process, task)
+                
+                if not tasks:
+                    with self.lock:
+                        idle = not self.active
+                    if exit_when_idle and idle:
+                        break
+                    self.wakeup.wait(self.poll_interval)
+        
+        self.stopping.set()
+    
+    def _process(self, task):
+        try:
+            scanner = self._scanner(task)
+            result = scanner.scan_domain(task['domain'])
+            self._sink(task).append(result)
+            scanner.index_result(result)
+            self.queue.complete(self.worker_id, task['task_id'], result.get('stage_timings'))
+        except ScanInterrupted:
+            # The job was paused or cancelled; put the domain back for a resume
+            self.queue.release(self.worker_id, task['task_id'])
+        except Exception as e:
+            print(f"Error scanning {task['domain']} for job {task['job_id']}: {str(e)}")
+            if task['attempts'] >= self.queue.max_attempts:
+                self._record_failure(task, f"Scan failed after {task['attempts']} attempts: {str(e)}")
+            # Otherwise the lease expires and another worker retries the task
+        finally:
+            with self.lock:
+                self.active.pop(task['task_id'], None)
+            self.wakeup.set()
+    
+    def _check_jobs(self):
+        """
+        Interrupt the running tasks of jobs that were paused or cancelled
+        """
+        with self.lock:
+            job_ids = {task['job_id'] for task in self.active.values()}
+        try:
+            states = self.queue.job_states(job_ids)
+        except Exception as e:
+            print(f"Error checking job states: {str(e)}")
+            return
+        
+        for job_id, state in states.items():
+            if state == 'active':
+                continue
+            with self.lock:
+                # Tasks leased after a resume get a fresh scanner
+                scanner = self.scanners.pop(job_id, None)
+            if scanner is None:
+                continue
+            if state == 'paused':
+                scanner.control.pause()
+            else:
+                scanner.control.cancel()
+    
+    def _record_failure(self, task, error):
+        """
+        Give up on a task and write an error record for its domain, so it
+        does not silently disappear from the job's results
+        """
+        try:
+            if not self.queue.fail(self.worker_id, task['task_id'], error):
+                return
+            self._write_failure(task, error)
+        except Exception as e:
+            print(f"Error recording failure of {task['domain']}: {str(e)}")
+    
+    def _reap_failed(self):
+        """
+        Write error records for tasks whose last attempt died with its worker
+        """
+        try:
+            for task in self.queue.reap_failed():
+                self._write_failure(task, task['error'])
+        except Exception as e:
+            print(f"Error reaping failed tasks: {str(e)}")
+    
+    def _write_failure(self, task, error):
+        result = ASMScanner.empty_result(task['domain'])
+        result['error'] = error
+        self._sink(task).append(result)
+        if self.result_index is not None:
+            try:
+                self.result_index.add(result, task['job_id'])
+            except Exception as e:
+                print(f"Error indexing result for {task['domain']}: {str(e)}")
+    
+    def _scanner(self, task):
+        with self.lock:
+            scanner = self.scanners.get(task['job_id'])
+            if scanner is None:
+                scanner = ASMScanner(
+                    os.path.join(task['job_dir'], 'input.csv'),
+                    job_id=task['job_id'],
+                    result_index=self.result_index,
+                    refresh_discovery=self._job_meta(task).get('refresh_discovery', False),
+                    **self.scanner_options
+                )
+                self.scanners[task['job_id']] = scanner
+            return scanner
+    
+    def _job_meta(self, task):
+        try:
+            with open(os.path.join(task['job_dir'], 'job.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _sink(self, task):
+        with self.lock:
+            sink = self.sinks.get(task['job_id'])
+            if sink is None:
+                sink = ResultSink(task['job_dir'])
+                self.sinks[task['job_id']] = sink
+            return sink
+    
+    def _heartbeat(self):
+        """
+        Keep the leases of running tasks alive
+        """
+        while not self.stopping.wait(self.lease_seconds / 3):
+            with self.lock:
+                task_ids = list(self.active)
+            try:
+                self.queue.heartbeat(self.worker_id, task_ids, self.lease_seconds)
+            except Exception as e:
+                print(f"Error sending heartbeat: {str(e)}")
\ No newline at end of file
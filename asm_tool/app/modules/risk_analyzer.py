@@ -1,16 +1,20 @@
 import os
 import openai
 from datetime import datetime
+from app.utils.deadline import Deadline
+from app.utils.metrics import instrument, track
 
 class RiskAnalyzer:
-    def __init__(self, scan_results):
+    def __init__(self, scan_results, deadline=None):
         self.scan_results = scan_results
+        self.deadline = deadline or Deadline()
         self.risk_score = 0
         self.risk_summary = ""
         
         # Initialize OpenAI client
         openai.api_key = os.getenv('OPENAI_API_KEY')
     
+    @instrument('risk')
     def analyze(self):
         """
         Analyze scan results and generate risk score and summary
@@ -91,19 +95,27 @@ class RiskAnalyzer:
         Generate AI-powered risk analysis using OpenAI
         """
         try:
+            if self.deadline.expired():
+                # No budget left for the AI call; keep the base analysis
+                self.deadline.mark('openai')
+                self.risk_summary = "AI analysis skipped (scan deadline reached). Using base analysis:\n" + "\n".join(self.initial_issues)
+                return
+            
             # Prepare the prompt
             prompt = self._prepare_analysis_prompt()
             
             # Call OpenAI API
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a cybersecurity expert analyzing domain security scan results."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
+            with track('openai'):
+                response = openai.ChatCompletion.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {"role": "system", "content": "You are a cybersecurity expert analyzing domain security scan results."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=500,
+                    temperature=0.7,
+                    request_timeout=self.deadline.timeout(60, 'openai')
+                )
             
             # Extract the analysis
             if response.choices and response.choices[0].message:
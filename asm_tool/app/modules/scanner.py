@@ -1,109 +1,453 @@
-import pandas as pd
-import json
 import os
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
 from app import socketio
-from .subdomain_enum import SubdomainEnumerator
-from .dns_analyzer import DNSAnalyzer
-from .port_scanner import PortScanner
-from .ssl_analyzer import SSLAnalyzer
-from .header_analyzer import HeaderAnalyzer
-from .tech_stack import TechStackDetector
-from .risk_analyzer import RiskAnalyzer
+from app.utils.checkpoint import ScanCheckpoint
+from app.utils.domain_reader import DomainReader
+from app.utils import incremental
+from app.utils.lazy import LazyObject
+from app.utils.metrics import instrument
+from app.utils.profiler import DomainProfiler
+from app.utils.result_sink import ResultSink
+from app.utils.scan_control import ScanControl, ScanInterrupted
+from app.utils.stage_graph import StageGraph
+from app.utils.status_publisher import StatusPublisher
+
+# Scan modules pull in nmap, pyOpenSSL, BeautifulSoup, python-whois, openai and
+# requests; they are imported when the stage that needs them first runs
+SubdomainEnumerator = LazyObject('app.modules.subdomain_enum', 'SubdomainEnumerator')
+DNSAnalyzer = LazyObject('app.modules.dns_analyzer', 'DNSAnalyzer')
+PortScanner = LazyObject('app.modules.port_scanner', 'PortScanner')
+SSLAnalyzer = LazyObject('app.modules.ssl_analyzer', 'SSLAnalyzer')
+HeaderAnalyzer = LazyObject('app.modules.header_analyzer', 'HeaderAnalyzer')
+TechStackDetector = LazyObject('app.modules.tech_stack', 'TechStackDetector')
+RiskAnalyzer = LazyObject('app.modules.risk_analyzer', 'RiskAnalyzer')
+PageFetcher = LazyObject('app.utils.page_fetcher', 'PageFetcher')
 
 class ASMScanner:
-    def __init__(self, input_file):
+    ENGINES = ('threads', 'async')
+    
+    # Time stages get to return partial results after the domain deadline
+    # before they are abandoned
+    DEADLINE_GRACE_SECONDS = 30
+    
+    def __init__(self, input_file, max_workers=1, engine='threads', status_interval=0.5, resume=True,
+                 job_id=None, scheduler=None, result_index=None, incremental=False, incremental_max_age=7,
+                 profile='off', profile_top=10, domain_timeout=None, discovery_cache=None, refresh_discovery=False):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown scan engine '{engine}', expected one of {', '.join(self.ENGINES)}")
+        if incremental and engine != 'threads':
+            raise ValueError("Incremental scans require the 'threads' engine")
+        if profile != 'off' and engine != 'threads':
+            raise ValueError("Profiling requires the 'threads' engine")
+        
         self.input_file = input_file
         self.output_dir = os.path.dirname(input_file)
-        self.domains = []
-        self.results = {}
+        self.max_workers = max(1, int(max_workers))
+        self.engine = engine
+        self.resume = resume
+        self.job_id = job_id
+        self.scheduler = scheduler
+        self.result_index = result_index
+        self.incremental = incremental and result_index is not None
+        self.incremental_max_age = timedelta(days=incremental_max_age)
+        self.domain_timeout = domain_timeout or None
+        self.discovery_cache = discovery_cache
+        self.refresh_discovery = refresh_discovery
+        self.reader = None
+        self.sink = ResultSink(self.output_dir)
+        self.checkpoint = ScanCheckpoint(self.output_dir)
+        self.control = ScanControl()
+        self.profiler = DomainProfiler(self.output_dir, profile, profile_top) if profile != 'off' else None
+        self.publisher = StatusPublisher(
+            os.path.join(self.output_dir, 'scan_status.json'),
+            emit=lambda status: socketio.emit('status_update', status),
+            min_interval=status_interval
+        )
+        self.lock = threading.Lock()
         self.status = {
-            'total': 0,
+            'job_id': job_id,
+            'total': None,
             'completed': 0,
             'current_domain': '',
+            'in_progress': [],
+            'resumed': 0,
+            'stage_seconds': {},
+            'slowest_stage': None,
             'status': 'initialized'
         }
     
     def load_domains(self):
-        df = pd.read_csv(self.input_file)
-        self.domains = df['domain'].tolist()
-        self.status['total'] = len(self.domains)
+        """
+        Prepare a streaming reader over the input. The total stays unknown
+        (None) until the reader has been consumed.
+        """
+        self.reader = DomainReader(self.input_file)
+        self.status['total'] = None
         self._update_status()
     
+    def _iter_domains(self, finished=()):
+        """
+        Yield domains that still need scanning and publish the total once
+        the whole input has been read
+        """
+        for domain in self.reader:
+            if domain not in finished:
+                yield domain
+        
+        with self.lock:
+            self.status['total'] = self.reader.count
+            self._update_status()
+    
     def _update_status(self):
-        status_file = os.path.join(self.output_dir, 'scan_status.json')
-        with open(status_file, 'w') as f:
-            json.dump(self.status, f)
-        socketio.emit('status_update', self.status)
+        # Written and emitted from the publisher thread, coalesced to its rate limit
+        self.publisher.publish(self.status)
+    
+    def pause(self):
+        """
+        Stop scanning and keep the progress so the job can be resumed
+        """
+        return self._stop(self.control.pause)
+    
+    def cancel(self):
+        """
+        Stop scanning for good; results found so far are kept
+        """
+        return self._stop(self.control.cancel)
+    
+    def _stop(self, stop):
+        with self.lock:
+            state = stop()
+            if self.status['status'] not in ('completed', 'paused', 'cancelled'):
+                # Shown until the domains in flight have wound down
+                self.status['status'] = 'pausing' if state == 'paused' else 'cancelling'
+                self._update_status()
+        return state
     
     def scan_domains(self):
-        self.load_domains()
-        self.status['status'] = 'scanning'
-        self._update_status()
-        
-        for domain in self.domains:
-            self.status['current_domain'] = domain
-            self._update_status()
+        try:
+            self.load_domains()
+            fingerprint = ScanCheckpoint.fingerprint(self.input_file)
+            domains = self._restore_checkpoint(fingerprint)
+            with self.lock:
+                if not self.control.stopped:
+                    self.status['status'] = 'scanning'
+                    self._update_status()
             
-            result = {
-                'domain': domain,
-                'scan_date': datetime.now().isoformat(),
-                'subdomains': [],
-                'dns_records': {},
-                'open_ports': [],
-                'tech_stack': [],
-                'headers': {},
-                'ssl_info': {},
-                'osint_findings': [],
-                'sensitive_paths': []
-            }
+            if self.engine == 'async':
+                # Imported lazily so aiohttp is only loaded when the async engine is used
+                from .async_engine import AsyncScanEngine
+                AsyncScanEngine(self).run(domains)
+            else:
+                self._scan_concurrently(domains)
             
-            # Perform all scans
-            try:
-                # Subdomain enumeration
-                subdomain_enum = SubdomainEnumerator(domain)
-                result['subdomains'] = subdomain_enum.enumerate()
-                
-                # DNS analysis
-                dns_analyzer = DNSAnalyzer(domain)
-                result['dns_records'] = dns_analyzer.analyze()
-                
-                # Port scanning
-                port_scanner = PortScanner(domain)
-                result['open_ports'] = port_scanner.scan()
-                
-                # SSL analysis
-                ssl_analyzer = SSLAnalyzer(domain)
-                result['ssl_info'] = ssl_analyzer.analyze()
-                
-                # Header analysis
-                header_analyzer = HeaderAnalyzer(domain)
-                result['headers'] = header_analyzer.analyze()
-                
-                # Technology stack detection
-                tech_detector = TechStackDetector(domain)
-                result['tech_stack'] = tech_detector.detect()
-                
-                # Risk analysis
-                risk_analyzer = RiskAnalyzer(result)
-                risk_score, risk_summary = risk_analyzer.analyze()
-                result['risk_score'] = risk_score
-                result['risk_summary'] = risk_summary
+            self.sink.close()
+            if self.control.stopped:
+                self._save_stopped(fingerprint)
+                return
+            self.sink.compact()
+            self.checkpoint.save(fingerprint, 'completed')
+            
+            self.status['status'] = 'completed'
+            self.status['current_domain'] = ''
+            self._update_status()
+        finally:
+            # Always publish the final state
+            self.publisher.close()
+    
+    def _save_stopped(self, fingerprint):
+        """
+        Record a paused or cancelled scan. Domains that were interrupted have
+        no result, so resuming the job scans them again.
+        """
+        state = self.control.state
+        self.checkpoint.save(fingerprint, state)
+        with self.lock:
+            self.status['status'] = state
+            self.status['current_domain'] = ''
+            self.status['in_progress'] = []
+            self._update_status()
+    
+    def _restore_checkpoint(self, fingerprint):
+        """
+        Return the domains still to scan. When an unfinished scan of the same
+        input is on disk, domains with a persisted result are skipped and the
+        ones that were in flight are scanned again.
+        """
+        if self.resume and self.checkpoint.can_resume(fingerprint):
+            finished = {record.get('domain') for _, record in self.sink.read()}
+            self.status['resumed'] = len(finished)
+            self.status['completed'] = self.status['resumed']
+            return self._iter_domains(finished)
+        
+        self.sink.reset()
+        self.checkpoint.save(fingerprint, 'scanning')
+        return self._iter_domains()
+    
+    def _scan_concurrently(self, domains):
+        """
+        Scan domains with a bounded worker pool, or on the shared scheduler
+        when the scan runs as one of several jobs
+        """
+        if self.scheduler is not None:
+            self._dispatch(domains, lambda domain: self.scheduler.submit(self.job_id, self._run_domain, domain))
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._dispatch(domains, lambda domain: executor.submit(self._run_domain, domain))
+    
+    def _dispatch(self, domains, submit):
+        """
+        Keep at most max_workers domains in flight, pulling more from the input as they finish
+        """
+        domains = iter(domains)
+        pending = set()
+        for domain in domains:
+            pending.add(submit(domain))
+            if len(pending) >= self.max_workers:
+                break
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error in domain worker: {str(e)}")
                 
-            except Exception as e:
-                result['error'] = str(e)
+                # Once stopped, no more domains are read from the input
+                next_domain = next(domains, None) if not self.control.stopped else None
+                if next_domain is not None:
+                    pending.add(submit(next_domain))
             
-            self.results[domain] = result
+            if self.control.stopped:
+                # Drop domains still waiting for a worker; running ones wind down
+                for future in pending:
+                    future.cancel()
+    
+    def _run_domain(self, domain):
+        """
+        Scan a single domain and record its result and progress
+        """
+        if self.control.stopped:
+            return
+        
+        self.start_domain(domain)
+        try:
+            result = self.scan_domain(domain)
+        except ScanInterrupted:
+            self.abandon_domain(domain)
+            return
+        except Exception as e:
+            # Recorded as the async engine does, instead of leaving the
+            # domain in progress with no result
+            result = self.empty_result(domain)
+            result['error'] = str(e)
+        self.finish_domain(domain, result)
+    
+    def start_domain(self, domain):
+        """
+        Mark a domain as in progress; both scan engines call this
+        """
+        with self.lock:
+            self.status['current_domain'] = domain
+            self.status['in_progress'].append(domain)
+            self._update_status()
+    
+    def finish_domain(self, domain, result):
+        """
+        Record a finished domain's result and progress
+        """
+        # Persist the result as soon as the domain is done
+        self.sink.append(result)
+        self.index_result(result)
+        
+        with self.lock:
             self.status['completed'] += 1
+            self.status['in_progress'].remove(domain)
+            self._add_stage_timings(result.get('stage_timings') or {})
             self._update_status()
-            
-            # Save results after each domain
-            self._save_results()
+    
+    def abandon_domain(self, domain):
+        """
+        Drop a domain whose scan was interrupted without recording a result
+        """
+        with self.lock:
+            self.status['in_progress'].remove(domain)
+            self._update_status()
+    
+    def _add_stage_timings(self, timings):
+        """
+        Accumulate per-stage scan time for the job so the slowest stage stands out
+        """
+        totals = self.status['stage_seconds']
+        for stage, seconds in timings.items():
+            totals[stage] = round(totals.get(stage, 0) + seconds, 3)
+        if totals:
+            self.status['slowest_stage'] = max(totals, key=totals.get)
+    
+    def index_result(self, result):
+        """
+        Add a finished result to the queryable result index, if one is set
+        """
+        if self.result_index is None:
+            return
+        try:
+            self.result_index.add(result, self.job_id)
+        except Exception as e:
+            # The JSONL results stay authoritative; the index is best effort
+            print(f"Error indexing result for {result.get('domain')}: {str(e)}")
+    
+    @instrument('domain')
+    def scan_domain(self, domain):
+        """
+        Run every scan module against a single domain
+        """
+        result = self.empty_result(domain)
+        previous = self._previous_result(domain)
+        profile = self.profiler.begin(domain) if self.profiler is not None else None
         
-        self.status['status'] = 'completed'
-        self._update_status()
+        # Every stage sizes its timeouts from what is left of the domain's budget
+        deadline = self.control.deadline(self.domain_timeout)
+        
+        # Landing page responses are fetched once and shared between analyzers
+        fetcher = PageFetcher(domain, deadline=deadline)
+        
+        # Every module except risk analysis is independent, so run them concurrently
+        graph = StageGraph(stage_context=profile.stage if profile is not None else None)
+        graph.add('subdomains', lambda outputs: SubdomainEnumerator(
+            domain, deadline=deadline, cache=self.discovery_cache, refresh=self.refresh_discovery
+        ).enumerate())
+        graph.add('dns_records', lambda outputs: DNSAnalyzer(domain, deadline=deadline).analyze())
+        graph.add('headers', lambda outputs: HeaderAnalyzer(domain, fetcher=fetcher).analyze())
+        graph.add('tech_stack', lambda outputs: TechStackDetector(domain, fetcher=fetcher).detect())
+        if self.incremental:
+            # Stored with the result so the next scan can tell what changed
+            graph.add('fingerprint', lambda outputs: incremental.fingerprint(domain, fetcher))
+        
+        if previous is None:
+            graph.add('open_ports', lambda outputs: PortScanner(domain, deadline=deadline).scan())
+            graph.add('ssl_info', lambda outputs: SSLAnalyzer(domain, fetcher=fetcher, deadline=deadline).analyze())
+        else:
+            # Carry nmap and TLS results over when their fingerprints are unchanged
+            reused = result['reused'] = {}
+            graph.add(
+                'open_ports',
+                lambda outputs: self._reuse_or_run(
+                    'open_ports', previous, outputs['fingerprint'], reused,
+                    lambda: PortScanner(domain, deadline=deadline).scan()
+                ),
+                requires=('fingerprint',)
+            )
+            graph.add(
+                'ssl_info',
+                lambda outputs: self._reuse_or_run(
+                    'ssl_info', previous, outputs['fingerprint'], reused,
+                    lambda: SSLAnalyzer(domain, fetcher=fetcher, deadline=deadline).analyze()
+                ),
+                requires=('fingerprint',)
+            )
+        
+        graph.add(
+            'risk',
+            lambda outputs: self._analyze_risk(result, outputs, previous, deadline),
+            requires=('subdomains', 'dns_records', 'open_ports', 'ssl_info', 'headers', 'tech_stack')
+        )
+        deadline.on_cancel(graph.cancel)
+        
+        remaining = deadline.remaining()
+        try:
+            outputs = graph.run(timeout=None if remaining is None else remaining + self.DEADLINE_GRACE_SECONDS)
+        except Exception as e:
+            self.control.check()
+            result['error'] = str(e)
+            return result
+        finally:
+            result['stage_timings'] = {stage: round(seconds, 3) for stage, seconds in graph.timings.items()}
+            if profile is not None:
+                profile.finish()
+        
+        # Stages cut short by a pause or cancel produced partial output; don't keep it
+        self.control.check()
+        
+        risk = outputs.pop('risk', None)
+        result.update(outputs)
+        if risk is None and graph.timed_out:
+            # Score what finished; the deadline has passed so this skips the AI call
+            risk = RiskAnalyzer(result, deadline=deadline).analyze()
+        if risk is not None:
+            result['risk_score'], result['risk_summary'] = risk
+        
+        timed_out = sorted(set(deadline.probes_timed_out()) | set(graph.timed_out))
+        if timed_out:
+            result['timed_out'] = timed_out
+        
+        error = graph.first_error()
+        if error is not None:
+            result['error'] = str(error)
+        elif previous is not None:
+            result['changes'] = incremental.diff_results(previous, result)
+        
+        return result
+    
+    def _previous_result(self, domain):
+        """
+        Return the last complete result for a domain when scanning incrementally
+        """
+        if not self.incremental:
+            return None
+        try:
+            previous = self.result_index.latest(domain)
+        except Exception as e:
+            print(f"Error loading previous result for {domain}: {str(e)}")
+            return None
+        if previous is None or 'error' in previous or 'timed_out' in previous or 'risk_score' not in previous:
+            return None
+        return previous
+    
+    def _reuse_or_run(self, stage, previous, fingerprint, reused, run):
+        """
+        Return the previous output of a stage if nothing it depends on changed
+        and it is not older than the incremental max age; otherwise run it
+        """
+        fields = incremental.REUSABLE_STAGES[stage]
+        changed = incremental.changed_fields(previous.get('fingerprint'), fingerprint)
+        scanned = incremental.produced_at(previous, stage)
+        
+        if any(field in changed for field in fields) or datetime.now() - scanned > self.incremental_max_age:
+            return run()
+        
+        reused[stage] = scanned.isoformat()
+        return previous[stage]
+    
+    def _analyze_risk(self, result, outputs, previous, deadline):
+        """
+        Ask for a new risk assessment only when the stable part of a stage
+        output changed
+        """
+        stages = ('subdomains', 'dns_records', 'open_ports', 'ssl_info', 'headers', 'tech_stack')
+        if previous is not None and all(incremental.same_stage(stage, outputs[stage], previous.get(stage)) for stage in stages):
+            result['reused']['risk'] = incremental.produced_at(previous, 'risk').isoformat()
+            return previous['risk_score'], previous.get('risk_summary')
+        return RiskAnalyzer({**result, **outputs}, deadline=deadline).analyze()
     
-    def _save_results(self):
-        results_file = os.path.join(self.output_dir, 'scan_results.json')
-        with open(results_file, 'w') as f:
-            json.dump(self.results, f, indent=2) 
\ No newline at end of file
+    @staticmethod
+    def empty_result(domain):
+        """
+        Build a result record with every section present but empty
+        """
+        return {
+            'domain': domain,
+            'scan_date': datetime.now().isoformat(),
+            'subdomains': [],
+            'dns_records': {},
+            'open_ports': [],
+            'tech_stack': [],
+            'headers': {},
+            'ssl_info': {},
+            'osint_findings': [],
+            'sensitive_paths': []
+        }
\ No newline at end of file
@@ -2,19 +2,23 @@ import ssl
 import socket
 import OpenSSL
 from datetime import datetime
-import requests
-from urllib3.exceptions import InsecureRequestWarning
-
-# Disable SSL verification warnings
-requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+from app.utils.deadline import Deadline
+from app.utils.page_fetcher import PageFetcher
+from app.utils.rate_limit import limiter
+from app.utils.metrics import instrument
 
 class SSLAnalyzer:
-    def __init__(self, domain):
+    PROTOCOLS = ('SSLv2', 'SSLv3', 'TLSv1.0', 'TLSv1.1', 'TLSv1.2', 'TLSv1.3')
+    
+    def __init__(self, domain, fetcher=None, deadline=None):
         self.domain = domain
+        self.deadline = deadline or Deadline()
+        self.fetcher = fetcher or PageFetcher(domain, deadline=self.deadline)
         self.context = ssl.create_default_context()
         self.context.check_hostname = False
         self.context.verify_mode = ssl.CERT_NONE
     
+    @instrument('ssl')
     def analyze(self):
         """
         Analyze SSL/TLS configuration
@@ -32,12 +36,12 @@ class SSLAnalyzer:
             # Check for common vulnerabilities
             vulnerabilities = self._check_vulnerabilities()
             
-            return {
+            return self.deadline.annotate('ssl', {
                 'certificate': cert_info,
                 'protocols': protocols,
                 'ciphers': ciphers,
                 'vulnerabilities': vulnerabilities
-            }
+            })
             
         except Exception as e:
             return {'error': str(e)}
@@ -47,58 +51,64 @@ class SSLAnalyzer:
         Get SSL certificate information
         """
         try:
-            with socket.create_connection((self.domain, 443)) as sock:
+            with self._connect() as sock:
                 with self.context.wrap_socket(sock, server_hostname=self.domain) as ssock:
                     cert = ssock.getpeercert(binary_form=True)
-                    x509 = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_ASN1, cert)
-                    
-                    # Get certificate details
-                    subject = dict(x509.get_subject().get_components())
-                    issuer = dict(x509.get_issuer().get_components())
-                    
-                    not_before = datetime.strptime(x509.get_notBefore().decode('ascii'), '%Y%m%d%H%M%SZ')
-                    not_after = datetime.strptime(x509.get_notAfter().decode('ascii'), '%Y%m%d%H%M%SZ')
-                    
-                    return {
-                        'subject': {
-                            'common_name': subject.get(b'CN', b'').decode('utf-8'),
-                            'organization': subject.get(b'O', b'').decode('utf-8'),
-                            'country': subject.get(b'C', b'').decode('utf-8')
-                        },
-                        'issuer': {
-                            'common_name': issuer.get(b'CN', b'').decode('utf-8'),
-                            'organization': issuer.get(b'O', b'').decode('utf-8'),
-                            'country': issuer.get(b'C', b'').decode('utf-8')
-                        },
-                        'valid_from': not_before.isoformat(),
-                        'valid_until': not_after.isoformat(),
-                        'version': x509.get_version(),
-                        'serial_number': hex(x509.get_serial_number())
-                    }
+                    return self.parse_certificate(cert)
                     
         except Exception as e:
             return {'error': str(e)}
     
+    def _connect(self):
+        """
+        Open a TCP connection to port 443 through the shared rate limiter. The
+        timeout also bounds the TLS handshake made over it.
+        """
+        limiter.acquire(self.domain, 'tls', deadline=self.deadline)
+        return socket.create_connection((self.domain, 443), timeout=self.deadline.timeout(10, 'tls'))
+    
+    def parse_certificate(self, cert):
+        """
+        Extract certificate details from a DER encoded certificate
+        """
+        x509 = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_ASN1, cert)
+        
+        # Get certificate details
+        subject = dict(x509.get_subject().get_components())
+        issuer = dict(x509.get_issuer().get_components())
+        
+        not_before = datetime.strptime(x509.get_notBefore().decode('ascii'), '%Y%m%d%H%M%SZ')
+        not_after = datetime.strptime(x509.get_notAfter().decode('ascii'), '%Y%m%d%H%M%SZ')
+        
+        return {
+            'subject': {
+                'common_name': subject.get(b'CN', b'').decode('utf-8'),
+                'organization': subject.get(b'O', b'').decode('utf-8'),
+                'country': subject.get(b'C', b'').decode('utf-8')
+            },
+            'issuer': {
+                'common_name': issuer.get(b'CN', b'').decode('utf-8'),
+                'organization': issuer.get(b'O', b'').decode('utf-8'),
+                'country': issuer.get(b'C', b'').decode('utf-8')
+            },
+            'valid_from': not_before.isoformat(),
+            'valid_until': not_after.isoformat(),
+            'version': x509.get_version(),
+            'serial_number': hex(x509.get_serial_number())
+        }
+    
+    @instrument('ssl_protocols')
     def _check_protocols(self):
         """
         Check supported SSL/TLS protocols
         """
-        protocols = {
-            'SSLv2': False,
-            'SSLv3': False,
-            'TLSv1.0': False,
-            'TLSv1.1': False,
-            'TLSv1.2': False,
-            'TLSv1.3': False
-        }
+        protocols = {protocol: False for protocol in self.PROTOCOLS}
         
         for protocol in protocols.keys():
             try:
-                context = ssl.SSLContext(ssl.PROTOCOL_TLS)
-                context.minimum_version = getattr(ssl, f'PROTOCOL_{protocol}')
-                context.maximum_version = getattr(ssl, f'PROTOCOL_{protocol}')
+                context = self.protocol_context(protocol)
                 
-                with socket.create_connection((self.domain, 443)) as sock:
+                with self._connect() as sock:
                     with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
                         protocols[protocol] = True
             except:
@@ -106,12 +116,31 @@ class SSLAnalyzer:
         
         return protocols
     
+    def protocol_context(self, protocol):
+        """
+        Build a context restricted to a single protocol version
+        """
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS)
+        context.minimum_version = getattr(ssl, f'PROTOCOL_{protocol}')
+        context.maximum_version = getattr(ssl, f'PROTOCOL_{protocol}')
+        return context
+    
     def _check_ciphers(self):
         """
         Check supported cipher suites
         """
+        # Reuse the handshake made when fetching the landing page, if there was one
+        response = self.fetcher.get('https')
+        tls_info = getattr(response, 'tls_info', None)
+        if tls_info and tls_info.get('cipher'):
+            return {
+                'name': tls_info['cipher'],
+                'version': tls_info['version'],
+                'bits': tls_info['bits']
+            }
+        
         try:
-            with socket.create_connection((self.domain, 443)) as sock:
+            with self._connect() as sock:
                 with self.context.wrap_socket(sock, server_hostname=self.domain) as ssock:
                     cipher = ssock.cipher()
                     return {
@@ -136,16 +165,16 @@ class SSLAnalyzer:
         
         # Check for Heartbleed
         try:
-            response = requests.get(f'https://{self.domain}', verify=False, timeout=5)
-            if 'heartbleed' in response.headers.get('server', '').lower():
+            response = self.fetcher.get('https')
+            if response is not None and 'heartbleed' in response.headers.get('server', '').lower():
                 vulnerabilities['heartbleed'] = True
         except:
             pass
         
         # Check for POODLE
         try:
-            context = ssl.SSLContext(ssl.PROTOCOL_TLSv1)
-            with socket.create_connection((self.domain, 443)) as sock:
+            context = self.poodle_context()
+            with self._connect() as sock:
                 with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
                     vulnerabilities['poodle'] = True
         except:
@@ -153,12 +182,25 @@ class SSLAnalyzer:
         
         # Check for BEAST
         try:
-            context = ssl.SSLContext(ssl.PROTOCOL_TLSv1)
-            context.set_ciphers('RC4')
-            with socket.create_connection((self.domain, 443)) as sock:
+            context = self.beast_context()
+            with self._connect() as sock:
                 with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
                     vulnerabilities['beast'] = True
         except:
             pass
         
-        return vulnerabilities 
\ No newline at end of file
+        return vulnerabilities
+    
+    def poodle_context(self):
+        """
+        Build a context that only negotiates TLSv1
+        """
+        return ssl.SSLContext(ssl.PROTOCOL_TLSv1)
+    
+    def beast_context(self):
+        """
+        Build a TLSv1 context limited to RC4 ciphers
+        """
+        context = ssl.SSLContext(ssl.PROTOCOL_TLSv1)
+        context.set_ciphers('RC4')
+        return context
\ No newline at end of file
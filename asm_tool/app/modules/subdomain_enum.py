@@ -1,41 +1,210 @@
 import subprocess
+import threading
+import time
+import dns.exception
+import dns.resolver
 import requests
-import json
-from concurrent.futures import ThreadPoolExecutor
-from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from app.utils.ct_log import JSONArrayParser, entry_names
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.domain_names import NameTrie, in_scope, normalize_name
+from app.utils.rate_limit import limiter
+from app.utils.metrics import instrument, track, subdomain_first_valid
+from app.utils.network import configure_resolver, ct_log_host, ct_log_url
+from app.utils.wildcard_dns import WildcardDetector, lookup
+
+def lookup_reason(error):
+    """
+    Map an error raised by a subdomain's DNS lookup to the reason it is dropped
+    """
+    if isinstance(error, dns.resolver.NoAnswer):
+        return 'no_address'
+    if isinstance(error, dns.resolver.NXDOMAIN):
+        return 'nxdomain'
+    if isinstance(error, DeadlineExceeded):
+        return 'deadline'
+    if isinstance(error, dns.exception.Timeout):
+        return 'dns_timeout'
+    return 'dns_error'
+
+def status_reason(status):
+    """
+    Return None if an HTTP status shows a live server, otherwise the drop reason
+    """
+    # 416 is a live server rejecting a one-byte range
+    if status < 400 or status == 416:
+        return None
+    return f'http_status_{status}'
+
+def probe_reason(reasons):
+    """
+    Pick the drop reason of a name whose probes all failed
+    """
+    # An HTTP error status says more than a failed connection on the other scheme
+    return next((reason for reason in reasons if reason.startswith('http_status')), reasons[0])
+
+class SubdomainCandidates:
+    """
+    Bookkeeping shared by the threaded and async subdomain validation. It
+    normalizes and de-duplicates the names sources report, replays and
+    fills the discovery cache, records what validation found and builds the
+    result. The lookups and probes themselves are up to the caller.
+    """
+    def __init__(self, domain, deadline=None, cache=None, refresh=False):
+        self.apex = normalize_name(domain) or domain.lower()
+        self.deadline = deadline or Deadline()
+        self.cache = cache
+        self.refresh = refresh
+        self.cached_sources = []
+        self.subdomains = NameTrie()
+        self.resolved = []
+        self.valid = set()
+        self.dropped = {}
+        # Names that resolve like their zone's wildcard; dropped only if
+        # their landing page is the wildcard's too
+        self.suspects = set()
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+    
+    def add(self, name):
+        """
+        Normalize a discovered name. Returns it if it still has to be
+        validated, or None if it is invalid, out of scope or already known.
+        """
+        if not name.strip():
+            return None
+        subdomain = normalize_name(name)
+        with self.lock:
+            if subdomain is None:
+                self.dropped[name] = 'invalid_name'
+            elif not in_scope(subdomain, self.apex):
+                self.dropped[subdomain] = 'out_of_scope'
+            elif self.subdomains.add(subdomain):
+                return subdomain
+        return None
+    
+    def cached(self, source):
+        """
+        Return the names cached for a source, or None on a cache miss or if
+        the job asked for a refresh
+        """
+        if self.cache is None or self.refresh:
+            return None
+        names = self.cache.get(self.apex, source)
+        if names is not None:
+            with self.lock:
+                self.cached_sources.append(source)
+        return names
+    
+    def collector(self, validate):
+        """
+        Return a callback that passes each name a source reports to
+        validate, and the set of names it collects for the cache
+        """
+        # Only the distinct in-scope names are kept for the cache, so a large
+        # CT response is not held in memory line by line
+        names = NameTrie()
+        
+        def found(name):
+            validate(name)
+            if self.cache is not None:
+                name = normalize_name(name)
+                if name is not None and in_scope(name, self.apex):
+                    names.add(name)
+        
+        return found, names
+    
+    def store(self, source, names):
+        """
+        Cache the complete output of a source
+        """
+        if self.cache is not None:
+            self.cache.put(self.apex, source, list(names))
+    
+    def looked_up(self, subdomain, reason, suspect=False):
+        """
+        Record the outcome of a name's DNS lookup. Returns whether it goes
+        on to the HTTP probe.
+        """
+        with self.lock:
+            if reason is not None:
+                self.dropped[subdomain] = reason
+                return False
+            self.resolved.append(subdomain)
+            if suspect:
+                self.suspects.add(subdomain)
+            return True
+    
+    def is_suspect(self, subdomain):
+        with self.lock:
+            return subdomain in self.suspects
+    
+    def probed(self, subdomain, reason):
+        """
+        Record the outcome of a name's HTTP probe
+        """
+        with self.lock:
+            if reason is not None:
+                self.dropped[subdomain] = reason
+                return
+            if not self.valid:
+                subdomain_first_valid.observe(time.monotonic() - self.started)
+            self.valid.add(subdomain)
+    
+    def result(self, wildcard_zones):
+        with self.lock:
+            return self.deadline.annotate('subdomains', {
+                'total_found': len(self.subdomains),
+                'resolved': len(self.resolved),
+                'valid': len(self.valid),
+                'subdomains': sorted(self.valid),
+                'dropped': dict(self.dropped),
+                'wildcard_zones': wildcard_zones,
+                'cached_sources': list(self.cached_sources)
+            })
 
 class SubdomainEnumerator:
-    def __init__(self, domain):
+    # Every new name is validated as soon as a source reports it: a cheap DNS
+    # lookup first, then an HTTP liveness probe if it resolves and does not
+    # just match its zone's wildcard record
+    DNS_WORKERS = 32
+    DNS_TIMEOUT = 3
+    PROBE_WORKERS = 16
+    PROBE_TIMEOUT = 5
+    CT_CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, domain, deadline=None, cache=None, refresh=False):
         self.domain = domain
-        self.subdomains = set()
+        self.deadline = deadline or Deadline()
+        self.candidates = SubdomainCandidates(domain, self.deadline, cache, refresh)
+        self.apex = self.candidates.apex
+        self.lock = threading.Lock()
     
+    @instrument('subdomains')
     def enumerate(self):
         """
         Enumerate subdomains using multiple methods
         """
-        # Use multiple enumeration methods in parallel
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = [
-                executor.submit(self._amass_enum),
-                executor.submit(self._subfinder_enum),
-                executor.submit(self._certificate_transparency)
-            ]
-            
-            for future in futures:
-                try:
-                    subdomains = future.result()
-                    self.subdomains.update(subdomains)
-                except Exception as e:
-                    print(f"Error in subdomain enumeration: {str(e)}")
-        
-        # Validate subdomains
-        valid_subdomains = self._validate_subdomains()
+        self._start_validation()
+        try:
+            # Use multiple enumeration methods in parallel; each feeds names
+            # into validation as it finds them
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                futures = [
+                    executor.submit(self._amass_enum),
+                    executor.submit(self._subfinder_enum),
+                    executor.submit(self._certificate_transparency)
+                ]
+                
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Error in subdomain enumeration: {str(e)}")
+        finally:
+            self._finish_validation()
         
-        return {
-            'total_found': len(self.subdomains),
-            'valid': len(valid_subdomains),
-            'subdomains': list(valid_subdomains)
-        }
+        return self.candidates.result(self.wildcards.wildcard_zones())
     
     def _amass_enum(self):
         """
@@ -43,11 +212,9 @@ class SubdomainEnumerator:
         """
         try:
             cmd = f"amass enum -d {self.domain} -passive"
-            result = subprocess.run(cmd.split(), capture_output=True, text=True)
-            return set(result.stdout.splitlines())
+            self._discover('amass', lambda found: self._run_tool('amass', cmd.split(), found))
         except Exception as e:
             print(f"Amass enumeration error: {str(e)}")
-            return set()
     
     def _subfinder_enum(self):
         """
@@ -55,56 +222,216 @@ class SubdomainEnumerator:
         """
         try:
             cmd = f"subfinder -d {self.domain} -silent"
-            result = subprocess.run(cmd.split(), capture_output=True, text=True)
-            return set(result.stdout.splitlines())
+            self._discover('subfinder', lambda found: self._run_tool('subfinder', cmd.split(), found))
         except Exception as e:
             print(f"Subfinder enumeration error: {str(e)}")
-            return set()
+    
+    def _discover(self, source, fetch):
+        """
+        Run a discovery source, passing each name it reports to found, and
+        cache the distinct in-scope names once it completes. If the cache
+        already holds a fresh output for this apex and source, that is
+        replayed instead unless the job asked for a refresh.
+        """
+        names = self.candidates.cached(source)
+        if names is not None:
+            for name in names:
+                self._add_candidate(name)
+            return
+        
+        found, names = self.candidates.collector(self._add_candidate)
+        # Partial output (killed at the deadline, stopped, truncated) is
+        # never cached, so the next scan runs the source again
+        if fetch(found):
+            self.candidates.store(source, names)
+    
+    def _run_tool(self, name, cmd, found):
+        """
+        Run an enumeration tool and validate each name as soon as it prints
+        it. The tool is killed when the deadline runs out or the scan is
+        paused or cancelled; names printed before that are kept. Returns
+        whether the tool ran to completion.
+        """
+        timeout = self.deadline.timeout(None, name)
+        
+        def expire():
+            self.deadline.mark(name)
+            process.kill()
+        
+        with track(name):
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            timer = threading.Timer(timeout, expire) if timeout is not None else None
+            with self.deadline.watch(process):
+                try:
+                    if timer is not None:
+                        timer.start()
+                    for line in process.stdout:
+                        found(line.rstrip('\r\n'))
+                    return process.wait() == 0
+                except BaseException:
+                    process.kill()
+                    process.wait()
+                    raise
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+                    process.stdout.close()
     
     def _certificate_transparency(self):
         """
         Query certificate transparency logs
         """
         try:
-            url = f"https://crt.sh/?q=%.{self.domain}&output=json"
-            response = requests.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                return set(entry['name_value'].lower() for entry in data)
-            return set()
+            self._discover('crt_sh', self._query_ct_logs)
         except Exception as e:
             print(f"Certificate transparency query error: {str(e)}")
-            return set()
     
-    def _validate_subdomains(self):
+    def _query_ct_logs(self, found):
         """
-        Validate discovered subdomains
+        Fetch the CT log entries for the domain. The response is parsed as it
+        downloads and each name is validated as soon as it is read. Returns
+        whether the whole response was read.
         """
-        valid_subdomains = set()
-        
-        def check_subdomain(subdomain):
-            try:
-                # Try HTTP
-                url = f"http://{subdomain}"
-                response = requests.get(url, timeout=5, verify=False)
-                if response.status_code < 400:
-                    return subdomain
+        url = ct_log_url(self.domain)
+        limiter.acquire(ct_log_host(), 'ct_log', deadline=self.deadline)
+        with track('crt_sh'):
+            with requests.get(url, timeout=self.deadline.timeout(60, 'crt_sh'), stream=True) as response:
+                if response.status_code != 200:
+                    return False
                 
-                # Try HTTPS
-                url = f"https://{subdomain}"
-                response = requests.get(url, timeout=5, verify=False)
-                if response.status_code < 400:
-                    return subdomain
-                
-                return None
-            except:
-                return None
-        
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(check_subdomain, subdomain) for subdomain in self.subdomains]
-            for future in futures:
-                result = future.result()
-                if result:
-                    valid_subdomains.add(result)
+                parser = JSONArrayParser()
+                for chunk in response.iter_content(chunk_size=self.CT_CHUNK_SIZE):
+                    for entry in parser.feed(chunk):
+                        for name in entry_names(entry):
+                            found(name)
+                    if self.deadline.expired():
+                        # Keep the names read so far
+                        self.deadline.mark('crt_sh')
+                        return False
+                parser.close()
+                return True
+    
+    def _start_validation(self):
+        self.resolver = configure_resolver(dns.resolver.Resolver())
+        self.resolver.timeout = self.DNS_TIMEOUT
+        self.wildcards = WildcardDetector(
+            self.apex, self.resolver, self.deadline, timeout=self.DNS_TIMEOUT, page_timeout=self.PROBE_TIMEOUT
+        )
+        self.lookups = ThreadPoolExecutor(max_workers=self.DNS_WORKERS)
+        self.checks = ThreadPoolExecutor(max_workers=self.PROBE_WORKERS)
+        # Each name races two scheme probes, so the probe pool is twice as large
+        self.probes = ThreadPoolExecutor(max_workers=self.PROBE_WORKERS * 2)
+        self.pending = []
+    
+    def _add_candidate(self, name):
+        """
+        Queue a discovered name for validation unless it is invalid, out of
+        scope or another source already reported it
+        """
+        subdomain = self.candidates.add(name)
+        if subdomain is not None:
+            with self.lock:
+                self.pending.append(self.lookups.submit(self._lookup, subdomain))
+    
+    def _lookup(self, subdomain):
+        with track('subdomain_dns'):
+            reason, suspect = self._resolve(self.resolver, subdomain)
+        if self.candidates.looked_up(subdomain, reason, suspect):
+            with self.lock:
+                self.pending.append(self.checks.submit(self._check, subdomain))
+    
+    def _check(self, subdomain):
+        with track('subdomain_probe'):
+            reason = self._probe(subdomain, self.probes)
+        self.candidates.probed(subdomain, reason)
+    
+    def _finish_validation(self):
+        """
+        Wait for every queued lookup and probe once the sources are done
+        """
+        done = 0
+        while True:
+            with self.lock:
+                if done == len(self.pending):
+                    break
+                future = self.pending[done]
+            future.result()
+            done += 1
         
-        return valid_subdomains 
\ No newline at end of file
+        self.lookups.shutdown()
+        self.checks.shutdown()
+        # Don't wait for probes that lost their race
+        self.probes.shutdown(wait=False)
+    
+    def _resolve(self, resolver, subdomain):
+        """
+        Return (reason, suspect): reason is None if the name resolves,
+        otherwise why it was dropped, and suspect tells whether it resolved
+        like its zone's wildcard, for the probe to check
+        """
+        try:
+            addresses, target = lookup(resolver, subdomain, self.deadline.timeout(self.DNS_TIMEOUT, 'subdomain_dns'))
+            suspect = self.wildcards.matches_answer(subdomain, addresses, target)
+            # The liveness probes are throttled per IP without resolving again
+            limiter.remember(subdomain, min(addresses, default=None))
+            return None, suspect
+        except Exception as e:
+            return lookup_reason(e), False
+    
+    def _probe(self, subdomain, probes):
+        """
+        Race HTTPS and HTTP liveness probes and stop at the first that
+        answers. Returns None if the name is live, otherwise why it was dropped.
+        """
+        pending = {probes.submit(self._probe_scheme, scheme, subdomain) for scheme in ('https', 'http')}
+        reasons = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                reason = future.result()
+                if reason is None or reason == 'wildcard':
+                    # The other probe finishes in the background; its answer is not needed
+                    return reason
+                reasons.append(reason)
+        return probe_reason(reasons)
+    
+    def _probe_scheme(self, scheme, subdomain):
+        """
+        Check that a name answers on one scheme with a HEAD request, or a
+        one-byte ranged GET if HEAD is refused. No body is downloaded and
+        redirects are not followed.
+        """
+        url = f"{scheme}://{subdomain}/"
+        try:
+            limiter.acquire(subdomain, 'subdomain_validation', deadline=self.deadline)
+            response = requests.head(
+                url,
+                timeout=self.deadline.timeout(self.PROBE_TIMEOUT, 'subdomain_validation'),
+                verify=False,
+                allow_redirects=False
+            )
+            status = response.status_code
+            if self.candidates.is_suspect(subdomain) and self.wildcards.matches_page(
+                subdomain, scheme, status, response.headers
+            ):
+                return 'wildcard'
+            
+            if status in (405, 501):
+                limiter.acquire(subdomain, 'subdomain_validation', deadline=self.deadline)
+                with requests.get(
+                    url,
+                    headers={'Range': 'bytes=0-0'},
+                    timeout=self.deadline.timeout(self.PROBE_TIMEOUT, 'subdomain_validation'),
+                    verify=False,
+                    allow_redirects=False,
+                    stream=True
+                ) as response:
+                    status = response.status_code
+            
+            return status_reason(status)
+        except DeadlineExceeded:
+            return 'deadline'
+        except requests.exceptions.Timeout:
+            return 'http_timeout'
+        except Exception:
+            return 'http_unreachable'
\ No newline at end of file
@@ -1,17 +1,16 @@
-import requests
 from bs4 import BeautifulSoup
-from urllib3.exceptions import InsecureRequestWarning
-
-# Disable SSL verification warnings
-requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+from app.utils.page_fetcher import PageFetcher
+from app.utils.metrics import instrument
 
 class TechStackDetector:
-    def __init__(self, domain):
+    def __init__(self, domain, fetcher=None):
         self.domain = domain
+        self.fetcher = fetcher or PageFetcher(domain)
         self.technologies = set()
         self.headers = {}
         self.html = ''
     
+    @instrument('tech_stack')
     def detect(self):
         """
         Detect web technologies used by the domain
@@ -43,12 +42,7 @@ class TechStackDetector:
         """
         Make HTTP request to the domain
         """
-        try:
-            url = f'{protocol}://{self.domain}'
-            response = requests.get(url, verify=False, timeout=10)
-            return response
-        except:
-            return None
+        return self.fetcher.get(protocol)
     
     def _detect_from_headers(self):
         """
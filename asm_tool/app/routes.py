@@ -1,10 +1,44 @@
-from flask import render_template, request, jsonify, send_file
+from flask import render_template, request, jsonify, send_file, Response, stream_with_context
 from app import app, socketio
-from app.modules.scanner import ASMScanner
+from app.modules.job_manager import JobManager
+from app.utils.discovery_cache import DiscoveryCache
+from app.utils.metrics import registry, Counter, Gauge
+from app.utils.profiler import format_profile, list_profiles, profile_path
+from app.utils.rate_limit import limiter
+from app.utils.result_index import ResultIndex
+from app.utils.result_sink import ResultSink
+from app.utils.work_queue import WorkQueue
 import os
 import json
 from datetime import datetime
 
+result_index = ResultIndex(app.config['RESULT_DB'])
+
+jobs = JobManager(
+    app.config['UPLOAD_FOLDER'],
+    max_workers=app.config['SCAN_CONCURRENCY'],
+    queue=WorkQueue(app.config['WORK_QUEUE']) if app.config['SCAN_MODE'] == 'queue' else None,
+    engine=app.config['SCAN_ENGINE'],
+    status_interval=app.config['STATUS_INTERVAL'],
+    resume=app.config['RESUME_SCANS'],
+    result_index=result_index,
+    incremental=app.config['INCREMENTAL_SCANS'],
+    incremental_max_age=app.config['INCREMENTAL_MAX_AGE_DAYS'],
+    profile=app.config['SCAN_PROFILE'],
+    profile_top=app.config['SCAN_PROFILE_TOP'],
+    domain_timeout=app.config['DOMAIN_TIMEOUT'],
+    discovery_cache=DiscoveryCache(
+        app.config['DISCOVERY_CACHE'],
+        ttl=app.config['DISCOVERY_CACHE_TTL_HOURS'] * 3600,
+        max_bytes=app.config['DISCOVERY_CACHE_MAX_MB'] * 1024 * 1024
+    ) if app.config['DISCOVERY_CACHE_TTL_HOURS'] > 0 else None
+)
+
+MAX_QUERY_LIMIT = 1000
+MAX_PAGE_LIMIT = 1000
+PAGE_PARAMS = ('cursor', 'limit', 'fields', 'format')
+JOB_ACTIONS = {'pause': jobs.pause, 'resume': jobs.resume, 'cancel': jobs.cancel}
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -21,32 +55,258 @@ def upload_file():
     if not file.filename.endswith('.csv'):
         return jsonify({'error': 'Please upload a CSV file'}), 400
     
-    # Save the file
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], 'input.csv')
-    file.save(filepath)
+    # Every upload becomes its own job and is scanned in the background
+    refresh = request.form.get('refresh', '').lower() in ('1', 'true', 'yes', 'on')
+    job_id = jobs.create(file, refresh_discovery=refresh)
+    
+    return jsonify({'message': 'Scan started successfully', 'job_id': job_id})
+
+@app.route('/jobs')
+def list_jobs():
+    return jsonify(jobs.list_jobs())
+
+@app.route('/jobs/<job_id>/status')
+def get_job_status(job_id):
+    if not jobs.exists(job_id):
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    status = jobs.status(job_id)
+    if status is None:
+        return jsonify({'job_id': job_id, 'status': 'queued'})
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/pause', methods=['POST'])
+def pause_job(job_id):
+    body, code = control_job(job_id, 'pause')
+    return jsonify(body), code
+
+@app.route('/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    body, code = control_job(job_id, 'resume')
+    return jsonify(body), code
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    body, code = control_job(job_id, 'cancel')
+    return jsonify(body), code
+
+@socketio.on('pause_scan')
+def on_pause_scan(data):
+    return control_job((data or {}).get('job_id'), 'pause')[0]
+
+@socketio.on('resume_scan')
+def on_resume_scan(data):
+    return control_job((data or {}).get('job_id'), 'resume')[0]
+
+@socketio.on('cancel_scan')
+def on_cancel_scan(data):
+    return control_job((data or {}).get('job_id'), 'cancel')[0]
+
+def control_job(job_id, action):
+    """
+    Pause, resume or cancel a job and return the response body and status
+    code. The job's progress updates report when it has actually stopped.
+    """
+    if not jobs.exists(job_id):
+        return {'error': 'Unknown job'}, 404
+    try:
+        status = JOB_ACTIONS[action](job_id)
+    except ValueError as e:
+        return {'error': str(e), 'job_id': job_id}, 409
+    return {'job_id': job_id, 'status': status}, 200
+
+@app.route('/jobs/<job_id>/results')
+def get_job_results(job_id):
+    """
+    Without parameters, return the combined results document. With cursor,
+    limit or fields, return a page of records; format=ndjson streams them.
+    """
+    if not jobs.exists(job_id):
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    if any(param in request.args for param in PAGE_PARAMS):
+        return get_results_page(ResultSink(jobs.job_dir(job_id)))
+    
+    # Results are appended per domain. A running job's document is built
+    # from its records on each read rather than rewritten on disk
+    results_file = jobs.results_file(job_id)
+    if results_file is None:
+        return Response(ResultSink(jobs.job_dir(job_id)).document(), mimetype='application/json')
+    if os.path.exists(results_file):
+        return send_file(results_file, mimetype='application/json')
+    return jsonify({'error': 'No results available'}), 404
+
+@app.route('/jobs/<job_id>/profiles')
+def get_job_profiles(job_id):
+    if not jobs.exists(job_id):
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(list_profiles(jobs.job_dir(job_id)))
+
+@app.route('/jobs/<job_id>/profiles/<domain>')
+def get_job_profile(job_id, domain):
+    """
+    Download a domain's profile data (load with pstats or snakeviz), or
+    view the top functions with format=text&sort=cumulative|tottime
+    """
+    if not jobs.exists(job_id):
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    path = profile_path(jobs.job_dir(job_id), domain)
+    if path is None:
+        return jsonify({'error': 'No profile for this domain'}), 404
+    
+    if request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls'):
+            return jsonify({'error': 'sort must be cumulative, tottime or calls'}), 400
+        return Response(format_profile(path, sort=sort), mimetype='text/plain')
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=os.path.basename(path))
+
+def get_results_page(sink):
+    """
+    Page through a job's result records in the order they finished. The
+    cursor is a byte offset into the record file, so every page is a seek
+    and a short read regardless of how many domains the job has.
+    """
+    args = request.args
+    try:
+        cursor = int(args.get('cursor', 0))
+        # args.get(type=int) would quietly ignore a malformed limit
+        limit = int(args['limit']) if 'limit' in args else None
+    except ValueError:
+        return jsonify({'error': 'cursor and limit must be integers'}), 400
+    if cursor < 0:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    
+    fields = [field for field in args.get('fields', '').split(',') if field]
+    if fields and 'domain' not in fields:
+        fields.insert(0, 'domain')
+    
+    def project(record):
+        if not fields:
+            return record
+        return {field: record[field] for field in fields if field in record}
+    
+    if args.get('format') == 'ndjson':
+        # Validate the cursor before the response starts streaming
+        try:
+            records = sink.read(cursor)
+            first = next(records, None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        def stream():
+            if first is None:
+                return
+            yield json.dumps(project(first[1])) + '\n'
+            for count, (_, record) in enumerate(records, 2):
+                if limit is not None and count > limit:
+                    break
+                yield json.dumps(project(record)) + '\n'
+        
+        return Response(stream_with_context(stream()), mimetype='application/x-ndjson')
+    
+    limit = min(limit or 100, MAX_PAGE_LIMIT)
+    try:
+        records, next_cursor, has_more = sink.page(cursor, limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'results': [project(record) for record in records],
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    })
+
+@app.route('/results/query')
+def query_results():
+    """
+    Filter indexed results, e.g. /results/query?risk_score_lt=60&port=3389.
+    Only the latest scan of each domain is returned unless latest=false.
+    """
+    args = request.args
+    try:
+        limit = min(max(int(args.get('limit', 100)), 1), MAX_QUERY_LIMIT)
+        # A malformed filter must not be dropped and widen the query
+        risk_score_lt = int(args['risk_score_lt']) if 'risk_score_lt' in args else None
+        risk_score_gte = int(args['risk_score_gte']) if 'risk_score_gte' in args else None
+        ports = [int(port) for port in args.getlist('port')]
+    except ValueError:
+        return jsonify({'error': 'limit, risk_score_lt, risk_score_gte and port must be integers'}), 400
+    
+    cursor = args.get('cursor')
+    if cursor is not None:
+        if '|' not in cursor:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        cursor = tuple(cursor.split('|', 1))
     
-    # Initialize scanner
-    scanner = ASMScanner(filepath)
+    results, next_cursor = result_index.query(
+        job_id=args.get('job_id'),
+        domain=args.get('domain'),
+        risk_score_lt=risk_score_lt,
+        risk_score_gte=risk_score_gte,
+        ports=ports,
+        technologies=args.getlist('tech'),
+        tls_expires_before=args.get('tls_expires_before'),
+        tls_expires_after=args.get('tls_expires_after'),
+        latest=args.get('latest', 'true').lower() != 'false',
+        cursor=cursor,
+        limit=limit
+    )
     
-    # Start scanning in background
-    socketio.start_background_task(scanner.scan_domains)
+    return jsonify({
+        'results': results,
+        'next_cursor': '|'.join(next_cursor) if next_cursor else None
+    })
+
+def collect_runtime_metrics():
+    """
+    Rate limiter and scheduler state, read when /metrics is scraped
+    """
+    limits = limiter.stats()
+    probes = Counter('asm_ratelimit_probes_total', 'Probes that passed the rate limiter', labels=('probe',))
+    delayed = Counter('asm_ratelimit_delayed_total', 'Probes delayed by the rate limiter', labels=('probe',))
+    waited = Counter('asm_ratelimit_wait_seconds_total', 'Time probes spent waiting for the rate limiter', labels=('probe',))
+    for probe, counter in limits['probes'].items():
+        probes.inc(counter['probes'], probe=probe)
+        delayed.inc(counter['delayed'], probe=probe)
+        waited.inc(counter['wait_seconds'], probe=probe)
     
-    return jsonify({'message': 'Scan started successfully'})
+    queued = Gauge('asm_job_domains_queued', 'Domains waiting for a scan worker', labels=('job_id',))
+    running = Gauge('asm_job_domains_running', 'Domains being scanned', labels=('job_id',))
+    for job_id, counts in jobs.scheduler.stats().items():
+        queued.set(counts['queued'], job_id=job_id)
+        running.set(counts['running'], job_id=job_id)
+    
+    return [probes, delayed, waited, queued, running]
+
+registry.add_collector(collect_runtime_metrics)
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/ratelimit')
+def get_rate_limit_stats():
+    return jsonify(limiter.stats())
 
 @app.route('/status')
 def get_status():
-    status_file = os.path.join(app.config['UPLOAD_FOLDER'], 'scan_status.json')
-    if os.path.exists(status_file):
-        with open(status_file, 'r') as f:
-            return jsonify(json.load(f))
-    return jsonify({'status': 'No scan in progress'})
+    # Status of the most recent job
+    job_id = jobs.latest()
+    if job_id is None:
+        return jsonify({'status': 'No scan in progress'})
+    return get_job_status(job_id)
 
 @app.route('/results')
 def get_results():
-    results_file = os.path.join(app.config['UPLOAD_FOLDER'], 'scan_results.json')
-    if os.path.exists(results_file):
-        return send_file(results_file, mimetype='application/json')
-    return jsonify({'error': 'No results available'}), 404
+    # Results of the most recent job
+    job_id = jobs.latest()
+    if job_id is None:
+        return jsonify({'error': 'No results available'}), 404
+    return get_job_results(job_id)
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True) 
\ No newline at end of file
+    socketio.run(app, debug=True)
\ No newline at end of file
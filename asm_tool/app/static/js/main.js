@@ -24,9 +24,13 @@ document.addEventListener('DOMContentLoaded', function() {
         icon.className = theme === 'dark' ? 'fas fa-sun' : 'fas fa-moon';
     }
     
+    // Job started by the last upload from this page
+    let currentJobId = null;
+    
     // File upload handling
     const uploadForm = document.getElementById('upload-form');
     const fileInput = document.getElementById('csv-file');
+    const refreshInput = document.getElementById('refresh-discovery');
     
     uploadForm.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -39,6 +43,9 @@ document.addEventListener('DOMContentLoaded', function() {
         
         const formData = new FormData();
         formData.append('file', file);
+        if (refreshInput.checked) {
+            formData.append('refresh', 'true');
+        }
         
         try {
             const response = await fetch('/upload', {
@@ -48,6 +55,7 @@ document.addEventListener('DOMContentLoaded', function() {
             
             const data = await response.json();
             if (response.ok) {
+                currentJobId = data.job_id;
                 showAlert('Scan started successfully', 'success');
                 startProgressMonitoring();
             } else {
@@ -62,9 +70,37 @@ document.addEventListener('DOMContentLoaded', function() {
     const socket = io();
     
     socket.on('status_update', (data) => {
+        // Ignore progress from other users' jobs
+        if (currentJobId && data.job_id && data.job_id !== currentJobId) {
+            return;
+        }
         updateProgress(data);
     });
     
+    // Pause, resume and cancel the current job; progress updates follow once it has stopped
+    function controlScan(event) {
+        if (!currentJobId) {
+            return;
+        }
+        socket.emit(event, {job_id: currentJobId}, (reply) => {
+            if (reply && reply.error) {
+                showAlert(reply.error, 'danger');
+            }
+        });
+    }
+    
+    document.getElementById('pause-scan').addEventListener('click', () => controlScan('pause_scan'));
+    document.getElementById('resume-scan').addEventListener('click', () => controlScan('resume_scan'));
+    document.getElementById('cancel-scan').addEventListener('click', () => controlScan('cancel_scan'));
+    
+    function updateScanControls(status) {
+        const stopped = ['paused', 'pausing'].includes(status);
+        const finished = ['completed', 'cancelled', 'cancelling'].includes(status);
+        document.getElementById('pause-scan').classList.toggle('d-none', stopped || finished);
+        document.getElementById('resume-scan').classList.toggle('d-none', status !== 'paused');
+        document.getElementById('cancel-scan').classList.toggle('d-none', finished);
+    }
+    
     function updateProgress(data) {
         const progressContainer = document.getElementById('scan-progress');
         const noScan = document.getElementById('no-scan');
@@ -81,36 +117,70 @@ document.addEventListener('DOMContentLoaded', function() {
         progressContainer.classList.remove('d-none');
         noScan.classList.add('d-none');
         
-        const progress = (data.completed / data.total) * 100;
-        progressBar.style.width = `${progress}%`;
-        progressBar.setAttribute('aria-valuenow', progress);
+        // The total is unknown until the whole input file has been read
+        const totalKnown = data.total !== null && data.total !== undefined;
+        const progress = totalKnown && data.total > 0 ? (data.completed / data.total) * 100 : 100;
+        // Without a total, slide a partial bar instead of implying the scan is done
+        progressBar.classList.toggle('progress-bar-indeterminate', !totalKnown);
+        progressBar.style.width = totalKnown ? `${progress}%` : '';
+        if (totalKnown) {
+            progressBar.setAttribute('aria-valuenow', progress);
+        } else {
+            progressBar.removeAttribute('aria-valuenow');
+        }
         
-        currentDomain.textContent = `Scanning: ${data.current_domain}`;
-        scanStatus.textContent = `Progress: ${data.completed}/${data.total} domains`;
+        currentDomain.textContent = data.status === 'scanning'
+            ? `Scanning: ${data.current_domain}`
+            : `Scan ${data.status}`;
+        scanStatus.textContent = totalKnown
+            ? `Progress: ${data.completed}/${data.total} domains`
+            : `Progress: ${data.completed} domains`;
+        updateScanControls(data.status);
         
-        if (data.status === 'completed') {
+        if (data.status === 'completed' || data.status === 'cancelled') {
             loadResults();
         }
     }
     
     async function loadResults() {
+        // Page through the records so the first rows show up right away
+        const base = currentJobId ? `/jobs/${currentJobId}/results` : '/results';
+        const fields = 'domain,risk_score,subdomains,open_ports';
+        let cursor = 0;
+        let first = true;
+        
         try {
-            const response = await fetch('/results');
-            if (response.ok) {
-                const results = await response.json();
-                displayResults(results);
+            while (true) {
+                const response = await fetch(`${base}?fields=${fields}&limit=200&cursor=${cursor}`);
+                if (!response.ok) {
+                    break;
+                }
+                const page = await response.json();
+                displayResults(page.results, !first);
+                first = false;
+                cursor = page.next_cursor;
+                if (!page.has_more) {
+                    break;
+                }
             }
         } catch (error) {
             showAlert('Error loading results', 'danger');
         }
     }
     
-    function displayResults(results) {
+    const resultRows = new Map();
+    
+    function displayResults(results, append) {
         const resultsContainer = document.getElementById('results-container');
         const noResults = document.getElementById('no-results');
         const resultsTable = document.getElementById('results-table');
         
-        if (Object.keys(results).length === 0) {
+        if (!append) {
+            resultsTable.innerHTML = '';
+            resultRows.clear();
+        }
+        
+        if (resultsTable.children.length === 0 && results.length === 0) {
             resultsContainer.classList.add('d-none');
             noResults.classList.remove('d-none');
             return;
@@ -119,9 +189,8 @@ document.addEventListener('DOMContentLoaded', function() {
         resultsContainer.classList.remove('d-none');
         noResults.classList.add('d-none');
         
-        resultsTable.innerHTML = '';
-        
-        for (const [domain, data] of Object.entries(results)) {
+        for (const data of results) {
+            const domain = data.domain;
             const row = document.createElement('tr');
             row.innerHTML = `
                 <td>${domain}</td>
@@ -134,7 +203,15 @@ document.addEventListener('DOMContentLoaded', function() {
                     </button>
                 </td>
             `;
-            resultsTable.appendChild(row);
+            
+            // A retried domain can appear twice; the later record wins
+            const existing = resultRows.get(domain);
+            if (existing) {
+                existing.replaceWith(row);
+            } else {
+                resultsTable.appendChild(row);
+            }
+            resultRows.set(domain, row);
         }
     }
     
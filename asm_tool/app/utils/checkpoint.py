@@ -0,0 +1,54 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+class ScanCheckpoint:
+    """
+    Track which input a scan belongs to and whether it ran to completion,
+    so an interrupted scan of the same input can be resumed
+    """
+    def __init__(self, output_dir, name='scan_checkpoint.json'):
+        self.checkpoint_file = os.path.join(output_dir, name)
+    
+    @staticmethod
+    def fingerprint(input_file):
+        """
+        Hash the input file contents
+        """
+        digest = hashlib.sha256()
+        with open(input_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def load(self):
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def can_resume(self, fingerprint):
+        """
+        Check whether an unfinished scan of the same input was checkpointed.
+        Cancelled scans are not resumed.
+        """
+        state = self.load()
+        return bool(state) and state.get('input') == fingerprint and state.get('status') not in ('completed', 'cancelled')
+    
+    def save(self, fingerprint, status):
+        state = {
+            'input': fingerprint,
+            'status': status,
+            'updated': datetime.now().isoformat()
+        }
+        
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(self.checkpoint_file), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_file, 0o644)
+        os.replace(tmp_file, self.checkpoint_file)
\ No newline at end of file
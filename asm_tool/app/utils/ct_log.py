@@ -0,0 +1,77 @@
+import codecs
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class JSONArrayParser:
+    """
+    Parse a JSON array fed in chunks, returning each element as soon as it
+    is complete. Certificate transparency responses for large domains run to
+    hundreds of MB; this way only the unparsed tail is held in memory.
+    """
+    def __init__(self):
+        self.decoder = json.JSONDecoder()
+        self.text = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.buffer = ''
+        self.started = False
+        self.finished = False
+    
+    def feed(self, chunk):
+        """
+        Add a chunk of the response (bytes or str) and return the elements it completed
+        """
+        if isinstance(chunk, bytes):
+            chunk = self.text.decode(chunk)
+        buffer = self.buffer + chunk
+        items = []
+        position = 0
+        
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position >= len(buffer):
+                break
+            if not self.started:
+                if buffer[position] != '[':
+                    raise ValueError('Expected a JSON array')
+                self.started = True
+                position += 1
+                continue
+            if self.finished:
+                raise ValueError('Unexpected data after the JSON array')
+            if buffer[position] == ']':
+                self.finished = True
+                position += 1
+                continue
+            if buffer[position] == ',':
+                position += 1
+                continue
+            
+            try:
+                item, end = self.decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element continues in the next chunk
+                break
+            if end == len(buffer) and not isinstance(item, (dict, list, str)):
+                # A number or literal at the end of the chunk may be cut short
+                break
+            items.append(item)
+            position = end
+        
+        self.buffer = buffer[position:]
+        return items
+    
+    def close(self):
+        """
+        Raise ValueError if the response ended before the array did
+        """
+        if not self.finished or self.buffer.strip():
+            raise ValueError('Truncated JSON array')
+
+def entry_names(entry):
+    """
+    Return the names of a crt.sh entry; name_value lists one SAN per line
+    """
+    if not isinstance(entry, dict):
+        return []
+    return str(entry.get('name_value') or '').split('\n')
\ No newline at end of file
@@ -0,0 +1,193 @@
+import threading
+import time
+from contextlib import contextmanager
+from app.utils.profiler import current_profile, follow
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+class DeadlineCancelled(DeadlineExceeded):
+    """
+    Raised to probes once the scan they belong to is paused or cancelled
+    """
+
+class Deadline:
+    """
+    Time budget for scanning one domain, shared by every stage. Probes ask
+    for a timeout capped by what is left of the budget, and record the
+    probes that ran out of time so the result can say which parts are partial.
+    Cancelling a deadline ends the budget at once and kills the child
+    processes started under it.
+    """
+    # Shortest timeout handed out, so a nearly spent budget fails fast rather than instantly
+    MINIMUM_TIMEOUT = 0.5
+    
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds if seconds else None
+        self.lock = threading.Lock()
+        self.timed_out = set()
+        self.cancelled = False
+        self.callbacks = []
+    
+    def remaining(self):
+        """
+        Seconds left in the budget, or None when there is no budget
+        """
+        if self.cancelled:
+            return 0.0
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+    
+    def expired(self):
+        return self.cancelled or (self.expires is not None and time.monotonic() >= self.expires)
+    
+    def timeout(self, default=None, probe=None):
+        """
+        Return the timeout for a probe: its default, capped by the remaining
+        budget. Raises DeadlineExceeded (recording probe) once the budget is spent.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if self.cancelled:
+            raise DeadlineCancelled('Scan stopped')
+        if remaining <= 0:
+            self.mark(probe)
+            raise DeadlineExceeded(f'Deadline of {self.seconds}s exceeded')
+        
+        remaining = max(remaining, self.MINIMUM_TIMEOUT)
+        return remaining if default is None else min(default, remaining)
+    
+    def mark(self, probe):
+        """
+        Record that a probe was cut short by the deadline
+        """
+        if probe:
+            with self.lock:
+                self.timed_out.add(probe)
+    
+    def annotate(self, probe, output):
+        """
+        Flag a stage's output as partial if the budget ran out while it ran
+        """
+        if self.expired():
+            self.mark(probe)
+            if isinstance(output, dict):
+                output['timed_out'] = True
+        return output
+    
+    def cancel(self):
+        """
+        End the budget now and run the registered cancel callbacks
+        """
+        with self.lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error stopping probe: {str(e)}")
+    
+    def sleep(self, seconds, probe=None):
+        """
+        Wait up to seconds, capped by the remaining budget. Raises
+        DeadlineCancelled as soon as the scan is stopped.
+        """
+        woken = threading.Event()
+        self.on_cancel(woken.set)
+        try:
+            woken.wait(self.timeout(seconds, probe))
+        finally:
+            with self.lock:
+                if woken.set in self.callbacks:
+                    self.callbacks.remove(woken.set)
+        if self.cancelled:
+            raise DeadlineCancelled('Scan stopped')
+    
+    def on_cancel(self, callback):
+        """
+        Call callback when the deadline is cancelled, or right away if it already was
+        """
+        with self.lock:
+            if not self.cancelled:
+                self.callbacks.append(callback)
+                return
+        callback()
+    
+    @contextmanager
+    def watch(self, process):
+        """
+        Kill a child process if the deadline is cancelled while it runs
+        """
+        self.on_cancel(process.kill)
+        try:
+            yield process
+        finally:
+            with self.lock:
+                if process.kill in self.callbacks:
+                    self.callbacks.remove(process.kill)
+    
+    def probes_timed_out(self):
+        with self.lock:
+            return sorted(self.timed_out)
+
+# Calls abandoned by run_with_timeout that are still running. Past the cap,
+# new calls fail at once instead of piling up more stuck threads. Calls
+# that finish in time never count against it.
+MAX_ABANDONED_CALLS = 32
+abandoned_lock = threading.Lock()
+abandoned_running = 0
+
+def abandoned_calls():
+    """
+    Return how many abandoned calls are still running
+    """
+    with abandoned_lock:
+        return abandoned_running
+
+def run_with_timeout(func, timeout, *args, **kwargs):
+    """
+    Run a blocking call that has no timeout of its own in a daemon thread.
+    Raises DeadlineExceeded if it does not finish in time; the call itself
+    is left to finish in the background. The thread is sampled into the
+    caller's profile, so its time is charged to the calling stage.
+    """
+    global abandoned_running
+    name = getattr(func, '__name__', 'call')
+    with abandoned_lock:
+        if abandoned_running >= MAX_ABANDONED_CALLS:
+            raise DeadlineExceeded(f'Too many abandoned {name} calls still running')
+    
+    profile = current_profile()
+    outcome = {}
+    
+    def target():
+        global abandoned_running
+        try:
+            with follow(profile):
+                outcome['value'] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            with abandoned_lock:
+                outcome['done'] = True
+                if outcome.get('abandoned'):
+                    abandoned_running -= 1
+    
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    with abandoned_lock:
+        if 'done' not in outcome:
+            # Counted until the call finally returns
+            outcome['abandoned'] = True
+            abandoned_running += 1
+            raise DeadlineExceeded(f'{name} did not finish within {timeout:.1f}s')
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('value')
\ No newline at end of file
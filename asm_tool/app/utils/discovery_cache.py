@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS discovery (
+    apex TEXT NOT NULL,
+    source TEXT NOT NULL,
+    names BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetched REAL NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (apex, source)
+);
+CREATE INDEX IF NOT EXISTS discovery_accessed ON discovery (accessed);
+"""
+
+class DiscoveryCache:
+    """
+    Persistent cache of the names each subdomain discovery source (amass,
+    subfinder, crt.sh) returned for an apex. Entries expire after ttl
+    seconds; once the stored size passes max_bytes, the least recently used
+    entries are evicted.
+    """
+    def __init__(self, db_path, ttl=24 * 3600, max_bytes=256 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+    
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            # Worker hosts may share this file over NFS, where WAL's shared
+            # memory index does not work; a rollback journal only needs locks
+            connection.execute('PRAGMA journal_mode=DELETE')
+            self.local.connection = connection
+        return connection
+    
+    def get(self, apex, source):
+        """
+        Return the cached names for apex from source, or None if there are
+        none younger than the TTL
+        """
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT names FROM discovery WHERE apex = ? AND source = ? AND fetched >= ?',
+            (apex, source, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        connection.execute('UPDATE discovery SET accessed = ? WHERE apex = ? AND source = ?', (now, apex, source))
+        names = zlib.decompress(row[0]).decode()
+        return names.split('\n') if names else []
+    
+    def put(self, apex, source, names):
+        """
+        Store the complete output of a source and evict old entries if the
+        cache has grown past its size limit
+        """
+        data = zlib.compress('\n'.join(names).encode())
+        now = time.time()
+        
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                """
+                INSERT OR REPLACE INTO discovery (apex, source, names, size, fetched, accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (apex, source, data, len(data), now, now)
+            )
+            self._evict(connection, now)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+    
+    def _evict(self, connection, now):
+        """
+        Delete expired entries, then the least recently used ones until the
+        cache fits in max_bytes. Must be called inside a transaction.
+        """
+        connection.execute('DELETE FROM discovery WHERE fetched < ?', (now - self.ttl,))
+        
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM discovery').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        evict = []
+        for apex, source, size in connection.execute('SELECT apex, source, size FROM discovery ORDER BY accessed'):
+            if total <= self.max_bytes:
+                break
+            evict.append((apex, source))
+            total -= size
+        connection.executemany('DELETE FROM discovery WHERE apex = ? AND source = ?', evict)
\ No newline at end of file
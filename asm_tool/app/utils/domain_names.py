@@ -0,0 +1,87 @@
+import re
+import sys
+
+LABEL_PATTERN = re.compile(r'^(?!-)[a-z0-9_-]{1,63}(?<!-)$')
+
+def normalize_name(name):
+    """
+    Lower-case a discovered name and strip a trailing dot and a leading
+    wildcard label. Returns None if what is left is not a valid host name.
+    """
+    name = name.strip().lower().rstrip('.')
+    if name.startswith('*.'):
+        name = name[2:]
+    if not name or len(name) > 253:
+        return None
+    if not all(LABEL_PATTERN.match(label) for label in name.split('.')):
+        return None
+    return name
+
+def in_scope(name, apex):
+    """
+    Check whether a normalized name is apex or one of its subdomains
+    """
+    return name == apex or name.endswith(f'.{apex}')
+
+class NameTrie:
+    """
+    Set of domain names stored as a trie of reversed labels, so names below
+    the same apex share its labels and repeated labels (www, mail, ...) are
+    interned. A name with no names below it is stored as a None leaf.
+    """
+    # Marks a name that also has names below it; labels are never empty
+    END = ''
+    
+    def __init__(self, names=()):
+        self.root = {}
+        self.size = 0
+        for name in names:
+            self.add(name)
+    
+    def add(self, name):
+        """
+        Add a normalized name; returns False if it was already present
+        """
+        *parents, last = [sys.intern(label) for label in reversed(name.split('.'))]
+        node = self.root
+        for label in parents:
+            child = node.get(label)
+            if child is None:
+                child = node[label] = {self.END: True} if label in node else {}
+            node = child
+        
+        if last not in node:
+            node[last] = None
+        elif node[last] is None or self.END in node[last]:
+            return False
+        else:
+            node[last][self.END] = True
+        self.size += 1
+        return True
+    
+    def __contains__(self, name):
+        node = self.root
+        labels = list(reversed(name.split('.')))
+        for label in labels[:-1]:
+            node = node.get(label)
+            if node is None:
+                return False
+        if labels[-1] not in node:
+            return False
+        child = node[labels[-1]]
+        return child is None or self.END in child
+    
+    def __len__(self):
+        return self.size
+    
+    def __iter__(self):
+        stack = [(self.root, ())]
+        while stack:
+            node, suffix = stack.pop()
+            for label, child in node.items():
+                if label == self.END:
+                    yield '.'.join(reversed(suffix))
+                elif child is None:
+                    yield '.'.join(reversed(suffix + (label,)))
+                else:
+                    stack.append((child, suffix + (label,)))
\ No newline at end of file
@@ -0,0 +1,57 @@
+import csv
+import sqlite3
+from urllib.parse import urlsplit
+
+def normalize_domain(value):
+    """
+    Normalize a domain from the input file: trim, lower-case and strip any
+    scheme, path, port or trailing dot
+    """
+    value = (value or '').strip().lower()
+    if '://' in value:
+        value = urlsplit(value).netloc
+    value = value.split('/', 1)[0].split('@')[-1]
+    if value.count(':') == 1:
+        value = value.split(':', 1)[0]
+    return value.rstrip('.')
+
+class DomainReader:
+    """
+    Stream normalized, de-duplicated domains from a CSV file with a 'domain'
+    column without loading the file into memory
+    """
+    def __init__(self, input_file, column='domain'):
+        self.input_file = input_file
+        self.column = column
+        self.count = 0
+        self.exhausted = False
+    
+    def __iter__(self):
+        self.count = 0
+        self.exhausted = False
+        # Domains seen so far go into a temporary on-disk SQLite database,
+        # which SQLite deletes on close. Memory stays bounded by its page
+        # cache however large the input is, and names are compared in full.
+        seen = sqlite3.connect('')
+        try:
+            seen.execute('CREATE TABLE seen (domain TEXT PRIMARY KEY) WITHOUT ROWID')
+            
+            with open(self.input_file, 'r', newline='', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                if self.column not in (reader.fieldnames or []):
+                    raise KeyError(f"Input file has no '{self.column}' column")
+                
+                for row in reader:
+                    domain = normalize_domain(row.get(self.column))
+                    if not domain:
+                        continue
+                    
+                    if seen.execute('INSERT OR IGNORE INTO seen (domain) VALUES (?)', (domain,)).rowcount == 0:
+                        continue
+                    
+                    self.count += 1
+                    yield domain
+        finally:
+            seen.close()
+        
+        self.exhausted = True
\ No newline at end of file
@@ -0,0 +1,204 @@
+import hashlib
+import json
+from datetime import datetime
+from app.utils.network import configure_resolver
+
+# Stages that can be carried over from the previous scan, and the
+# fingerprint fields that must be unchanged for that to be safe
+REUSABLE_STAGES = {
+    'open_ports': ('addresses',),
+    'ssl_info': ('addresses', 'certificate')
+}
+
+def fingerprint(domain, fetcher):
+    """
+    Cheap signals that the expensive stages depend on: resolved addresses,
+    TLS certificate, landing page and the set of response headers
+    """
+    response = fetcher.get('https')
+    if response is None:
+        response = fetcher.get('http')
+    
+    tls_info = getattr(response, 'tls_info', None) or {}
+    page = None
+    headers = None
+    if response is not None:
+        page = response.headers.get('ETag') or hashlib.sha256(response.content).hexdigest()
+        headers = sorted(name.lower() for name in response.headers)
+    
+    return {
+        'addresses': _resolve(domain),
+        'certificate': tls_info.get('certificate'),
+        'page': page,
+        'headers': headers
+    }
+
+def _resolve(domain):
+    import dns.resolver
+    
+    resolver = configure_resolver(dns.resolver.Resolver())
+    resolver.timeout = 5
+    resolver.lifetime = 5
+    
+    addresses = []
+    for record_type in ('A', 'AAAA'):
+        try:
+            addresses.extend(str(rdata) for rdata in resolver.resolve(domain, record_type))
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            continue
+        except Exception:
+            # Unknown rather than empty, so nothing is reused on a lookup failure
+            return None
+    return sorted(addresses)
+
+def changed_fields(previous, current):
+    """
+    Return the fingerprint fields that differ. A field that could not be
+    determined in either scan counts as changed.
+    """
+    previous = previous or {}
+    return [
+        field for field, value in current.items()
+        if value is None or previous.get(field) is None or previous[field] != value
+    ]
+
+def produced_at(previous, stage):
+    """
+    Return when a stage's output in the previous result was actually scanned
+    """
+    return datetime.fromisoformat((previous.get('reused') or {}).get(stage, previous['scan_date']))
+
+def same(a, b):
+    """
+    Compare stage outputs the way they would be stored
+    """
+    return _canonical(a) == _canonical(b)
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+def _failed(output):
+    """
+    Error messages (timeouts, connection resets) differ from run to run;
+    only the fact that a stage failed is compared
+    """
+    if isinstance(output, dict) and 'error' in output:
+        return {'error': True}
+    if isinstance(output, list) and any(isinstance(item, dict) and 'error' in item for item in output):
+        return [{'error': True}]
+    return None
+
+def _subdomains_view(output):
+    names = output.get('subdomains', []) if isinstance(output, dict) else output or []
+    return sorted(names)
+
+def _dns_view(output):
+    view = {
+        key: sorted(output.get(key) or [])
+        for key in ('a_records', 'aaaa_records', 'mx_records', 'ns_records', 'txt_records')
+    }
+    view['spf_record'] = output.get('spf_record')
+    view['dmarc_record'] = output.get('dmarc_record')
+    
+    whois = output.get('whois') or {}
+    view['whois'] = _failed(whois) or {
+        'registrar': whois.get('registrar'),
+        'expiration_date': whois.get('expiration_date'),
+        'name_servers': sorted(str(server).lower() for server in whois.get('name_servers') or [])
+    }
+    return view
+
+def _ports_view(output):
+    return sorted(
+        ({'port': port['port'], 'service': port.get('service'), 'version': port.get('version')}
+         for port in output or [] if port.get('state') == 'open'),
+        key=lambda port: port['port']
+    )
+
+def _ssl_view(output):
+    ciphers = output.get('ciphers') or {}
+    return {
+        'certificate': _failed(output.get('certificate')) or output.get('certificate'),
+        'protocols': output.get('protocols'),
+        'ciphers': {'name': ciphers.get('name'), 'version': ciphers.get('version')} if ciphers else None,
+        'vulnerabilities': output.get('vulnerabilities')
+    }
+
+def _headers_view(output):
+    # Values of the known security headers matter; other headers such as
+    # X-Request-Id or Content-Length change on every response, so only
+    # their presence is compared
+    return {
+        'headers': {
+            name: entry.get('value') if entry.get('required') or entry.get('recommended') is not None else 'present'
+            for name, entry in (output.get('headers') or {}).items()
+        },
+        'score': output.get('score')
+    }
+
+STABLE_VIEWS = {
+    'subdomains': _subdomains_view,
+    'dns_records': _dns_view,
+    'open_ports': _ports_view,
+    'ssl_info': _ssl_view,
+    'headers': _headers_view,
+    'tech_stack': lambda output: sorted(output or [], key=_canonical)
+}
+
+def stable(stage, output):
+    """
+    Project a stage output onto the fields that only change when the target
+    does. Drop reasons, cache hits, timing and timeout flags are left out,
+    so reruns of an unchanged domain compare equal.
+    """
+    view = STABLE_VIEWS.get(stage)
+    if view is None or output is None:
+        return output
+    return _failed(output) or view(output)
+
+def same_stage(stage, a, b):
+    """
+    Compare the stable parts of two outputs of a stage
+    """
+    return same(stable(stage, a), stable(stage, b))
+
+def diff_results(previous, result, fields=('subdomains', 'dns_records', 'open_ports', 'ssl_info', 'headers',
+                                           'tech_stack', 'risk_score')):
+    """
+    Describe what changed since the previous result: items added to or
+    removed from lists, keys whose values changed in dicts, and old and
+    new values of everything else. Stage outputs are compared through
+    their stable views.
+    """
+    changes = {}
+    
+    fingerprint_changes = changed_fields(previous.get('fingerprint'), result.get('fingerprint') or {})
+    if fingerprint_changes:
+        changes['fingerprint'] = {
+            field: {'old': (previous.get('fingerprint') or {}).get(field), 'new': result['fingerprint'][field]}
+            for field in fingerprint_changes
+        }
+    
+    for field in fields:
+        old = stable(field, previous.get(field))
+        new = stable(field, result.get(field))
+        if same(old, new):
+            continue
+        
+        if isinstance(old, list) and isinstance(new, list):
+            old_items = {_canonical(item): item for item in old}
+            new_items = {_canonical(item): item for item in new}
+            changes[field] = {
+                'added': [item for key, item in new_items.items() if key not in old_items],
+                'removed': [item for key, item in old_items.items() if key not in new_items]
+            }
+        elif isinstance(old, dict) and isinstance(new, dict):
+            changes[field] = {
+                key: {'old': old.get(key), 'new': new.get(key)}
+                for key in sorted(set(old) | set(new))
+                if not same(old.get(key), new.get(key))
+            }
+        else:
+            changes[field] = {'old': old, 'new': new}
+    
+    return changes
\ No newline at end of file
@@ -0,0 +1,31 @@
+import importlib
+import threading
+
+class LazyObject:
+    """
+    Stand-in for a module attribute (usually a class) that imports the module
+    on first use, keeping heavy dependencies off the import path of the app
+    """
+    def __init__(self, module_name, attribute):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    module = importlib.import_module(self._module_name)
+                    self._target = getattr(module, self._attribute)
+        return self._target
+    
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+    
+    def __repr__(self):
+        state = 'loaded' if self._target is not None else 'not loaded'
+        return f'<LazyObject {self._module_name}.{self._attribute} ({state})>'
\ No newline at end of file
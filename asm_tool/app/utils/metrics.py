@@ -0,0 +1,229 @@
+import asyncio
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds; scan stages range from DNS lookups to full nmap scans
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f'{{{pairs}}}'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """
+    Base for a named metric with one series per label combination
+    """
+    type = None
+    
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        self.series = {}
+    
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"Metric '{self.name}' expects labels {', '.join(self.labels)}")
+        return tuple((name, labels[name]) for name in self.labels)
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.type}']
+        with self.lock:
+            for key in sorted(self.series):
+                lines.extend(self._render_series(key, self.series[key]))
+        return lines
+    
+    def _render_series(self, key, value):
+        return [f'{self.name}{_format_labels(key)} {_format_value(value)}']
+
+class Counter(Metric):
+    type = 'counter'
+    
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = 'gauge'
+    
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+    
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+    
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = value
+
+class Histogram(Metric):
+    type = 'histogram'
+    
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+    
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+    
+    def _render_series(self, key, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series['counts']):
+            cumulative += count
+            labels = _format_labels(key + (('le', _format_value(float(bound))),))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(series["sum"])}')
+        lines.append(f'{self.name}_count{_format_labels(key)} {series["count"]}')
+        return lines
+
+class Registry:
+    """
+    In-process collection of metrics rendered in the Prometheus text format
+    """
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+    
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+    
+    def add_collector(self, collector):
+        """
+        Register a callable returning metrics computed at scrape time
+        """
+        self.collectors.append(collector)
+    
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+def serve(port, host='0.0.0.0', registry=registry):
+    """
+    Serve the registry at /metrics from a background thread, for processes
+    without a web app of their own such as queue workers
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+stage_duration = registry.register(Histogram(
+    'asm_stage_duration_seconds', 'Time spent in a scan stage', labels=('stage',)
+))
+stage_total = registry.register(Counter(
+    'asm_stage_total', 'Scan stage runs by outcome (success, error, timeout)', labels=('stage', 'outcome')
+))
+stage_in_progress = registry.register(Gauge(
+    'asm_stage_in_progress', 'Scan stages currently running', labels=('stage',)
+))
+subdomain_first_valid = registry.register(Histogram(
+    'asm_subdomain_first_valid_seconds', 'Time from the start of subdomain enumeration to the first validated name'
+))
+
+def _outcome(value=None, error=None):
+    """
+    Classify a stage run. Modules often catch their own exceptions and return
+    {'error': ...}, so returned errors count as failures too.
+    """
+    if error is None and isinstance(value, dict) and isinstance(value.get('error'), str):
+        error = value['error']
+    if error is None:
+        return 'success'
+    if isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower() or 'timed out' in str(error).lower():
+        return 'timeout'
+    return 'error'
+
+@contextmanager
+def track(stage):
+    """
+    Time a block of code as a scan stage. Call the yielded function with the
+    block's result to classify returned errors.
+    """
+    outcome = {'value': None}
+    stage_in_progress.inc(stage=stage)
+    started = time.monotonic()
+    try:
+        yield lambda value: outcome.update(value=value)
+    except BaseException as e:
+        stage_total.inc(stage=stage, outcome=_outcome(error=e))
+        raise
+    else:
+        stage_total.inc(stage=stage, outcome=_outcome(outcome['value']))
+    finally:
+        stage_duration.observe(time.monotonic() - started, stage=stage)
+        stage_in_progress.dec(stage=stage)
+
+def instrument(stage):
+    """
+    Decorate a function or coroutine function so every call is tracked as stage
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track(stage) as record:
+                    result = await func(*args, **kwargs)
+                    record(result)
+                    return result
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(stage) as record:
+                result = func(*args, **kwargs)
+                record(result)
+                return result
+        return wrapper
+    return decorator
\ No newline at end of file
@@ -0,0 +1,40 @@
+import os
+from urllib.parse import urlparse
+
+# External endpoints the scanners talk to, overridable for offline runs
+# (e.g. benchmarks/scan_throughput.py points them at loopback stubs)
+CT_LOG_URL = os.getenv('CT_LOG_URL', 'https://crt.sh/?q=%.{domain}&output=json')
+DNS_NAMESERVERS = os.getenv('DNS_NAMESERVERS', '')
+
+def ct_log_url(domain):
+    return CT_LOG_URL.format(domain=domain)
+
+def ct_log_host():
+    return urlparse(CT_LOG_URL).hostname
+
+def configure_resolver(resolver):
+    """
+    Point a dnspython resolver at DNS_NAMESERVERS ("ip[:port],...") if set;
+    otherwise it keeps the system configuration
+    """
+    if not DNS_NAMESERVERS:
+        return resolver
+    
+    nameservers = []
+    for entry in DNS_NAMESERVERS.split(','):
+        entry = entry.strip()
+        if entry.startswith('['):
+            # [IPv6]:port
+            host, _, port = entry[1:].partition(']:')
+        elif entry.count(':') == 1:
+            host, port = entry.split(':')
+        else:
+            host, port = entry, ''
+        
+        nameservers.append(host)
+        if port:
+            # dnspython uses one port for every nameserver
+            resolver.port = int(port)
+    
+    resolver.nameservers = nameservers
+    return resolver
\ No newline at end of file
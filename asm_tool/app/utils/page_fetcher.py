@@ -0,0 +1,117 @@
+import hashlib
+import socket
+import ssl
+import threading
+from urllib.parse import urlparse
+import requests
+from urllib3.exceptions import InsecureRequestWarning
+from app.utils.deadline import Deadline
+from app.utils.rate_limit import limiter
+
+# Disable SSL verification warnings
+requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
+
+class PageFetcher:
+    """
+    Fetch a domain's landing page once per scheme and share the response
+    between every analyzer that needs it
+    """
+    def __init__(self, domain, timeout=10, deadline=None):
+        self.domain = domain
+        self.timeout = timeout
+        self.deadline = deadline or Deadline()
+        self.responses = {}
+        self.lock = threading.Lock()
+        self.scheme_locks = {}
+    
+    def get(self, protocol):
+        """
+        Return the cached response for the given scheme, fetching it on first use
+        """
+        with self.lock:
+            if protocol in self.responses:
+                return self.responses[protocol]
+            scheme_lock = self.scheme_locks.setdefault(protocol, threading.Lock())
+        
+        # Concurrent callers for the same scheme wait for the first fetch
+        with scheme_lock:
+            with self.lock:
+                if protocol in self.responses:
+                    return self.responses[protocol]
+            
+            response = self._fetch(protocol)
+            with self.lock:
+                self.responses[protocol] = response
+            return response
+    
+    def prime(self, protocol, response):
+        """
+        Store a response fetched elsewhere (e.g. by the async engine)
+        """
+        with self.lock:
+            self.responses[protocol] = response
+    
+    def _fetch(self, protocol):
+        """
+        Make HTTP request to the domain, capturing TLS details of the connection
+        """
+        try:
+            url = f'{protocol}://{self.domain}'
+            limiter.acquire(self.domain, 'http', deadline=self.deadline)
+            timeout = self.deadline.timeout(self.timeout, 'http')
+            response = requests.get(url, verify=False, timeout=timeout, stream=True)
+            response.tls_info = self._tls_info(response) if self._same_host(response) else None
+            if response.tls_info is None and protocol == 'https':
+                # Redirected elsewhere: the final hop's TLS is another host's
+                response.tls_info = self._handshake_tls_info()
+            # Read the body now so every consumer sees the same content
+            response.content
+            return response
+        except:
+            return None
+    
+    def _same_host(self, response):
+        """
+        Check that the response came from the domain itself rather than a
+        host it redirected to
+        """
+        return not response.history or (urlparse(response.url).hostname or '').lower() == self.domain.lower()
+    
+    def _tls_info(self, response):
+        """
+        Extract protocol, cipher and certificate hash from the underlying TLS socket, if any
+        """
+        try:
+            connection = getattr(response.raw, 'connection', None) or getattr(response.raw, '_connection', None)
+            sock = getattr(connection, 'sock', None)
+            if sock is None or not hasattr(sock, 'cipher'):
+                return None
+            return self._socket_tls_info(sock)
+        except Exception:
+            return None
+    
+    def _handshake_tls_info(self):
+        """
+        Complete a TLS handshake with the domain on port 443 just for its TLS details
+        """
+        try:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            limiter.acquire(self.domain, 'tls', deadline=self.deadline)
+            timeout = self.deadline.timeout(self.timeout, 'tls')
+            with socket.create_connection((self.domain, 443), timeout=timeout) as raw:
+                with context.wrap_socket(raw, server_hostname=self.domain) as sock:
+                    return self._socket_tls_info(sock)
+        except Exception:
+            return None
+    
+    def _socket_tls_info(self, sock):
+        cipher = sock.cipher()
+        certificate = sock.getpeercert(binary_form=True)
+        return {
+            'version': sock.version(),
+            'cipher': cipher[0] if cipher else None,
+            'bits': cipher[2] if cipher else None,
+            'certificate': hashlib.sha256(certificate).hexdigest() if certificate else None
+        }
\ No newline at end of file
@@ -0,0 +1,271 @@
+import heapq
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+MODES = ('off', 'all', 'slowest')
+
+def profile_name(domain):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', domain) + '.prof'
+
+class StackSampler:
+    """
+    Process-wide sampling profiler. A single background thread periodically
+    reads the stacks of the threads attached to a domain profile and charges
+    the time since the previous sample to the functions on them. Unlike
+    cProfile, which from Python 3.12 allows only one active profiler per
+    process, any number of stages can be sampled at once.
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.threads = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.thread = None
+    
+    def attach(self, profile, ident=None):
+        """
+        Sample a thread (the calling one by default) into profile. Returns
+        the profile the thread was attached to before, for detach().
+        """
+        ident = ident if ident is not None else threading.get_ident()
+        with self.lock:
+            previous = self.threads.get(ident)
+            self.threads[ident] = profile
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+                self.thread.start()
+            self.wakeup.notify()
+        return previous
+    
+    def detach(self, previous=None, ident=None):
+        ident = ident if ident is not None else threading.get_ident()
+        with self.lock:
+            if previous is None:
+                self.threads.pop(ident, None)
+            else:
+                self.threads[ident] = previous
+    
+    def profile_of(self, ident=None):
+        """
+        Return the profile a thread (the calling one by default) is sampled into
+        """
+        with self.lock:
+            return self.threads.get(ident if ident is not None else threading.get_ident())
+    
+    def _run(self):
+        last = time.monotonic()
+        while True:
+            with self.lock:
+                while not self.threads:
+                    self.wakeup.wait()
+                    last = time.monotonic()
+                threads = list(self.threads.items())
+            
+            now = time.monotonic()
+            elapsed, last = now - last, now
+            frames = sys._current_frames()
+            for ident, profile in threads:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                try:
+                    profile._sample(frame, elapsed)
+                except Exception:
+                    # A profiling problem must never affect the scan
+                    pass
+            del frames
+            time.sleep(self.interval)
+
+sampler = StackSampler()
+
+@contextmanager
+def follow(profile):
+    """
+    Sample the calling thread into profile (if any) while the block runs.
+    Used to carry a stage's profile into helper threads it starts.
+    """
+    previous = None
+    attached = False
+    if profile is not None:
+        try:
+            previous = sampler.attach(profile)
+            attached = True
+        except Exception as e:
+            print(f"Error starting profiler: {str(e)}")
+    try:
+        yield
+    finally:
+        if attached:
+            sampler.detach(previous)
+
+def current_profile():
+    """
+    Return the domain profile the calling thread is sampled into, if any
+    """
+    return sampler.profile_of()
+
+class DomainProfiler:
+    """
+    Capture a sampled profile per scanned domain, covering the stage threads
+    that scanned it. In 'slowest' mode only the profiles of the top K
+    slowest domains are kept. Profiles are written to <output_dir>/profiles
+    in pstats format.
+    """
+    def __init__(self, output_dir, mode='all', top=10):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(MODES)}")
+        
+        self.profile_dir = os.path.join(output_dir, 'profiles')
+        self.index_file = os.path.join(self.profile_dir, 'index.jsonl')
+        self.mode = mode
+        self.top = max(1, int(top))
+        self.lock = threading.Lock()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        
+        # Profiles kept by an interrupted run of the same job still count
+        self.slowest = [(entry['seconds'], entry['domain']) for entry in list_profiles(output_dir)]
+        heapq.heapify(self.slowest)
+        while len(self.slowest) > self.top:
+            self._remove(heapq.heappop(self.slowest)[1])
+    
+    def begin(self, domain):
+        return DomainProfile(self, domain)
+    
+    def _save(self, domain, seconds, profile):
+        """
+        Write a domain's profile, evicting the fastest kept profile when
+        only the slowest K are retained
+        """
+        if not profile.samples:
+            return
+        
+        with self.lock:
+            evicted = None
+            if self.mode == 'slowest':
+                if len(self.slowest) < self.top:
+                    heapq.heappush(self.slowest, (seconds, domain))
+                elif seconds > self.slowest[0][0]:
+                    evicted = heapq.heapreplace(self.slowest, (seconds, domain))[1]
+                else:
+                    return
+            
+            pstats.Stats(profile).dump_stats(os.path.join(self.profile_dir, profile_name(domain)))
+            self._append_index({'domain': domain, 'seconds': round(seconds, 3), 'file': profile_name(domain)})
+            
+            if evicted is not None and evicted != domain:
+                self._remove(evicted)
+    
+    def _remove(self, domain):
+        path = os.path.join(self.profile_dir, profile_name(domain))
+        if os.path.exists(path):
+            os.remove(path)
+        self._append_index({'domain': domain, 'removed': True})
+    
+    def _append_index(self, entry):
+        with open(self.index_file, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+class DomainProfile:
+    """
+    Stack samples collected while one domain is scanned. Call counts in the
+    resulting stats are sample counts.
+    """
+    def __init__(self, profiler, domain):
+        self.profiler = profiler
+        self.domain = domain
+        self.samples = 0
+        self.own = {}
+        self.total = {}
+        self.callers = {}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+    
+    def stage(self, name):
+        """
+        Sample the calling thread for the duration of a stage
+        """
+        return follow(self)
+    
+    def _sample(self, frame, elapsed):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        if not stack:
+            return
+        
+        with self.lock:
+            self.samples += 1
+            self.own[stack[0]] = self.own.get(stack[0], 0) + elapsed
+            # Recursive functions are only charged once per sample
+            for func in set(stack):
+                self.total[func] = self.total.get(func, 0) + elapsed
+            for func, caller in set(zip(stack, stack[1:])):
+                callers = self.callers.setdefault(func, {})
+                callers[caller] = callers.get(caller, 0) + elapsed
+    
+    def create_stats(self):
+        """
+        Build cProfile-style stats so pstats can load, merge and dump them
+        """
+        interval = sampler.interval
+        with self.lock:
+            self.stats = {}
+            for func, total in self.total.items():
+                count = max(1, round(total / interval))
+                callers = {
+                    caller: (max(1, round(seconds / interval)),) * 2 + (seconds, seconds)
+                    for caller, seconds in self.callers.get(func, {}).items()
+                }
+                self.stats[func] = (count, count, self.own.get(func, 0), total, callers)
+    
+    def finish(self):
+        try:
+            self.profiler._save(self.domain, time.monotonic() - self.started, self)
+        except Exception as e:
+            print(f"Error saving profile for {self.domain}: {str(e)}")
+
+def list_profiles(output_dir):
+    """
+    Return the profiled domains of a job, slowest first
+    """
+    index = {}
+    try:
+        with open(os.path.join(output_dir, 'profiles', 'index.jsonl'), 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('removed'):
+                    index.pop(entry['domain'], None)
+                else:
+                    index[entry['domain']] = entry
+    except OSError:
+        return []
+    
+    return sorted(index.values(), key=lambda entry: entry['seconds'], reverse=True)
+
+def profile_path(output_dir, domain):
+    """
+    Return the path of a domain's profile, or None if there is none
+    """
+    path = os.path.join(output_dir, 'profiles', profile_name(domain))
+    return path if os.path.exists(path) else None
+
+def format_profile(path, sort='cumulative', limit=50):
+    """
+    Render a saved profile as pstats text
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(path, stream=output)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return output.getvalue()
\ No newline at end of file
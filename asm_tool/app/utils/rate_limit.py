@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations: taking a token always succeeds
+    and returns how long the caller must wait before using it
+    """
+    def __init__(self, rate, burst, now=None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+    
+    def reserve(self, now):
+        # now is read before the limiter's lock is taken, so a concurrent
+        # caller may already have moved the bucket past it
+        self.tokens = min(self.burst, self.tokens + max(0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+    
+    def is_idle(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+class HostRateLimiter:
+    """
+    Politeness limiter shared by every outbound probe. Each probe takes a
+    token from the bucket of its hostname and of the IP it resolves to, so
+    many names on one address are throttled together. The limiter does no
+    DNS of its own: the IP is the one the caller already resolved, or the
+    last one recorded for the host; hosts with no known IP only take a host
+    token. A rate of 0 disables that bucket.
+    """
+    def __init__(self, host_rate=5, host_burst=10, ip_rate=10, ip_burst=20, max_keys=50000, dns_ttl=300):
+        self.lock = threading.Lock()
+        self.max_keys = max_keys
+        self.dns_ttl = dns_ttl
+        self.ip_cache = {}
+        self.configure(host_rate, host_burst, ip_rate, ip_burst)
+    
+    def configure(self, host_rate=5, host_burst=10, ip_rate=10, ip_burst=20):
+        with self.lock:
+            self.host_rate = host_rate
+            self.host_burst = max(1, host_burst)
+            self.ip_rate = ip_rate
+            self.ip_burst = max(1, ip_burst)
+            self.host_buckets = {}
+            self.ip_buckets = {}
+            self.counters = {}
+    
+    def acquire(self, host, probe='other', ip=None, deadline=None):
+        """
+        Block until a probe of the given kind may connect to host. The wait
+        is capped by deadline and ends early if its scan is stopped.
+        """
+        delay = self.reserve(host, self._ip(host, ip), probe)
+        if delay > 0:
+            if deadline is None:
+                time.sleep(delay)
+            else:
+                deadline.sleep(delay, probe)
+        return delay
+    
+    async def acquire_async(self, host, probe='other', ip=None, deadline=None):
+        """
+        Coroutine version of acquire that waits without blocking the loop
+        """
+        delay = self.reserve(host, self._ip(host, ip), probe)
+        if delay > 0:
+            await asyncio.sleep(delay if deadline is None else deadline.timeout(delay, probe))
+        return delay
+    
+    def remember(self, host, ip):
+        """
+        Record the IP a caller resolved host to, for later probes of host
+        that do not pass one
+        """
+        if not host or not ip:
+            return
+        with self.lock:
+            if len(self.ip_cache) >= self.max_keys:
+                self.ip_cache.clear()
+            self.ip_cache[host] = (ip, time.monotonic() + self.dns_ttl)
+    
+    def _ip(self, host, ip):
+        if ip:
+            self.remember(host, ip)
+            return ip
+        with self.lock:
+            entry = self.ip_cache.get(host)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+    
+    def reserve(self, host, ip=None, probe='other'):
+        """
+        Take a token for host (and its IP) and return the required wait in seconds
+        """
+        now = time.monotonic()
+        with self.lock:
+            delay = 0
+            if self.host_rate > 0 and host:
+                delay = max(delay, self._bucket(self.host_buckets, host, self.host_rate, self.host_burst, now).reserve(now))
+            if self.ip_rate > 0 and ip:
+                delay = max(delay, self._bucket(self.ip_buckets, ip, self.ip_rate, self.ip_burst, now).reserve(now))
+            
+            counter = self.counters.setdefault(probe, {'probes': 0, 'delayed': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0})
+            counter['probes'] += 1
+            if delay > 0:
+                counter['delayed'] += 1
+                counter['wait_seconds'] += delay
+                counter['max_wait_seconds'] = max(counter['max_wait_seconds'], delay)
+        return delay
+    
+    def _bucket(self, buckets, key, rate, burst, now):
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= self.max_keys:
+                # Buckets that have refilled carry no state worth keeping
+                for idle in [name for name, b in buckets.items() if b.is_idle(now)]:
+                    del buckets[idle]
+            bucket = buckets[key] = TokenBucket(rate, burst, now)
+        return bucket
+    
+    def stats(self):
+        """
+        Return per-probe counters of how often and how long probes waited
+        """
+        with self.lock:
+            probes = {name: dict(counter) for name, counter in self.counters.items()}
+            return {
+                'limits': {
+                    'host_rate': self.host_rate,
+                    'host_burst': self.host_burst,
+                    'ip_rate': self.ip_rate,
+                    'ip_burst': self.ip_burst
+                },
+                'hosts_tracked': len(self.host_buckets),
+                'ips_tracked': len(self.ip_buckets),
+                'probes': probes,
+                'total_wait_seconds': sum(counter['wait_seconds'] for counter in probes.values())
+            }
+
+# Shared by every scan module in the process
+limiter = HostRateLimiter()
\ No newline at end of file
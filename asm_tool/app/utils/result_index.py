@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    domain TEXT NOT NULL,
+    scan_date TEXT NOT NULL,
+    job_id TEXT,
+    risk_score INTEGER,
+    tls_expiry TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (domain, scan_date)
+);
+CREATE INDEX IF NOT EXISTS results_risk_score ON results (risk_score);
+CREATE INDEX IF NOT EXISTS results_tls_expiry ON results (tls_expiry);
+CREATE INDEX IF NOT EXISTS results_job ON results (job_id, domain);
+CREATE TABLE IF NOT EXISTS result_ports (
+    domain TEXT NOT NULL,
+    scan_date TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    PRIMARY KEY (domain, scan_date, port)
+);
+CREATE INDEX IF NOT EXISTS result_ports_port ON result_ports (port);
+CREATE TABLE IF NOT EXISTS result_tech (
+    domain TEXT NOT NULL,
+    scan_date TEXT NOT NULL,
+    tech TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (domain, scan_date, tech)
+);
+CREATE INDEX IF NOT EXISTS result_tech_tech ON result_tech (tech);
+"""
+
+class ResultIndex:
+    """
+    Embedded SQLite store of scan results keyed on (domain, scan_date) with
+    secondary indexes on risk score, open ports, TLS expiry and technologies
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.local = threading.local()
+        
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+    
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            # Worker hosts may share this file over NFS, where WAL's shared
+            # memory index does not work; a rollback journal only needs locks
+            connection.execute('PRAGMA journal_mode=DELETE')
+            self.local.connection = connection
+        return connection
+    
+    def add(self, result, job_id=None):
+        """
+        Insert or replace a domain's result
+        """
+        domain = result['domain']
+        scan_date = result['scan_date']
+        ports = self._open_ports(result)
+        technologies = self._technologies(result)
+        
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                """
+                INSERT OR REPLACE INTO results (domain, scan_date, job_id, risk_score, tls_expiry, record)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (domain, scan_date, job_id, result.get('risk_score'), self._tls_expiry(result), json.dumps(result))
+            )
+            connection.execute('DELETE FROM result_ports WHERE domain = ? AND scan_date = ?', (domain, scan_date))
+            connection.executemany(
+                'INSERT OR IGNORE INTO result_ports (domain, scan_date, port) VALUES (?, ?, ?)',
+                [(domain, scan_date, port) for port in ports]
+            )
+            connection.execute('DELETE FROM result_tech WHERE domain = ? AND scan_date = ?', (domain, scan_date))
+            connection.executemany(
+                'INSERT OR IGNORE INTO result_tech (domain, scan_date, tech) VALUES (?, ?, ?)',
+                [(domain, scan_date, tech) for tech in technologies]
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+    
+    def _open_ports(self, result):
+        ports = set()
+        for port_info in result.get('open_ports') or []:
+            if isinstance(port_info, dict) and port_info.get('state') == 'open':
+                try:
+                    ports.add(int(port_info['port']))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return ports
+    
+    def _technologies(self, result):
+        tech_stack = result.get('tech_stack')
+        if not isinstance(tech_stack, list):
+            return set()
+        return {tech for tech in tech_stack if isinstance(tech, str)}
+    
+    def _tls_expiry(self, result):
+        ssl_info = result.get('ssl_info')
+        if not isinstance(ssl_info, dict):
+            return None
+        certificate = ssl_info.get('certificate')
+        if not isinstance(certificate, dict):
+            return None
+        return certificate.get('valid_until')
+    
+    def latest(self, domain):
+        """
+        Return the most recent result stored for a domain, or None
+        """
+        row = self._connection().execute(
+            'SELECT record FROM results WHERE domain = ? ORDER BY scan_date DESC LIMIT 1',
+            (domain,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def query(self, job_id=None, domain=None, risk_score_lt=None, risk_score_gte=None, ports=(), technologies=(),
+              tls_expires_before=None, tls_expires_after=None, latest=True, cursor=None, limit=100):
+        """
+        Return (results, next_cursor) for the given filters. Results are
+        ordered by (domain, scan_date); pass next_cursor back to continue.
+        """
+        clauses = []
+        params = []
+        
+        if job_id is not None:
+            clauses.append('r.job_id = ?')
+            params.append(job_id)
+        if domain is not None:
+            clauses.append('r.domain = ?')
+            params.append(domain)
+        if risk_score_lt is not None:
+            clauses.append('r.risk_score < ?')
+            params.append(risk_score_lt)
+        if risk_score_gte is not None:
+            clauses.append('r.risk_score >= ?')
+            params.append(risk_score_gte)
+        if tls_expires_before is not None:
+            clauses.append('r.tls_expiry < ?')
+            params.append(tls_expires_before)
+        if tls_expires_after is not None:
+            clauses.append('r.tls_expiry >= ?')
+            params.append(tls_expires_after)
+        # Uncorrelated subqueries are evaluated once from the port and tech
+        # indexes, rather than probed again for every candidate row
+        for port in ports:
+            clauses.append('(r.domain, r.scan_date) IN (SELECT domain, scan_date FROM result_ports WHERE port = ?)')
+            params.append(port)
+        for tech in technologies:
+            clauses.append('(r.domain, r.scan_date) IN (SELECT domain, scan_date FROM result_tech WHERE tech = ?)')
+            params.append(tech)
+        if latest:
+            clauses.append('r.scan_date = (SELECT MAX(l.scan_date) FROM results l WHERE l.domain = r.domain)')
+        if cursor is not None:
+            clauses.append('(r.domain, r.scan_date) > (?, ?)')
+            params.extend(cursor)
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connection().execute(
+            f'SELECT r.domain, r.scan_date, r.record FROM results r {where} ORDER BY r.domain, r.scan_date LIMIT ?',
+            params + [limit + 1]
+        ).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][0], rows[-1][1])
+        
+        return [json.loads(record) for _, _, record in rows], next_cursor
\ No newline at end of file
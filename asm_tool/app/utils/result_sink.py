@@ -0,0 +1,195 @@
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; appends are then only serialized in-process
+    fcntl = None
+
+class ResultSink:
+    """
+    Append-only store of per-domain results, one JSON record per line.
+    The scan_results.json document is produced from it on demand.
+    """
+    def __init__(self, output_dir, name='scan_results', fsync=True):
+        self.records_file = os.path.join(output_dir, f'{name}.jsonl')
+        self.results_file = os.path.join(output_dir, f'{name}.json')
+        self.fsync = fsync
+        self.lock = threading.Lock()
+        self.fd = None
+        self.checked = False
+    
+    def reset(self):
+        """
+        Discard records from a previous scan
+        """
+        with self.lock:
+            self._close()
+            for path in (self.records_file, self.results_file):
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def append(self, result):
+        """
+        Append a single result record with one write, so a crash can at
+        worst leave a truncated last line that readers skip. An exclusive
+        file lock serializes writers in other worker processes and hosts.
+        """
+        data = (json.dumps(result) + '\n').encode('utf-8')
+        with self.lock:
+            if self.fd is None:
+                self.fd = os.open(self.records_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            
+            if fcntl is not None:
+                # POSIX record locks, unlike flock(), are honoured over NFS
+                fcntl.lockf(self.fd, fcntl.LOCK_EX)
+            try:
+                if not self.checked:
+                    self._truncate_partial_record()
+                    self.checked = True
+                
+                view = memoryview(data)
+                while view:
+                    written = os.write(self.fd, view)
+                    view = view[written:]
+                if self.fsync:
+                    os.fsync(self.fd)
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self.fd, fcntl.LOCK_UN)
+    
+    def _truncate_partial_record(self):
+        """
+        Drop a trailing record left incomplete by a crash before appending after it
+        """
+        if not os.path.exists(self.records_file):
+            return
+        
+        with open(self.records_file, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 4096)
+                f.seek(start)
+                chunk = f.read(position - start)
+                newline = chunk.rfind(b'\n')
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            
+            if position != end:
+                f.truncate(position)
+    
+    def close(self):
+        with self.lock:
+            self._close()
+    
+    def _close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.checked = False
+    
+    def read(self, start=0):
+        """
+        Yield (offset, record) for every complete record in the file,
+        beginning at byte offset start (a previously returned cursor)
+        """
+        for offset, _, record in self._records(start):
+            yield offset, record
+    
+    def page(self, cursor=0, limit=100):
+        """
+        Return up to limit records starting at cursor, the cursor to continue
+        from and whether more records are already available after this page
+        """
+        records = []
+        for offset, end, record in self._records(cursor):
+            if len(records) == limit:
+                return records, offset, True
+            records.append(record)
+            cursor = end
+        return records, cursor, False
+    
+    def _records(self, start):
+        if not os.path.exists(self.records_file):
+            return
+        
+        with open(self.records_file, 'rb') as f:
+            if start:
+                # Cursors must point at the beginning of a record
+                f.seek(start - 1)
+                if f.read(1) != b'\n':
+                    raise ValueError(f'Invalid cursor {start}')
+            
+            offset = start
+            for line in f:
+                begin = offset
+                offset += len(line)
+                if not line.endswith(b'\n'):
+                    # Partially written record from an interrupted scan
+                    break
+                try:
+                    yield begin, offset, json.loads(line)
+                except ValueError:
+                    continue
+    
+    def is_stale(self):
+        """
+        Check whether the compacted document is missing or older than the records
+        """
+        if not os.path.exists(self.records_file):
+            return False
+        if not os.path.exists(self.results_file):
+            return True
+        return os.stat(self.records_file).st_mtime_ns >= os.stat(self.results_file).st_mtime_ns
+    
+    def document(self):
+        """
+        Yield the scan_results.json document (domain -> latest result) in
+        chunks, built from the records as they are now. Only record offsets
+        are held in memory, records are streamed from disk. A scan without
+        records (e.g. an input with no domains) gets an empty document.
+        """
+        latest = {}
+        for offset, record in self.read():
+            latest[record.get('domain')] = offset
+        
+        yield '{'
+        if latest:
+            with open(self.records_file, 'rb') as records:
+                for index, (domain, offset) in enumerate(latest.items()):
+                    records.seek(offset)
+                    record = json.loads(records.readline())
+                    body = json.dumps(record, indent=2).replace('\n', '\n  ')
+                    yield (',' if index else '') + f'\n  {json.dumps(domain)}: {body}'
+        yield '\n}' if latest else '}'
+    
+    def compact(self):
+        """
+        Write the scan_results.json document atomically
+        """
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(self.results_file), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                for chunk in self.document():
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            
+            os.chmod(tmp_file, 0o644)
+            os.replace(tmp_file, self.results_file)
+        except BaseException:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
+        return self.results_file
+    
+    def compact_if_stale(self):
+        if self.is_stale():
+            self.compact()
+        return self.results_file
\ No newline at end of file
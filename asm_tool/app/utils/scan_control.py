@@ -0,0 +1,68 @@
+import threading
+import weakref
+from app.utils.deadline import Deadline
+
+class ScanInterrupted(Exception):
+    """
+    Raised when a domain's scan is abandoned because the job was paused or cancelled
+    """
+    def __init__(self, state):
+        super().__init__(f'Scan {state}')
+        self.state = state
+
+class ScanControl:
+    """
+    Pause and cancel switch for one scan job. Every domain scanned under the
+    job takes its deadline from here, so stopping the job cancels those
+    deadlines: probes fail fast and child processes are killed.
+    """
+    STATES = ('running', 'paused', 'cancelled')
+    
+    def __init__(self):
+        self.state = 'running'
+        self.lock = threading.Lock()
+        self.deadlines = weakref.WeakSet()
+    
+    @property
+    def stopped(self):
+        return self.state != 'running'
+    
+    def deadline(self, seconds=None):
+        """
+        Create a domain deadline that is cancelled when the job stops
+        """
+        deadline = Deadline(seconds)
+        with self.lock:
+            self.deadlines.add(deadline)
+            stopped = self.stopped
+        if stopped:
+            deadline.cancel()
+        return deadline
+    
+    def pause(self):
+        return self._stop('paused')
+    
+    def cancel(self):
+        return self._stop('cancelled')
+    
+    def _stop(self, state):
+        """
+        Move to a stopped state and cancel every running domain. A cancel
+        overrides a pause but not the other way round.
+        """
+        with self.lock:
+            if self.state == 'cancelled' or self.state == state:
+                return self.state
+            self.state = state
+            deadlines = list(self.deadlines)
+        
+        for deadline in deadlines:
+            deadline.cancel()
+        return state
+    
+    def check(self):
+        """
+        Raise ScanInterrupted if the job has been stopped
+        """
+        if self.stopped:
+            raise ScanInterrupted(self.state)
\ No newline at end of file
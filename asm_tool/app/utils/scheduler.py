@@ -0,0 +1,78 @@
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import Future
+
+class FairScheduler:
+    """
+    Shared pool of scan workers. Tasks are queued per job and workers take
+    them round-robin across jobs, so a large batch cannot starve small ones.
+    """
+    def __init__(self, max_workers=8):
+        self.max_workers = max(1, int(max_workers))
+        self.queues = OrderedDict()
+        self.running = {}
+        self.condition = threading.Condition()
+        self.workers = []
+    
+    def submit(self, job_id, fn, *args, **kwargs):
+        """
+        Queue fn for the given job and return a Future for its result
+        """
+        future = Future()
+        with self.condition:
+            self.queues.setdefault(job_id, deque()).append((future, fn, args, kwargs))
+            self._start_workers()
+            self.condition.notify()
+        return future
+    
+    def stats(self):
+        """
+        Return queued and running task counts per job
+        """
+        with self.condition:
+            jobs = set(self.queues) | set(self.running)
+            return {
+                job_id: {
+                    'queued': len(self.queues.get(job_id, ())),
+                    'running': self.running.get(job_id, 0)
+                }
+                for job_id in jobs
+            }
+    
+    def _start_workers(self):
+        while len(self.workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f'scan-worker-{len(self.workers)}', daemon=True)
+            self.workers.append(worker)
+            worker.start()
+    
+    def _next_task(self):
+        """
+        Take one task from the job at the head of the rotation and move that
+        job to the back. Must be called with the condition held.
+        """
+        job_id, queue = next(iter(self.queues.items()))
+        task = queue.popleft()
+        del self.queues[job_id]
+        if queue:
+            self.queues[job_id] = queue
+        return job_id, task
+    
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.queues:
+                    self.condition.wait()
+                job_id, (future, fn, args, kwargs) = self._next_task()
+                self.running[job_id] = self.running.get(job_id, 0) + 1
+            
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self.condition:
+                    self.running[job_id] -= 1
+                    if not self.running[job_id]:
+                        del self.running[job_id]
\ No newline at end of file
@@ -0,0 +1,115 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class StageGraph:
+    """
+    Run scan stages concurrently, respecting their declared dependencies
+    """
+    def __init__(self, stage_context=None):
+        # Optional factory of a context manager wrapped around each stage
+        # in its worker thread, e.g. to profile it
+        self.stage_context = stage_context
+        self.stages = {}
+        self.outputs = {}
+        self.errors = {}
+        self.skipped = []
+        self.timed_out = []
+        self.timings = {}
+        # Completes when the graph is cancelled, waking up run()
+        self.stopped = Future()
+        self.lock = threading.Lock()
+    
+    def add(self, name, func, requires=()):
+        """
+        Register a stage. func receives the outputs of completed stages.
+        """
+        for dependency in requires:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' requires unknown stage '{dependency}'")
+        self.stages[name] = {'func': func, 'requires': tuple(requires)}
+        return self
+    
+    def run(self, timeout=None):
+        """
+        Execute all stages and return their outputs keyed by stage name.
+        Stages still running after timeout seconds are abandoned and listed
+        in timed_out; stages depending on them are skipped. After cancel(),
+        running stages are abandoned and the rest skipped.
+        """
+        remaining = dict(self.stages)
+        if not remaining:
+            return self.outputs
+        
+        expires = time.monotonic() + timeout if timeout is not None else None
+        executor = ThreadPoolExecutor(max_workers=len(remaining))
+        running = {}
+        try:
+            while remaining or running:
+                for name in list(remaining):
+                    requires = remaining[name]['requires']
+                    if any(dep in self.errors or dep in self.skipped or dep in self.timed_out for dep in requires):
+                        self.skipped.append(name)
+                        del remaining[name]
+                    elif all(dep in self.outputs for dep in requires):
+                        stage = remaining.pop(name)
+                        future = executor.submit(self._run_stage, name, stage['func'], dict(self.outputs))
+                        running[future] = name
+                
+                if not running:
+                    break
+                
+                wait_for = None if expires is None else max(0, expires - time.monotonic())
+                done, _ = wait([*running, self.stopped], timeout=wait_for, return_when=FIRST_COMPLETED)
+                if self.stopped.done():
+                    self.skipped.extend(running.values())
+                    self.skipped.extend(remaining)
+                    running = {}
+                    break
+                if not done:
+                    # Out of time: leave the stuck stages behind
+                    self.timed_out.extend(running.values())
+                    self.skipped.extend(remaining)
+                    running = {}
+                    break
+                
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        self.outputs[name] = future.result()
+                    except Exception as e:
+                        self.errors[name] = e
+        finally:
+            executor.shutdown(wait=not (self.timed_out or self.stopped.done()), cancel_futures=True)
+        
+        return self.outputs
+    
+    def cancel(self):
+        """
+        Stop waiting for stages, e.g. because the scan was paused or cancelled
+        """
+        with self.lock:
+            if not self.stopped.done():
+                self.stopped.set_result(None)
+    
+    def _run_stage(self, name, func, outputs):
+        """
+        Run a single stage and record how long it took
+        """
+        started = time.monotonic()
+        try:
+            if self.stage_context is None:
+                return func(outputs)
+            with self.stage_context(name):
+                return func(outputs)
+        finally:
+            self.timings[name] = time.monotonic() - started
+    
+    def first_error(self):
+        """
+        Return the first error in stage registration order, if any
+        """
+        for name in self.stages:
+            if name in self.errors:
+                return self.errors[name]
+        return None
\ No newline at end of file
@@ -0,0 +1,101 @@
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+class StatusPublisher:
+    """
+    Coalesce status updates and publish them from a background thread at no
+    more than one write/emit per min_interval. Only the latest state is kept.
+    """
+    def __init__(self, status_file, emit=None, min_interval=0.5):
+        self.status_file = status_file
+        self.emit = emit
+        self.min_interval = min_interval
+        self.condition = threading.Condition()
+        self.latest = None
+        self.dirty = False
+        self.closed = False
+        self.last_published = 0
+        self.thread = None
+    
+    def publish(self, status):
+        """
+        Record the latest status; never waits on disk or websocket I/O
+        """
+        snapshot = copy.deepcopy(status)
+        with self.condition:
+            self.latest = snapshot
+            self.dirty = True
+            if self.thread is None and not self.closed:
+                self.thread = threading.Thread(target=self._run, name='status-publisher', daemon=True)
+                self.thread.start()
+            self.condition.notify()
+    
+    def close(self):
+        """
+        Stop the background thread and write the final status
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+    
+    def flush(self):
+        """
+        Publish the pending status immediately, if there is one
+        """
+        with self.condition:
+            if not self.dirty:
+                return
+            status = self.latest
+            self.dirty = False
+        self._publish(status)
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.dirty and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                
+                # Let further updates coalesce until the interval has passed
+                delay = self.last_published + self.min_interval - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                
+                status = self.latest
+                self.dirty = False
+            
+            self._publish(status)
+    
+    def _publish(self, status):
+        self.last_published = time.monotonic()
+        try:
+            self._write(status)
+            if self.emit is not None:
+                self.emit(status)
+        except Exception as e:
+            print(f"Error publishing status: {str(e)}")
+    
+    def _write(self, status):
+        """
+        Write the status file atomically so readers never see a partial document
+        """
+        directory = os.path.dirname(self.status_file)
+        fd, tmp_file = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(status, f)
+            os.chmod(tmp_file, 0o644)
+            os.replace(tmp_file, self.status_file)
+        except Exception:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
\ No newline at end of file
@@ -0,0 +1,194 @@
+import secrets
+import threading
+from concurrent.futures import Future
+import dns.resolver
+import requests
+from app.utils.deadline import Deadline
+from app.utils.domain_names import in_scope
+from app.utils.rate_limit import limiter
+
+def lookup(resolver, name, lifetime=None):
+    """
+    Resolve name to its A records, or AAAA records if it has no A record.
+    Returns (addresses, target) where target is the CNAME the answer was
+    reached through, if any. Raises dnspython's NXDOMAIN or NoAnswer.
+    """
+    for record_type in ('A', 'AAAA'):
+        try:
+            answer = resolver.resolve(name, record_type, lifetime=lifetime)
+        except dns.resolver.NoAnswer:
+            if record_type == 'AAAA':
+                raise
+            continue
+        return _addresses(answer, name)
+
+async def lookup_async(resolver, name, lifetime=None):
+    """
+    lookup with a dns.asyncresolver resolver
+    """
+    for record_type in ('A', 'AAAA'):
+        try:
+            answer = await resolver.resolve(name, record_type, lifetime=lifetime)
+        except dns.resolver.NoAnswer:
+            if record_type == 'AAAA':
+                raise
+            continue
+        return _addresses(answer, name)
+
+def _addresses(answer, name):
+    target = answer.canonical_name.to_text().rstrip('.').lower()
+    return {rdata.address for rdata in answer}, target if target != name else None
+
+def page_fingerprint(status, headers, host):
+    """
+    Identify a landing page by status, content type, length and redirect
+    target, with the host name abstracted. Returns None when the response
+    has neither a length nor a redirect, as that cannot tell pages apart.
+    """
+    length = headers.get('Content-Length')
+    location = headers.get('Location', '').replace(host, '{host}')
+    if not length and not location:
+        return None
+    return status, headers.get('Content-Type', ''), length, location
+
+def random_name(zone):
+    return f'{secrets.token_hex(8)}.{zone}'
+
+class WildcardZones:
+    """
+    Wildcard fingerprints per zone and the checks against them, shared by
+    the threaded and async detectors. self.zones maps each zone to a future
+    of its fingerprint (None if the zone has no wildcard).
+    """
+    # Random names resolved per zone; wildcards behind load balancers
+    # rotate addresses, so the fingerprint collects all of them
+    PROBES = 2
+    
+    def __init__(self, apex, deadline=None, timeout=3, page_timeout=5):
+        self.apex = apex
+        self.deadline = deadline or Deadline()
+        self.timeout = timeout
+        self.page_timeout = page_timeout
+        self.zones = {}
+        self.lock = threading.Lock()
+    
+    def zone_of(self, name):
+        """
+        Return the zone a wildcard answering for name would belong to
+        """
+        zone = name.partition('.')[2]
+        return zone if name != self.apex and in_scope(zone, self.apex) else None
+    
+    @staticmethod
+    def answer_matches(fingerprint, addresses, target):
+        """
+        Check whether an answer is the one random names in the zone get.
+        Real hosts behind the same CDN or load balancer as the wildcard
+        resolve the same way, so a match only means the landing page must
+        be compared with matches_page.
+        """
+        if fingerprint is None:
+            return False
+        return (bool(addresses) and addresses <= fingerprint['addresses']) or target in fingerprint['targets']
+    
+    def matches_page(self, name, scheme, status, headers):
+        """
+        Check whether a HEAD response for name is the page the zone's
+        wildcard serves. Only zones already fingerprinted are considered.
+        """
+        fingerprint = self._settled(self.zone_of(name))
+        if fingerprint is None:
+            return False
+        expected = fingerprint['pages'].get(scheme)
+        return expected is not None and expected == page_fingerprint(status, headers, name)
+    
+    def wildcard_zones(self):
+        """
+        Return the zones found to have wildcard DNS
+        """
+        with self.lock:
+            zones = list(self.zones)
+        return sorted(zone for zone in zones if self._settled(zone) is not None)
+    
+    def _settled(self, zone):
+        """
+        Return the fingerprint of a zone whose detection has finished
+        """
+        with self.lock:
+            future = self.zones.get(zone)
+        if future is None or not future.done() or future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+class WildcardDetector(WildcardZones):
+    """
+    Detect wildcard DNS per zone by resolving random labels under it, and
+    recognise names whose answers or landing pages match the wildcard's.
+    Each zone below the apex is probed once, the first time a name in it
+    is checked.
+    """
+    def __init__(self, apex, resolver, deadline=None, timeout=3, page_timeout=5):
+        super().__init__(apex, deadline, timeout, page_timeout)
+        self.resolver = resolver
+    
+    def fingerprint(self, zone):
+        """
+        Return the wildcard fingerprint of a zone, or None if it has no wildcard
+        """
+        with self.lock:
+            future = self.zones.get(zone)
+            detect = future is None
+            if detect:
+                future = self.zones[zone] = Future()
+        
+        if detect:
+            fingerprint = None
+            try:
+                fingerprint = self._detect(zone)
+            finally:
+                future.set_result(fingerprint)
+        return future.result()
+    
+    def _detect(self, zone):
+        addresses = set()
+        targets = set()
+        for _ in range(self.PROBES):
+            try:
+                found, target = lookup(self.resolver, random_name(zone), self.deadline.timeout(self.timeout, 'wildcard_dns'))
+            except Exception:
+                # NXDOMAIN (no wildcard), or no reliable answer
+                return None
+            addresses |= found
+            if target:
+                targets.add(target)
+        
+        return {'addresses': addresses, 'targets': targets, 'pages': self._page_fingerprints(zone)}
+    
+    def _page_fingerprints(self, zone):
+        """
+        Fingerprint the landing page a random name in the zone serves, per scheme
+        """
+        host = random_name(zone)
+        pages = {}
+        for scheme in ('https', 'http'):
+            try:
+                limiter.acquire(host, 'subdomain_validation', deadline=self.deadline)
+                response = requests.head(
+                    f'{scheme}://{host}/',
+                    timeout=self.deadline.timeout(self.page_timeout, 'wildcard_dns'),
+                    verify=False,
+                    allow_redirects=False
+                )
+            except Exception:
+                continue
+            fingerprint = page_fingerprint(response.status_code, response.headers, host)
+            if fingerprint is not None:
+                pages[scheme] = fingerprint
+        return pages
+    
+    def matches_answer(self, name, addresses, target):
+        """
+        Check whether a name resolves the way random names in its zone do
+        """
+        zone = self.zone_of(name)
+        return self.answer_matches(self.fingerprint(zone) if zone else None, addresses, target)
\ No newline at end of file
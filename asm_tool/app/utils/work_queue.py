@@ -0,0 +1,319 @@
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    job_dir TEXT NOT NULL,
+    input_done INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'active',
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    UNIQUE (job_id, domain)
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, lease_expires);
+CREATE INDEX IF NOT EXISTS tasks_job_state ON tasks (job_id, state);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+class WorkQueue:
+    """
+    Durable SQLite-backed queue of (job, domain) scan tasks. Workers in any
+    number of processes, on any host sharing the file, lease tasks, keep the
+    lease alive with heartbeats and mark them done; expired leases are retried.
+    """
+    def __init__(self, db_path, max_attempts=3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.local = threading.local()
+        
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        
+        # Queues created before jobs could be paused have no state column
+        columns = {row[1] for row in connection.execute('PRAGMA table_info(jobs)')}
+        if 'state' not in columns:
+            connection.execute("ALTER TABLE jobs ADD COLUMN state TEXT NOT NULL DEFAULT 'active'")
+        # ... nor recorded why a task failed
+        columns = {row[1] for row in connection.execute('PRAGMA table_info(tasks)')}
+        if 'error' not in columns:
+            connection.execute('ALTER TABLE tasks ADD COLUMN error TEXT')
+    
+    def _connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            # Worker hosts may share this file over NFS, where WAL's shared
+            # memory index does not work; a rollback journal only needs locks
+            connection.execute('PRAGMA journal_mode=DELETE')
+            self.local.connection = connection
+        return connection
+    
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        return connection
+    
+    def add_job(self, job_id, job_dir):
+        self._connection().execute(
+            'INSERT OR IGNORE INTO jobs (job_id, job_dir, created) VALUES (?, ?, ?)',
+            (job_id, os.path.abspath(job_dir), time.time())
+        )
+    
+    def enqueue(self, job_id, domains, batch_size=1000):
+        """
+        Add domains to a job, ignoring ones already queued. Domains are read
+        lazily and inserted in batches.
+        """
+        batch = []
+        for domain in domains:
+            batch.append((job_id, domain))
+            if len(batch) >= batch_size:
+                self._insert(batch)
+                batch = []
+        if batch:
+            self._insert(batch)
+    
+    def _insert(self, batch):
+        connection = self._transaction()
+        try:
+            connection.executemany('INSERT OR IGNORE INTO tasks (job_id, domain) VALUES (?, ?)', batch)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+    
+    def finish_enqueue(self, job_id):
+        """
+        Mark that every domain of the job has been queued
+        """
+        self._connection().execute('UPDATE jobs SET input_done = 1 WHERE job_id = ?', (job_id,))
+    
+    def set_job_state(self, job_id, state, current=('active', 'paused')):
+        """
+        Pause ('paused'), cancel ('cancelled') or resume ('active') a job if
+        it is in one of the current states. Tasks of jobs that are not active
+        are not leased. Returns whether the state changed.
+        """
+        placeholders = ','.join('?' * len(current))
+        cursor = self._connection().execute(
+            f'UPDATE jobs SET state = ? WHERE job_id = ? AND state IN ({placeholders})',
+            (state, job_id, *current)
+        )
+        return cursor.rowcount > 0
+    
+    def job_states(self, job_ids):
+        """
+        Return the state of each of the given jobs
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return {}
+        placeholders = ','.join('?' * len(job_ids))
+        return dict(self._connection().execute(
+            f'SELECT job_id, state FROM jobs WHERE job_id IN ({placeholders})', job_ids
+        ).fetchall())
+    
+    def lease(self, worker_id, lease_seconds=120, limit=1):
+        """
+        Lease up to limit tasks that are pending or whose lease has expired.
+        Returns a list of dicts with task_id, job_id, domain, job_dir and
+        attempts (including this one).
+        """
+        now = time.time()
+        connection = self._transaction()
+        try:
+            rows = connection.execute(
+                """
+                SELECT tasks.id, tasks.job_id, tasks.domain, jobs.job_dir, tasks.attempts + 1
+                FROM tasks JOIN jobs ON jobs.job_id = tasks.job_id
+                WHERE (tasks.state = 'pending' OR (tasks.state = 'leased' AND tasks.lease_expires < ?))
+                  AND tasks.attempts < ? AND jobs.state = 'active'
+                ORDER BY tasks.id
+                LIMIT ?
+                """,
+                (now, self.max_attempts, limit)
+            ).fetchall()
+            
+            connection.executemany(
+                """
+                UPDATE tasks SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE id = ?
+                """,
+                [(worker_id, now + lease_seconds, row[0]) for row in rows]
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        
+        return [
+            {'task_id': task_id, 'job_id': job_id, 'domain': domain, 'job_dir': job_dir, 'attempts': attempts}
+            for task_id, job_id, domain, job_dir, attempts in rows
+        ]
+    
+    def heartbeat(self, worker_id, task_ids, lease_seconds=120):
+        """
+        Extend the leases this worker holds on the given tasks
+        """
+        if not task_ids:
+            return
+        self._connection().executemany(
+            "UPDATE tasks SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+            [(time.time() + lease_seconds, task_id, worker_id) for task_id in task_ids]
+        )
+    
+    def complete(self, worker_id, task_id, stage_timings=None):
+        """
+        Mark a task done and add its per-stage scan time to the job's totals
+        """
+        connection = self._transaction()
+        try:
+            cursor = connection.execute(
+                "UPDATE tasks SET state = 'done', lease_expires = NULL WHERE id = ? AND worker = ? AND state = 'leased'",
+                (task_id, worker_id)
+            )
+            if cursor.rowcount and stage_timings:
+                connection.executemany(
+                    """
+                    INSERT INTO stage_timings (job_id, stage, seconds)
+                    SELECT job_id, ?, ? FROM tasks WHERE id = ?
+                    ON CONFLICT (job_id, stage) DO UPDATE SET seconds = seconds + excluded.seconds
+                    """,
+                    [(stage, seconds, task_id) for stage, seconds in stage_timings.items()]
+                )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+    
+    def fail(self, worker_id, task_id, error):
+        """
+        Give up on a leased task, e.g. after its last attempt raised. Returns
+        whether this worker still held the lease.
+        """
+        cursor = self._connection().execute(
+            """
+            UPDATE tasks SET state = 'failed', error = ?, lease_expires = NULL
+            WHERE id = ? AND worker = ? AND state = 'leased'
+            """,
+            (error, task_id, worker_id)
+        )
+        return cursor.rowcount > 0
+    
+    def reap_failed(self, limit=100):
+        """
+        Mark tasks whose last attempt's lease expired (the worker died) as
+        failed and return them, so the caller can record the failure. Each
+        task is returned to exactly one caller.
+        """
+        now = time.time()
+        connection = self._transaction()
+        try:
+            rows = connection.execute(
+                """
+                SELECT tasks.id, tasks.job_id, tasks.domain, jobs.job_dir, tasks.attempts
+                FROM tasks JOIN jobs ON jobs.job_id = tasks.job_id
+                WHERE tasks.state = 'leased' AND tasks.lease_expires < ? AND tasks.attempts >= ?
+                ORDER BY tasks.id
+                LIMIT ?
+                """,
+                (now, self.max_attempts, limit)
+            ).fetchall()
+            
+            tasks = []
+            for task_id, job_id, domain, job_dir, attempts in rows:
+                error = f'Worker lost after {attempts} attempts'
+                connection.execute(
+                    "UPDATE tasks SET state = 'failed', error = ?, lease_expires = NULL WHERE id = ?",
+                    (error, task_id)
+                )
+                tasks.append({'task_id': task_id, 'job_id': job_id, 'domain': domain, 'job_dir': job_dir, 'error': error})
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return tasks
+    
+    def release(self, worker_id, task_id):
+        """
+        Return a leased task to the queue without counting the attempt
+        """
+        self._connection().execute(
+            """
+            UPDATE tasks SET state = 'pending', worker = NULL, lease_expires = NULL, attempts = attempts - 1
+            WHERE id = ? AND worker = ? AND state = 'leased'
+            """,
+            (task_id, worker_id)
+        )
+    
+    def job_status(self, job_id):
+        """
+        Aggregate a job's progress across all workers
+        """
+        connection = self._connection()
+        job = connection.execute('SELECT input_done, state FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if job is None:
+            return None
+        
+        now = time.time()
+        counts = dict(connection.execute(
+            'SELECT state, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY state', (job_id,)
+        ).fetchall())
+        in_progress = connection.execute(
+            """
+            SELECT domain, worker FROM tasks
+            WHERE job_id = ? AND state = 'leased' AND lease_expires >= ?
+            ORDER BY id LIMIT 100
+            """,
+            (job_id, now)
+        ).fetchall()
+        # Tasks out of attempts count as failed before a worker reaps them
+        failed = counts.get('failed', 0) + connection.execute(
+            "SELECT COUNT(*) FROM tasks WHERE job_id = ? AND state = 'leased' AND attempts >= ? AND lease_expires < ?",
+            (job_id, self.max_attempts, now)
+        ).fetchone()[0]
+        stage_seconds = {
+            stage: round(seconds, 3) for stage, seconds in connection.execute(
+                'SELECT stage, seconds FROM stage_timings WHERE job_id = ?', (job_id,)
+            )
+        }
+        
+        total = sum(counts.values())
+        completed = counts.get('done', 0)
+        finished = bool(job[0]) and completed + failed >= total
+        if finished:
+            status = 'completed'
+        else:
+            status = {'active': 'scanning'}.get(job[1], job[1])
+        
+        return {
+            'job_id': job_id,
+            'total': total if job[0] else None,
+            'completed': completed,
+            'failed': failed,
+            'current_domain': in_progress[-1][0] if in_progress else '',
+            'in_progress': [domain for domain, _ in in_progress],
+            'workers': len({worker for _, worker in in_progress}),
+            'stage_seconds': stage_seconds,
+            'slowest_stage': max(stage_seconds, key=stage_seconds.get) if stage_seconds else None,
+            'status': status
+        }
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Import-time benchmark for the web app.
+
+Imports the app package in fresh interpreters, reports the median import
+time and the slowest modules (from -X importtime), and exits non-zero when
+a heavy scanner dependency is imported eagerly or the time budget is exceeded.
+Only imports made by this package count: modules the web framework loads
+on its own (python-engineio's client pulls in requests and aiohttp) are
+measured separately and reported, not failed on.
+
+Usage (from the asm_tool directory):
+    python benchmarks/import_time.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ASM_TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the app is built on; whatever they import is not the app's doing
+FRAMEWORK = 'flask, flask_socketio'
+
+# Modules that must only be loaded when the scan stage that needs them runs
+HEAVY_MODULES = [
+    'pandas',
+    'numpy',
+    'nmap',
+    'OpenSSL',
+    'bs4',
+    'whois',
+    'openai',
+    'aiohttp',
+    'dns.resolver',
+    'requests'
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+def measure(target):
+    """
+    Import target in a fresh interpreter and return (seconds, loaded modules)
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(target=target)],
+        cwd=ASM_TOOL_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    data = json.loads(output.stdout.strip().splitlines()[-1])
+    return data['seconds'], set(data['modules'])
+
+def slowest_imports(target, limit):
+    """
+    Return the modules with the highest cumulative import time
+    """
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=ASM_TOOL_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    
+    timings = []
+    for line in output.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        timings.append((int(cumulative), name.strip()))
+    
+    return sorted(timings, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the import time of the ASM web app')
+    parser.add_argument('--target', default='app', help='module to import (default: app)')
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh interpreters to time')
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail if the median import time exceeds this')
+    parser.add_argument('--top', type=int, default=10, help='number of slowest imports to list')
+    parser.add_argument('--framework', default=FRAMEWORK,
+                        help='comma-separated modules whose own imports are not counted as eager')
+    args = parser.parse_args()
+    
+    samples = []
+    loaded = set()
+    for _ in range(args.runs):
+        seconds, modules = measure(args.target)
+        samples.append(seconds * 1000)
+        loaded |= modules
+    
+    _, framework = measure(args.framework) if args.framework else (0, set())
+    eager = [module for module in HEAVY_MODULES if module in loaded and module not in framework]
+    from_framework = [module for module in HEAVY_MODULES if module in loaded and module in framework]
+    median_ms = statistics.median(samples)
+    
+    report = {
+        'target': args.target,
+        'runs': args.runs,
+        'median_ms': round(median_ms, 1),
+        'min_ms': round(min(samples), 1),
+        'max_ms': round(max(samples), 1),
+        'eager_heavy_modules': eager,
+        'framework_heavy_modules': from_framework,
+        'slowest_imports_us': slowest_imports(args.target, args.top)
+    }
+    print(json.dumps(report, indent=2))
+    
+    failed = False
+    if eager:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(eager)}", file=sys.stderr)
+        failed = True
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        print(f"FAIL: median import time {median_ms:.1f}ms exceeds budget of {args.budget_ms:.1f}ms", file=sys.stderr)
+        failed = True
+    
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,476 @@
+"""
+End-to-end scan throughput benchmark that never leaves the machine.
+
+Starts loopback stand-ins for N synthetic domains: an HTTP and an HTTPS
+server (self-signed certificate) with per-domain headers and HTML, a stub
+DNS server, a certificate transparency endpoint, stub amass/subfinder
+executables and open TCP ports. Name resolution inside the process is
+pointed at them, so ASMScanner runs unchanged. Reports domains/sec,
+p50/p99 latency per stage and peak RSS as JSON keyed by commit.
+
+Usage (from the asm_tool directory):
+    python benchmarks/scan_throughput.py --domains 50 --concurrency 8
+    python benchmarks/scan_throughput.py --domains 200 --output benchmarks/results.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import socket
+import socketserver
+import ssl
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+ASM_TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOOPBACK = '127.0.0.1'
+
+# Landing page variants so header and technology analysis see different inputs
+HEADER_PROFILES = [
+    {
+        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+        'Content-Security-Policy': "default-src 'self'",
+        'X-Frame-Options': 'DENY',
+        'X-Content-Type-Options': 'nosniff',
+        'Referrer-Policy': 'no-referrer',
+        'Server': 'nginx'
+    },
+    {
+        'X-Frame-Options': 'SAMEORIGIN',
+        'Server': 'Apache/2.4.58',
+        'X-Powered-By': 'PHP/8.2.0'
+    },
+    {
+        'Server': 'Microsoft-IIS/10.0',
+        'X-Powered-By': 'ASP.NET'
+    }
+]
+
+HTML_PROFILES = [
+    '<meta name="generator" content="WordPress 6.4"><script src="/wp-includes/js/jquery/jquery.min.js"></script>',
+    '<div id="root"></div><script src="/static/js/react.production.min.js"></script>',
+    '<meta name="generator" content="Drupal 10"><link rel="stylesheet" href="/bootstrap.min.css">'
+]
+
+def domain_index(host, suffix):
+    """
+    Return i for d<i>.<suffix> (or any name below it), else None
+    """
+    host = (host or '').split(':')[0].rstrip('.').lower()
+    if not host.endswith(f'.{suffix}'):
+        return None
+    label = host[:-len(suffix) - 1].split('.')[-1]
+    if label.startswith('d') and label[1:].isdigit():
+        return int(label[1:])
+    return None
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Landing pages per synthetic domain, plus a crt.sh-style JSON endpoint
+    """
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        self._respond(include_body=True)
+    
+    def do_HEAD(self):
+        self._respond(include_body=False)
+    
+    def _respond(self, include_body):
+        config = self.server.config
+        url = urlparse(self.path)
+        
+        if url.path == '/ct':
+            domain = parse_qs(url.query).get('q', [''])[0].lstrip('%.')
+            entries = [{'name_value': f'{name}.{domain}'} for name in ('www', 'api', 'mail')]
+            entries.append({'name_value': f'*.{domain}\nstaging.{domain}'})
+            self._send(200, {'Content-Type': 'application/json'}, json.dumps(entries).encode(), include_body)
+            return
+        
+        index = domain_index(self.headers.get('Host'), config['suffix'])
+        if index is None:
+            self._send(404, {}, b'', include_body)
+            return
+        
+        headers = dict(HEADER_PROFILES[index % len(HEADER_PROFILES)])
+        headers['Content-Type'] = 'text/html; charset=utf-8'
+        html = HTML_PROFILES[index % len(HTML_PROFILES)]
+        padding = '<!-- ' + 'x' * max(0, config['html_bytes'] - len(html)) + ' -->'
+        body = f'<html><head><title>d{index}</title>{html}</head><body>{padding}</body></html>'.encode()
+        self._send(200, headers, body, include_body)
+    
+    def _send(self, status, headers, body, include_body):
+        self.server_header = headers.pop('Server', 'stub')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+    
+    def version_string(self):
+        return getattr(self, 'server_header', 'stub')
+    
+    def log_message(self, format, *args):
+        pass
+
+class StubDNSHandler(socketserver.BaseRequestHandler):
+    """
+    Authoritative answers for the synthetic zone; NXDOMAIN for anything else
+    """
+    def handle(self):
+        import dns.message
+        import dns.rcode
+        import dns.rdatatype
+        import dns.rrset
+        
+        data, sock = self.request
+        try:
+            query = dns.message.from_wire(data)
+        except Exception:
+            return
+        
+        response = dns.message.make_response(query)
+        suffix = self.server.config['suffix']
+        for question in query.question:
+            name = question.name.to_text().rstrip('.').lower()
+            record_type = dns.rdatatype.to_text(question.rdtype)
+            if not (name == suffix or name.endswith(f'.{suffix}')):
+                response.set_rcode(dns.rcode.NXDOMAIN)
+                continue
+            
+            apex = name[len('_dmarc.'):] if name.startswith('_dmarc.') else name
+            answers = {
+                'A': [LOOPBACK],
+                'MX': [f'10 mail.{apex}.'],
+                'NS': [f'ns1.{suffix}.', f'ns2.{suffix}.'],
+                'TXT': ['"v=DMARC1; p=none"'] if name.startswith('_dmarc.') else ['"v=spf1 -all"']
+            }.get(record_type, [])
+            if answers:
+                response.answer.append(dns.rrset.from_text(question.name, 300, 'IN', record_type, *answers))
+        
+        sock.sendto(response.to_wire(), self.client_address)
+
+class ThreadingUDPServer(socketserver.ThreadingMixIn, socketserver.UDPServer):
+    daemon_threads = True
+
+class StubServers:
+    """
+    Loopback HTTP, HTTPS, DNS and TCP listeners for the synthetic domains
+    """
+    def __init__(self, suffix, html_bytes, tcp_ports):
+        self.config = {'suffix': suffix, 'html_bytes': html_bytes}
+        self.tcp_ports = tcp_ports
+        self.workdir = tempfile.mkdtemp(prefix='asm-bench-')
+        self.servers = []
+        self.listeners = []
+    
+    def start(self):
+        self.http = self._serve(ThreadingHTTPServer((LOOPBACK, 0), StubHandler))
+        
+        self.https = ThreadingHTTPServer((LOOPBACK, 0), StubHandler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*self._certificate())
+        # Handshake in the request thread so slow TLS probes don't block accept()
+        self.https.socket = context.wrap_socket(self.https.socket, server_side=True, do_handshake_on_connect=False)
+        self._serve(self.https)
+        
+        self.dns = self._serve(ThreadingUDPServer((LOOPBACK, 0), StubDNSHandler))
+        
+        for port in self.tcp_ports:
+            listener = socket.create_server((LOOPBACK, port))
+            threading.Thread(target=self._accept, args=(listener,), daemon=True).start()
+            self.listeners.append(listener)
+        
+        self.bin_dir = self._enumeration_tools()
+        return self
+    
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        for listener in self.listeners:
+            listener.close()
+    
+    def _serve(self, server):
+        server.config = self.config
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return server
+    
+    def _accept(self, listener):
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            connection.close()
+    
+    def _certificate(self):
+        """
+        Write a self-signed wildcard certificate for the synthetic zone
+        """
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+        
+        suffix = self.config['suffix']
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, f'*.{suffix}')])
+        now = datetime.datetime.now(datetime.timezone.utc)
+        certificate = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=30))
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName(f'*.{suffix}')]), critical=False)
+            .sign(key, hashes.SHA256())
+        )
+        
+        cert_file = os.path.join(self.workdir, 'cert.pem')
+        key_file = os.path.join(self.workdir, 'key.pem')
+        with open(cert_file, 'wb') as f:
+            f.write(certificate.public_bytes(serialization.Encoding.PEM))
+        with open(key_file, 'wb') as f:
+            f.write(key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.TraditionalOpenSSL,
+                serialization.NoEncryption()
+            ))
+        return cert_file, key_file
+    
+    def _enumeration_tools(self):
+        """
+        Stand-ins for amass and subfinder that print a few names for -d <domain>
+        """
+        bin_dir = os.path.join(self.workdir, 'bin')
+        os.makedirs(bin_dir)
+        script = (
+            '#!/bin/sh\n'
+            'while [ "$#" -gt 0 ]; do\n'
+            '  if [ "$1" = "-d" ]; then echo "dev.$2"; echo "www.$2"; fi\n'
+            '  shift\n'
+            'done\n'
+        )
+        for tool in ('amass', 'subfinder'):
+            path = os.path.join(bin_dir, tool)
+            with open(path, 'w') as f:
+                f.write(script)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return bin_dir
+
+def patch_resolution(suffix, port_map):
+    """
+    Resolve the synthetic zone to loopback (rewriting 80/443 to the stub
+    ports) and refuse every other name, so nothing reaches the internet
+    """
+    original_getaddrinfo = socket.getaddrinfo
+    
+    def is_local(host):
+        host = host.decode() if isinstance(host, bytes) else (host or '')
+        return host in (LOOPBACK, 'localhost', '::1')
+    
+    def in_zone(host):
+        host = host.decode() if isinstance(host, bytes) else (host or '')
+        host = host.rstrip('.').lower()
+        return host == suffix or host.endswith(f'.{suffix}')
+    
+    def getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+        if in_zone(host):
+            port = port_map.get(int(port), port) if port is not None else port
+            return original_getaddrinfo(LOOPBACK, port, socket.AF_INET, type, proto, flags)
+        if host is None or is_local(host):
+            return original_getaddrinfo(host, port, family, type, proto, flags)
+        raise socket.gaierror(socket.EAI_NONAME, f'{host} is outside the benchmark zone')
+    
+    def gethostbyname(host):
+        if in_zone(host) or is_local(host):
+            return LOOPBACK
+        raise socket.gaierror(socket.EAI_NONAME, f'{host} is outside the benchmark zone')
+    
+    socket.getaddrinfo = getaddrinfo
+    socket.gethostbyname = gethostbyname
+
+def stub_whois():
+    """
+    python-whois opens its own sockets to registry servers; answer locally
+    """
+    import whois
+    
+    def lookup(domain):
+        now = datetime.datetime.now()
+        return SimpleNamespace(
+            registrar='Benchmark Registrar',
+            creation_date=now - datetime.timedelta(days=365),
+            expiration_date=now + datetime.timedelta(days=365),
+            name_servers=[f'ns1.{domain}', f'ns2.{domain}']
+        )
+    
+    whois.whois = lookup
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a non-empty list
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def peak_rss_mb(who):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ASM_TOOL_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ASM_TOOL_DIR, capture_output=True, text=True
+        ).stdout.strip()
+        return f'{commit}-dirty' if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure end-to-end scan throughput against local stub servers')
+    parser.add_argument('--domains', type=int, default=50, help='number of synthetic domains')
+    parser.add_argument('--concurrency', type=int, default=8, help='domains scanned in parallel')
+    parser.add_argument('--engine', default='threads', help='scan engine (threads or async)')
+    parser.add_argument('--suffix', default='bench.test', help='zone the synthetic domains live in')
+    parser.add_argument('--html-bytes', type=int, default=20000, help='approximate landing page size')
+    parser.add_argument('--tcp-ports', default='8080', help='comma-separated loopback ports to hold open')
+    parser.add_argument('--rate-limit', action='store_true', help='keep the default per-host/per-IP rate limits')
+    parser.add_argument('--output', default=None, help='JSON file to merge the report into, keyed by commit')
+    args = parser.parse_args()
+    
+    tcp_ports = [int(port) for port in args.tcp_ports.split(',') if port]
+    servers = StubServers(args.suffix, args.html_bytes, tcp_ports).start()
+    
+    # Endpoint overrides are read when the app modules are first imported
+    os.environ['CT_LOG_URL'] = f'http://ct.{args.suffix}/ct?q=%.{{domain}}&output=json'
+    os.environ['DNS_NAMESERVERS'] = f'{LOOPBACK}:{servers.dns.server_address[1]}'
+    os.environ['PATH'] = servers.bin_dir + os.pathsep + os.environ.get('PATH', '')
+    os.environ.pop('OPENAI_API_KEY', None)
+    patch_resolution(args.suffix, {80: servers.http.server_address[1], 443: servers.https.server_address[1]})
+    
+    sys.path.insert(0, ASM_TOOL_DIR)
+    from app.modules.scanner import ASMScanner
+    from app.utils.metrics import stage_duration, stage_total
+    from app.utils.rate_limit import limiter
+    from app.utils.result_sink import ResultSink
+    
+    stub_whois()
+    if not args.rate_limit:
+        # Every synthetic domain shares one IP; don't measure the limiter
+        limiter.configure(host_rate=0, ip_rate=0)
+    
+    job_dir = os.path.join(servers.workdir, 'job')
+    os.makedirs(job_dir)
+    input_file = os.path.join(job_dir, 'input.csv')
+    with open(input_file, 'w') as f:
+        f.write('domain\n')
+        for index in range(args.domains):
+            f.write(f'd{index}.{args.suffix}\n')
+    
+    scanner = ASMScanner(
+        input_file,
+        max_workers=args.concurrency,
+        engine=args.engine,
+        status_interval=5,
+        resume=False
+    )
+    
+    started = time.perf_counter()
+    try:
+        scanner.scan_domains()
+    finally:
+        elapsed = time.perf_counter() - started
+        servers.stop()
+    
+    stage_samples = {}
+    errors = 0
+    results = 0
+    for _, record in ResultSink(job_dir).read():
+        results += 1
+        errors += 'error' in record
+        for stage, seconds in (record.get('stage_timings') or {}).items():
+            stage_samples.setdefault(stage, []).append(seconds)
+    
+    stages = {
+        stage: {
+            'count': len(samples),
+            'p50_seconds': round(percentile(samples, 0.5), 4),
+            'p99_seconds': round(percentile(samples, 0.99), 4),
+            'max_seconds': round(max(samples), 4)
+        }
+        for stage, samples in sorted(stage_samples.items())
+    }
+    
+    # Sub-stage calls (crt.sh, amass, nmap full scan, ...) from the metrics registry
+    outcomes = {}
+    for key, count in stage_total.series.items():
+        labels = dict(key)
+        outcomes.setdefault(labels['stage'], {})[labels['outcome']] = count
+    calls = {
+        dict(key)['stage']: {
+            'count': series['count'],
+            'mean_seconds': round(series['sum'] / series['count'], 4) if series['count'] else None,
+            'outcomes': outcomes.get(dict(key)['stage'], {})
+        }
+        for key, series in sorted(stage_duration.series.items())
+    }
+    
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {
+            'domains': args.domains,
+            'concurrency': args.concurrency,
+            'engine': args.engine,
+            'html_bytes': args.html_bytes,
+            'tcp_ports': tcp_ports,
+            'rate_limit': args.rate_limit
+        },
+        'results': results,
+        'errors': errors,
+        'elapsed_seconds': round(elapsed, 3),
+        'domains_per_second': round(results / elapsed, 3) if elapsed else None,
+        'stages': stages,
+        'calls': calls,
+        'peak_rss_mb': peak_rss_mb(resource.RUSAGE_SELF),
+        'children_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN)
+    }
+    print(json.dumps(report, indent=2))
+    
+    if args.output:
+        reports = {}
+        if os.path.exists(args.output):
+            with open(args.output, 'r') as f:
+                reports = json.load(f)
+        reports[commit] = report
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    
+    return 0 if results == args.domains else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
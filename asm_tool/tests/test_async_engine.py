@@ -0,0 +1,177 @@
+import asyncio
+import socket
+import ssl
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlparse
+import dns.asyncresolver
+import dns.resolver
+import requests
+from app.modules.async_engine import AsyncScanEngine, AsyncSubdomainValidator
+from app.modules.subdomain_enum import SubdomainEnumerator
+from app.utils.deadline import Deadline
+
+# Names each discovery source reports for example.com
+SOURCES = {
+    'amass': ['www.example.com', 'api.dev.example.com', 'cdn.dev.example.com'],
+    'subfinder': ['mail.example.com', 'WWW.example.com.', 'other.org'],
+    'crt_sh': ['*.dev.example.com', 'www.example.com']
+}
+
+def fake_lookup(resolver, name, lifetime=None):
+    # dev.example.com has a wildcard record; example.com itself does not
+    if name.endswith('.dev.example.com'):
+        return {'10.0.0.9'}, None
+    if name == 'www.example.com':
+        return {'10.0.0.1'}, None
+    raise dns.resolver.NXDOMAIN()
+
+def fake_head(url, **kwargs):
+    # cdn.dev.example.com is a real host behind the wildcard's address; every
+    # other name in dev.example.com gets the wildcard's redirect
+    host = urlparse(url).hostname
+    if host in ('www.example.com', 'cdn.dev.example.com'):
+        return SimpleNamespace(status_code=200, headers={'Content-Type': 'text/html', 'Content-Length': str(len(host))})
+    if host.endswith('.dev.example.com'):
+        return SimpleNamespace(status_code=302, headers={'Content-Length': '0', 'Location': f'https://{host}/login'})
+    raise requests.ConnectionError(host)
+
+async def fake_lookup_async(resolver, name, lifetime=None):
+    return fake_lookup(resolver, name, lifetime)
+
+async def fake_request(self, method, url, host, timeout, probe, headers=None):
+    response = fake_head(url)
+    return response.status_code, response.headers
+
+class AsyncSubdomainTest(unittest.TestCase):
+    """
+    The async engine runs subdomains through the same DNS-first validation
+    as the threads engine, including wildcard pruning
+    """
+    def setUp(self):
+        patches = [
+            mock.patch('app.modules.subdomain_enum.lookup', fake_lookup),
+            mock.patch('app.utils.wildcard_dns.lookup', fake_lookup),
+            mock.patch('requests.head', fake_head),
+            mock.patch('app.modules.async_engine.lookup_async', fake_lookup_async),
+            mock.patch.object(AsyncSubdomainValidator, '_request', fake_request)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+    
+    def _async_result(self):
+        engine = AsyncScanEngine(SimpleNamespace(max_workers=1, discovery_cache=None, refresh_discovery=False))
+        
+        async def run_tool(cmd, found, deadline):
+            for name in SOURCES[cmd[0]]:
+                found(name)
+            return True
+        
+        async def certificate_transparency(session, domain, found, deadline):
+            for name in SOURCES['crt_sh']:
+                found(name)
+            return True
+        
+        engine._run_tool = run_tool
+        engine._certificate_transparency = certificate_transparency
+        
+        async def enumerate_subdomains():
+            engine.probe_limit = asyncio.Semaphore(10)
+            return await engine._enumerate_subdomains(None, 'example.com', Deadline(30))
+        
+        # Validation runs on the event loop, not in thread pools
+        with mock.patch('app.modules.subdomain_enum.ThreadPoolExecutor') as pools:
+            result = asyncio.run(enumerate_subdomains())
+        pools.assert_not_called()
+        return result
+    
+    def _threads_result(self):
+        enumerator = SubdomainEnumerator('example.com', deadline=Deadline(30))
+        
+        def run_tool(name, cmd, found):
+            for subdomain in SOURCES[name]:
+                found(subdomain)
+            return True
+        
+        def query_ct_logs(found):
+            for name in SOURCES['crt_sh']:
+                found(name)
+            return True
+        
+        enumerator._run_tool = run_tool
+        enumerator._query_ct_logs = query_ct_logs
+        return enumerator.enumerate()
+    
+    def test_wildcard_names_are_pruned(self):
+        result = self._async_result()
+        
+        # Resolving like the wildcard is not enough; the page has to match too
+        self.assertEqual(result['subdomains'], ['cdn.dev.example.com', 'www.example.com'])
+        self.assertEqual(result['wildcard_zones'], ['dev.example.com'])
+        self.assertEqual(result['dropped']['api.dev.example.com'], 'wildcard')
+        self.assertEqual(result['dropped']['mail.example.com'], 'nxdomain')
+        self.assertEqual(result['dropped']['other.org'], 'out_of_scope')
+        # *.dev.example.com from a certificate is the zone's own name
+        self.assertEqual(result['dropped']['dev.example.com'], 'nxdomain')
+        self.assertEqual(result['total_found'], 5)
+    
+    def test_same_result_as_threads_engine(self):
+        self.assertEqual(self._async_result(), self._threads_result())
+
+class AsyncProbeDeadlineTest(unittest.TestCase):
+    """
+    Async probes take their timeouts from the domain's deadline, not the
+    engine's fixed per-probe timeout
+    """
+    def setUp(self):
+        # Accepts connections and UDP queries but never answers them
+        self.server = socket.socket()
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen()
+        self.silent_dns = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.silent_dns.bind(('127.0.0.1', 0))
+        self.engine = AsyncScanEngine(SimpleNamespace(max_workers=1), timeout=30)
+    
+    def tearDown(self):
+        self.server.close()
+        self.silent_dns.close()
+    
+    def _run(self, make_probe):
+        async def main():
+            self.engine.probe_limit = asyncio.Semaphore(10)
+            return await make_probe()
+        started = time.monotonic()
+        result = asyncio.run(main())
+        return result, time.monotonic() - started
+    
+    def test_handshake_is_capped_by_deadline(self):
+        deadline = Deadline(0.6)
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        
+        async def probe():
+            with mock.patch('asyncio.open_connection', lambda host, port, **kwargs: asyncio.open_connection(
+                host, self.server.getsockname()[1], **kwargs
+            )):
+                return await self.engine._supports('127.0.0.1', lambda: context, deadline)
+        
+        supported, elapsed = self._run(probe)
+        self.assertFalse(supported)
+        self.assertLess(elapsed, 5)
+    
+    def test_dns_is_capped_by_deadline_and_marked(self):
+        deadline = Deadline(0.6)
+        resolver = dns.asyncresolver.Resolver(configure=False)
+        resolver.nameservers = ['127.0.0.1']
+        resolver.port = self.silent_dns.getsockname()[1]
+        resolver.lifetime = 30
+        
+        records, elapsed = self._run(lambda: self.engine._resolve(resolver, 'example.com', 'A', deadline))
+        self.assertEqual(records, [])
+        self.assertLess(elapsed, 5)
+        self.assertEqual(deadline.annotate('dns', {}), {'timed_out': True})
+        self.assertEqual(deadline.probes_timed_out(), ['dns'])
\ No newline at end of file
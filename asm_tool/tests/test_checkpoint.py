@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from app.modules.scanner import ASMScanner
+from app.utils.checkpoint import ScanCheckpoint
+from app.utils.result_sink import ResultSink
+
+DOMAINS = ['a.com', 'b.com', 'c.com', 'd.com']
+
+class ScanCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.input_file = os.path.join(self.directory.name, 'input.csv')
+        self._write_input(DOMAINS)
+        self.scanned = []
+    
+    def _write_input(self, domains):
+        with open(self.input_file, 'w') as f:
+            f.write('domain\n' + '\n'.join(domains) + '\n')
+    
+    def _interrupted_scan(self, status='scanning'):
+        """
+        Leave behind what a scan killed after two domains would have written
+        """
+        ScanCheckpoint(self.directory.name).save(ScanCheckpoint.fingerprint(self.input_file), status)
+        sink = ResultSink(self.directory.name, fsync=False)
+        sink.append({'domain': 'a.com'})
+        sink.append({'domain': 'b.com'})
+        sink.close()
+        with open(sink.records_file, 'a') as f:
+            f.write('{"domain": "c.co')
+    
+    def _scan(self, **options):
+        def scan_domain(scanner, domain):
+            self.scanned.append(domain)
+            return scanner.empty_result(domain)
+        
+        scanner = ASMScanner(self.input_file, status_interval=0, **options)
+        with mock.patch.object(ASMScanner, 'scan_domain', scan_domain):
+            scanner.scan_domains()
+        return scanner
+    
+    def test_can_resume(self):
+        checkpoint = ScanCheckpoint(self.directory.name)
+        fingerprint = ScanCheckpoint.fingerprint(self.input_file)
+        self.assertFalse(checkpoint.can_resume(fingerprint))
+        
+        for status, resumable in (('scanning', True), ('paused', True), ('cancelled', False), ('completed', False)):
+            checkpoint.save(fingerprint, status)
+            self.assertEqual(checkpoint.can_resume(fingerprint), resumable, status)
+        
+        checkpoint.save(fingerprint, 'scanning')
+        self._write_input(DOMAINS + ['e.com'])
+        self.assertFalse(checkpoint.can_resume(ScanCheckpoint.fingerprint(self.input_file)))
+    
+    def test_interrupted_scan_resumes(self):
+        self._interrupted_scan()
+        scanner = self._scan()
+        
+        self.assertEqual(self.scanned, ['c.com', 'd.com'])
+        self.assertEqual(scanner.status['resumed'], 2)
+        self.assertEqual((scanner.status['completed'], scanner.status['total']), (4, 4))
+        self.assertEqual([record['domain'] for _, record in scanner.sink.read()], DOMAINS)
+        self.assertEqual(scanner.checkpoint.load()['status'], 'completed')
+    
+    def test_completed_scan_starts_over(self):
+        self._interrupted_scan('completed')
+        scanner = self._scan()
+        
+        self.assertEqual(self.scanned, DOMAINS)
+        self.assertEqual(scanner.status['resumed'], 0)
+        self.assertEqual([record['domain'] for _, record in scanner.sink.read()], DOMAINS)
+    
+    def test_resume_can_be_turned_off(self):
+        self._interrupted_scan()
+        self._scan(resume=False)
+        
+        self.assertEqual(self.scanned, DOMAINS)
\ No newline at end of file
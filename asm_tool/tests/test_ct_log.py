@@ -0,0 +1,50 @@
+import unittest
+from app.utils.ct_log import JSONArrayParser, entry_names
+
+class JSONArrayParserTest(unittest.TestCase):
+    def test_elements_split_across_chunks(self):
+        parser = JSONArrayParser()
+        data = b'[{"name_value": "a.example.com"}, {"name_value": "b.example.com\\nc.example.com"}]'
+        items = []
+        for index in range(0, len(data), 7):
+            items.extend(parser.feed(data[index:index + 7]))
+        parser.close()
+        
+        self.assertEqual([name for item in items for name in entry_names(item)],
+                         ['a.example.com', 'b.example.com', 'c.example.com'])
+    
+    def test_number_at_end_of_chunk_waits_for_the_rest(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed('[12'), [])
+        self.assertEqual(parser.feed('3, 4]'), [123, 4])
+        parser.close()
+    
+    def test_multibyte_character_split_across_chunks(self):
+        parser = JSONArrayParser()
+        data = '["café"]'.encode('utf-8')
+        split = data.index(b'\xc3') + 1
+        self.assertEqual(parser.feed(data[:split]) + parser.feed(data[split:]), ['café'])
+    
+    def test_empty_array(self):
+        parser = JSONArrayParser()
+        self.assertEqual(parser.feed(' [ ] '), [])
+        parser.close()
+    
+    def test_truncated_array(self):
+        parser = JSONArrayParser()
+        parser.feed('[{"name_value": "a.example.com"}, {"name_')
+        with self.assertRaises(ValueError):
+            parser.close()
+    
+    def test_not_an_array(self):
+        with self.assertRaises(ValueError):
+            JSONArrayParser().feed('{"error": "rate limited"}')
+    
+    def test_data_after_array(self):
+        with self.assertRaises(ValueError):
+            JSONArrayParser().feed('[1] [2]')
+
+class EntryNamesTest(unittest.TestCase):
+    def test_malformed_entries(self):
+        self.assertEqual(entry_names('a.example.com'), [])
+        self.assertEqual(entry_names({'name_value': None}), [''])
\ No newline at end of file
@@ -0,0 +1,64 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from app.utils import deadline as deadline_module
+from app.utils.deadline import Deadline, DeadlineCancelled, DeadlineExceeded, abandoned_calls, run_with_timeout
+
+class DeadlineTest(unittest.TestCase):
+    def test_timeout_is_capped_by_budget(self):
+        deadline = Deadline(2)
+        self.assertLessEqual(deadline.timeout(10, 'http'), 2)
+        self.assertEqual(deadline.timeout(1, 'http'), 1)
+        self.assertEqual(Deadline().timeout(10, 'http'), 10)
+    
+    def test_spent_budget_records_probe(self):
+        deadline = Deadline(0.01)
+        time.sleep(0.02)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.timeout(10, 'http')
+        self.assertEqual(deadline.probes_timed_out(), ['http'])
+    
+    def test_cancel_wakes_sleep(self):
+        deadline = Deadline(30)
+        threading.Timer(0.1, deadline.cancel).start()
+        started = time.monotonic()
+        with self.assertRaises(DeadlineCancelled):
+            deadline.sleep(10)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(deadline.callbacks, [])
+
+class RunWithTimeoutTest(unittest.TestCase):
+    def tearDown(self):
+        # Leave no abandoned calls behind for other tests
+        while abandoned_calls():
+            time.sleep(0.01)
+    
+    def test_calls_that_finish_in_time_are_not_capped(self):
+        calls = deadline_module.MAX_ABANDONED_CALLS + 8
+        with ThreadPoolExecutor(max_workers=calls) as executor:
+            futures = [executor.submit(run_with_timeout, time.sleep, 5, 0.5) for _ in range(calls)]
+            errors = [future.exception() for future in futures]
+        self.assertEqual(errors, [None] * calls)
+        self.assertEqual(abandoned_calls(), 0)
+    
+    def test_abandoned_calls_are_capped(self):
+        release = threading.Event()
+        try:
+            for _ in range(deadline_module.MAX_ABANDONED_CALLS):
+                with self.assertRaisesRegex(DeadlineExceeded, 'did not finish'):
+                    run_with_timeout(release.wait, 0.01)
+            self.assertEqual(abandoned_calls(), deadline_module.MAX_ABANDONED_CALLS)
+            with self.assertRaisesRegex(DeadlineExceeded, 'Too many abandoned'):
+                run_with_timeout(lambda: None, 1)
+        finally:
+            release.set()
+        
+        started = time.monotonic()
+        while abandoned_calls() and time.monotonic() - started < 5:
+            time.sleep(0.01)
+        self.assertEqual(run_with_timeout(lambda: 'ok', 1), 'ok')
+    
+    def test_errors_are_raised_in_caller(self):
+        with self.assertRaises(ZeroDivisionError):
+            run_with_timeout(lambda: 1 / 0, 1)
\ No newline at end of file
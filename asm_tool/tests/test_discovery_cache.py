@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import dns.resolver
+from app.modules.subdomain_enum import SubdomainEnumerator
+from app.utils.deadline import Deadline
+from app.utils.discovery_cache import DiscoveryCache
+
+def no_such_name(resolver, name, lifetime=None):
+    raise dns.resolver.NXDOMAIN()
+
+class DiscoveryCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'cache', 'discovery.db')
+    
+    def _age(self, cache, column, seconds, apex):
+        cache._connection().execute(f'UPDATE discovery SET {column} = {column} - ? WHERE apex = ?', (seconds, apex))
+    
+    def test_round_trip(self):
+        cache = DiscoveryCache(self.path)
+        cache.put('example.com', 'amass', ['www.example.com', 'api.example.com'])
+        cache.put('example.com', 'crt_sh', [])
+        
+        self.assertEqual(cache.get('example.com', 'amass'), ['www.example.com', 'api.example.com'])
+        self.assertEqual(cache.get('example.com', 'crt_sh'), [])
+        self.assertIsNone(cache.get('example.com', 'subfinder'))
+        # Shared by every process using the same file
+        self.assertEqual(DiscoveryCache(self.path).get('example.com', 'amass'), ['www.example.com', 'api.example.com'])
+    
+    def test_entries_expire(self):
+        cache = DiscoveryCache(self.path, ttl=3600)
+        cache.put('old.com', 'amass', ['www.old.com'])
+        cache.put('new.com', 'amass', ['www.new.com'])
+        self._age(cache, 'fetched', 7200, 'old.com')
+        
+        self.assertIsNone(cache.get('old.com', 'amass'))
+        self.assertEqual(cache.get('new.com', 'amass'), ['www.new.com'])
+    
+    def test_least_recently_used_are_evicted(self):
+        names = [f'host{index}.example.com' for index in range(2000)]
+        cache = DiscoveryCache(self.path)
+        cache.put('a.com', 'amass', names)
+        cache.put('b.com', 'amass', names)
+        size = cache._connection().execute('SELECT MAX(size) FROM discovery').fetchone()[0]
+        cache.max_bytes = size * 2
+        self._age(cache, 'accessed', 20, 'a.com')
+        self._age(cache, 'accessed', 10, 'b.com')
+        cache.get('a.com', 'amass')
+        cache.put('c.com', 'amass', names)
+        
+        self.assertIsNone(cache.get('b.com', 'amass'))
+        self.assertEqual(cache.get('a.com', 'amass'), names)
+        self.assertEqual(cache.get('c.com', 'amass'), names)
+
+class CachedEnumerationTest(unittest.TestCase):
+    """
+    Complete source outputs are replayed from the cache on the next scan
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = DiscoveryCache(os.path.join(self.directory.name, 'discovery.db'))
+        for target in ('app.modules.subdomain_enum.lookup', 'app.utils.wildcard_dns.lookup'):
+            patch = mock.patch(target, no_such_name)
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.runs = []
+    
+    def _enumerate(self, refresh=False, complete=True):
+        enumerator = SubdomainEnumerator('example.com', deadline=Deadline(30), cache=self.cache, refresh=refresh)
+        
+        def run_tool(name, cmd, found):
+            self.runs.append(name)
+            for subdomain in ('WWW.example.com.', 'api.example.com', 'other.org'):
+                found(subdomain)
+            return complete
+        
+        enumerator._run_tool = run_tool
+        enumerator._query_ct_logs = lambda found: True
+        return enumerator.enumerate()
+    
+    def test_second_scan_replays_the_cache(self):
+        first = self._enumerate()
+        self.assertEqual(sorted(self.runs), ['amass', 'subfinder'])
+        self.assertEqual(sorted(self.cache.get('example.com', 'amass')), ['api.example.com', 'www.example.com'])
+        
+        second = self._enumerate()
+        self.assertEqual(len(self.runs), 2)
+        self.assertEqual(sorted(second['cached_sources']), ['amass', 'crt_sh', 'subfinder'])
+        self.assertEqual(second['total_found'], first['total_found'])
+    
+    def test_refresh_and_partial_output(self):
+        self._enumerate(complete=False)
+        self.assertIsNone(self.cache.get('example.com', 'amass'))
+        
+        self._enumerate()
+        self._enumerate(refresh=True)
+        self.assertEqual(len(self.runs), 6)
\ No newline at end of file
@@ -0,0 +1,34 @@
+import unittest
+from app.utils.domain_names import NameTrie
+
+class NameTrieTest(unittest.TestCase):
+    def test_add_reports_new_names(self):
+        names = NameTrie()
+        self.assertTrue(names.add('www.example.com'))
+        self.assertFalse(names.add('www.example.com'))
+        self.assertEqual(len(names), 1)
+    
+    def test_name_and_names_below_it(self):
+        # Covers both orders: a leaf that gains children and a parent added after them
+        names = NameTrie(['example.com', 'www.example.com', 'a.b.example.com'])
+        self.assertTrue(names.add('b.example.com'))
+        self.assertFalse(names.add('example.com'))
+        self.assertFalse(names.add('b.example.com'))
+        
+        self.assertEqual(len(names), 4)
+        self.assertEqual(sorted(names), ['a.b.example.com', 'b.example.com', 'example.com', 'www.example.com'])
+    
+    def test_contains_only_added_names(self):
+        names = NameTrie(['a.b.example.com', 'example.org'])
+        self.assertIn('a.b.example.com', names)
+        self.assertIn('example.org', names)
+        self.assertNotIn('b.example.com', names)
+        self.assertNotIn('example.com', names)
+        self.assertNotIn('c.b.example.com', names)
+        self.assertNotIn('a.b.example.net', names)
+    
+    def test_empty(self):
+        names = NameTrie()
+        self.assertEqual(len(names), 0)
+        self.assertEqual(list(names), [])
+        self.assertNotIn('example.com', names)
\ No newline at end of file
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app.utils.domain_reader import DomainReader, normalize_domain
+
+class NormalizeDomainTest(unittest.TestCase):
+    def test_strips_scheme_path_port_and_dot(self):
+        self.assertEqual(normalize_domain(' HTTPS://Example.com:8443/login '), 'example.com')
+        self.assertEqual(normalize_domain('user@example.com.'), 'example.com')
+        self.assertEqual(normalize_domain(None), '')
+
+class DomainReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'input.csv')
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def _write(self, rows, header='domain'):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(header + '\n')
+            for row in rows:
+                f.write(row + '\n')
+    
+    def test_duplicates_are_dropped(self):
+        self._write(['example.com', 'https://EXAMPLE.com/', '', 'other.org', 'example.com.'])
+        reader = DomainReader(self.path)
+        
+        self.assertEqual(list(reader), ['example.com', 'other.org'])
+        self.assertEqual(reader.count, 2)
+        self.assertTrue(reader.exhausted)
+    
+    def test_distinct_names_are_all_kept(self):
+        domains = [f'host{i}.example.com' for i in range(5000)]
+        self._write(domains + domains)
+        
+        self.assertEqual(list(DomainReader(self.path)), domains)
+    
+    def test_reading_again_starts_over(self):
+        self._write(['example.com', 'other.org'])
+        reader = DomainReader(self.path)
+        list(reader)
+        
+        self.assertEqual(list(reader), ['example.com', 'other.org'])
+        self.assertEqual(reader.count, 2)
+    
+    def test_missing_column(self):
+        self._write(['example.com'], header='host')
+        
+        with self.assertRaises(KeyError):
+            list(DomainReader(self.path))
\ No newline at end of file
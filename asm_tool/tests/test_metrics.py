@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+import urllib.error
+import urllib.request
+from app.utils.metrics import Counter, Gauge, Histogram, Registry, instrument, serve, stage_duration, stage_total, track
+
+class MetricsTest(unittest.TestCase):
+    def test_exposition_format(self):
+        registry = Registry()
+        requests = registry.register(Counter('asm_requests_total', 'Requests', labels=('path',)))
+        workers = registry.register(Gauge('asm_workers', 'Workers'))
+        latency = registry.register(Histogram('asm_latency_seconds', 'Latency', buckets=(0.5, 0.1)))
+        requests.inc(path='/a "b"')
+        requests.inc(2, path='/a "b"')
+        workers.set(3)
+        workers.dec()
+        latency.observe(0.05)
+        latency.observe(0.3)
+        latency.observe(7)
+        
+        self.assertEqual(registry.render().splitlines(), [
+            '# HELP asm_requests_total Requests',
+            '# TYPE asm_requests_total counter',
+            'asm_requests_total{path="/a \\"b\\""} 3',
+            '# HELP asm_workers Workers',
+            '# TYPE asm_workers gauge',
+            'asm_workers 2',
+            '# HELP asm_latency_seconds Latency',
+            '# TYPE asm_latency_seconds histogram',
+            'asm_latency_seconds_bucket{le="0.1"} 1',
+            'asm_latency_seconds_bucket{le="0.5"} 2',
+            'asm_latency_seconds_bucket{le="+Inf"} 3',
+            'asm_latency_seconds_sum 7.35',
+            'asm_latency_seconds_count 3'
+        ])
+    
+    def test_labels_must_match(self):
+        with self.assertRaises(ValueError):
+            Counter('asm_requests_total', 'Requests', labels=('path',)).inc(host='a.com')
+    
+    def test_collectors_are_read_at_render_time(self):
+        registry = Registry()
+        calls = []
+        
+        def collect():
+            calls.append(1)
+            gauge = Gauge('asm_calls', 'Renders')
+            gauge.set(len(calls))
+            return [gauge]
+        
+        registry.add_collector(collect)
+        registry.render()
+        self.assertIn('asm_calls 2', registry.render())
+    
+    def test_serve(self):
+        registry = Registry()
+        registry.register(Counter('asm_requests_total', 'Requests')).inc()
+        server = serve(0, host='127.0.0.1', registry=registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        
+        with urllib.request.urlopen(f'{url}/metrics?format=text', timeout=5) as response:
+            self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+            self.assertIn('asm_requests_total 1', response.read().decode())
+        with self.assertRaises(urllib.error.HTTPError) as raised:
+            urllib.request.urlopen(f'{url}/other', timeout=5)
+        self.assertEqual(raised.exception.code, 404)
+        raised.exception.close()
+
+class StageTrackingTest(unittest.TestCase):
+    def _count(self, stage, outcome):
+        return stage_total.series.get((('stage', stage), ('outcome', outcome)), 0)
+    
+    def _observations(self, stage):
+        series = stage_duration.series.get((('stage', stage),))
+        return series['count'] if series else 0
+    
+    def test_outcomes(self):
+        with track('test_success'):
+            pass
+        with track('test_returned_error') as record:
+            record({'error': 'Connection refused'})
+        with self.assertRaises(TimeoutError):
+            with track('test_timeout'):
+                raise TimeoutError()
+        
+        self.assertEqual(self._count('test_success', 'success'), 1)
+        self.assertEqual(self._count('test_returned_error', 'error'), 1)
+        self.assertEqual(self._count('test_timeout', 'timeout'), 1)
+        self.assertEqual(self._observations('test_timeout'), 1)
+    
+    def test_instrument_functions_and_coroutines(self):
+        @instrument('test_sync')
+        def sync():
+            return {'error': 'request timed out'}
+        
+        @instrument('test_async')
+        async def run():
+            return 'done'
+        
+        sync()
+        self.assertEqual(asyncio.run(run()), 'done')
+        self.assertEqual(self._count('test_sync', 'timeout'), 1)
+        self.assertEqual(self._count('test_async', 'success'), 1)
+        self.assertEqual(self._observations('test_async'), 1)
\ No newline at end of file
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import time
+import unittest
+from app.utils.profiler import DomainProfiler, format_profile, list_profiles, profile_name, profile_path
+
+def busy_stage(seconds):
+    ended = time.monotonic() + seconds
+    while time.monotonic() < ended:
+        pass
+
+class DomainProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+    
+    def _profile(self, profiler, domain, seconds):
+        profile = profiler.begin(domain)
+        with profile.stage('dns_records'):
+            busy_stage(0.1)
+        # Pretend the whole domain took this long
+        profile.started = time.monotonic() - seconds
+        profile.finish()
+    
+    def test_stage_samples_are_saved(self):
+        profiler = DomainProfiler(self.directory.name, 'all')
+        self._profile(profiler, 'a.com', 1)
+        
+        path = profile_path(self.directory.name, 'a.com')
+        self.assertIsNotNone(path)
+        self.assertIn('busy_stage', format_profile(path, sort='tottime'))
+        self.assertEqual([entry['domain'] for entry in list_profiles(self.directory.name)], ['a.com'])
+    
+    def test_slowest_mode_keeps_top_k(self):
+        profiler = DomainProfiler(self.directory.name, 'slowest', top=2)
+        self._profile(profiler, 'a.com', 1)
+        self._profile(profiler, 'b.com', 3)
+        self._profile(profiler, 'c.com', 2)
+        self._profile(profiler, 'd.com', 0.5)
+        
+        self.assertEqual([entry['domain'] for entry in list_profiles(self.directory.name)], ['b.com', 'c.com'])
+        self.assertIsNone(profile_path(self.directory.name, 'a.com'))
+        self.assertIsNone(profile_path(self.directory.name, 'd.com'))
+    
+    def test_restart_keeps_limit(self):
+        self._profile(DomainProfiler(self.directory.name, 'all'), 'a.com', 1)
+        self._profile(DomainProfiler(self.directory.name, 'all'), 'b.com', 2)
+        
+        DomainProfiler(self.directory.name, 'slowest', top=1)
+        self.assertEqual([entry['domain'] for entry in list_profiles(self.directory.name)], ['b.com'])
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, 'profiles', 'a.com.prof')))
+    
+    def test_profile_names_are_safe(self):
+        self.assertEqual(profile_name('../x.com/a b'), '.._x.com_a_b.prof')
+        with self.assertRaises(ValueError):
+            DomainProfiler(self.directory.name, 'sometimes')
\ No newline at end of file
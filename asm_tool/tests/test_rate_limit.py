@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+import unittest
+from app.utils.deadline import Deadline, DeadlineCancelled
+from app.utils.rate_limit import HostRateLimiter, TokenBucket
+
+class TokenBucketTest(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=2, burst=3)
+        now = bucket.updated
+        
+        self.assertEqual([bucket.reserve(now) for _ in range(3)], [0, 0, 0])
+        # Each token past the burst waits another 1 / rate seconds
+        self.assertAlmostEqual(bucket.reserve(now), 0.5)
+        self.assertAlmostEqual(bucket.reserve(now), 1.0)
+    
+    def test_reservations_out_of_order(self):
+        bucket = TokenBucket(rate=1, burst=1, now=10)
+        
+        self.assertEqual(bucket.reserve(10), 0)
+        # A caller that read the clock earlier gets no refill, but no debt either
+        self.assertAlmostEqual(bucket.reserve(9.5), 1.0)
+        self.assertEqual(bucket.updated, 10)
+    
+    def test_refill_is_capped_at_burst(self):
+        bucket = TokenBucket(rate=2, burst=3)
+        now = bucket.updated
+        for _ in range(3):
+            bucket.reserve(now)
+        
+        self.assertFalse(bucket.is_idle(now + 1))
+        self.assertTrue(bucket.is_idle(now + 1.5))
+        later = now + 60
+        self.assertEqual([bucket.reserve(later) for _ in range(3)], [0, 0, 0])
+        self.assertGreater(bucket.reserve(later), 0)
+
+class HostRateLimiterTest(unittest.TestCase):
+    def test_hosts_are_throttled_separately(self):
+        limiter = HostRateLimiter(host_rate=1, host_burst=1, ip_rate=0)
+        
+        self.assertEqual(limiter.reserve('a.com'), 0)
+        self.assertEqual(limiter.reserve('b.com'), 0)
+        self.assertGreater(limiter.reserve('a.com'), 0)
+    
+    def test_names_on_one_ip_share_its_bucket(self):
+        limiter = HostRateLimiter(host_rate=0, ip_rate=20, ip_burst=2)
+        limiter.remember('a.example.com', '10.0.0.1')
+        
+        self.assertEqual(limiter.acquire('a.example.com', 'http'), 0)
+        self.assertEqual(limiter.acquire('b.example.com', 'http', ip='10.0.0.1'), 0)
+        # c.example.com has no known IP, so it only takes a (disabled) host token
+        self.assertEqual(limiter.reserve('c.example.com'), 0)
+        self.assertGreater(limiter.acquire('b.example.com', 'tls'), 0)
+        
+        stats = limiter.stats()
+        self.assertEqual(stats['ips_tracked'], 1)
+        self.assertEqual(stats['hosts_tracked'], 0)
+        self.assertEqual(stats['probes']['http'], {'probes': 2, 'delayed': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0})
+        self.assertEqual(stats['probes']['tls']['delayed'], 1)
+    
+    def test_remembered_ip_expires(self):
+        limiter = HostRateLimiter(host_rate=0, ip_rate=1, ip_burst=1, dns_ttl=0)
+        limiter.remember('a.com', '10.0.0.1')
+        
+        # Without the expired IP there is no bucket to wait on
+        self.assertEqual(limiter.acquire('a.com'), 0)
+        self.assertEqual(limiter.acquire('a.com'), 0)
+        self.assertEqual(limiter.stats()['ips_tracked'], 0)
+    
+    def test_idle_buckets_are_dropped_at_the_cap(self):
+        limiter = HostRateLimiter(host_rate=1000, host_burst=1, ip_rate=0, max_keys=2)
+        limiter.reserve('a.com')
+        limiter.reserve('b.com')
+        time.sleep(0.01)
+        limiter.reserve('c.com')
+        
+        self.assertEqual(limiter.stats()['hosts_tracked'], 1)
+    
+    def test_acquire_waits(self):
+        limiter = HostRateLimiter(host_rate=10, host_burst=1, ip_rate=0)
+        limiter.acquire('a.com')
+        
+        started = time.monotonic()
+        delay = limiter.acquire('a.com')
+        self.assertGreater(delay, 0)
+        self.assertGreaterEqual(time.monotonic() - started, delay * 0.9)
+    
+    def test_acquire_wait_is_capped_by_deadline(self):
+        limiter = HostRateLimiter(host_rate=0.01, host_burst=1, ip_rate=0)
+        limiter.acquire('a.com')
+        deadline = Deadline(0.5)
+        
+        started = time.monotonic()
+        self.assertGreater(limiter.acquire('a.com', 'http', deadline=deadline), 50)
+        self.assertLess(time.monotonic() - started, 2)
+    
+    def test_acquire_ends_when_scan_is_stopped(self):
+        limiter = HostRateLimiter(host_rate=0.01, host_burst=1, ip_rate=0)
+        limiter.acquire('a.com')
+        deadline = Deadline(60)
+        threading.Timer(0.1, deadline.cancel).start()
+        
+        started = time.monotonic()
+        with self.assertRaises(DeadlineCancelled):
+            limiter.acquire('a.com', 'http', deadline=deadline)
+        self.assertLess(time.monotonic() - started, 2)
+    
+    def test_acquire_async_is_capped_by_deadline(self):
+        limiter = HostRateLimiter(host_rate=0.01, host_burst=1, ip_rate=0)
+        limiter.acquire('a.com')
+        
+        started = time.monotonic()
+        asyncio.run(limiter.acquire_async('a.com', 'http', deadline=Deadline(0.5)))
+        self.assertLess(time.monotonic() - started, 2)
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from app import app, routes
+from app.utils.result_index import ResultIndex
+
+def result(domain, scan_date, ports=(), tech=(), risk_score=None, valid_until=None):
+    return {
+        'domain': domain,
+        'scan_date': scan_date,
+        'risk_score': risk_score,
+        'open_ports': [{'port': port, 'state': 'open'} for port in ports] + [{'port': 9, 'state': 'closed'}],
+        'tech_stack': list(tech),
+        'ssl_info': {'certificate': {'valid_until': valid_until}} if valid_until else {}
+    }
+
+class ResultIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = ResultIndex(os.path.join(self.directory.name, 'results.db'))
+        self.index.add(result('a.com', '2024-01-01', ports=[22, 443], tech=['nginx'], risk_score=40), 'job1')
+        self.index.add(result('a.com', '2024-02-01', ports=[443], tech=['nginx', 'PHP'], risk_score=80), 'job2')
+        self.index.add(result('b.com', '2024-01-01', ports=[22, 3389], tech=['IIS'], risk_score=30, valid_until='2024-03-01T00:00:00'), 'job1')
+        self.index.add(result('c.com', '2024-01-01', ports=[3389], tech=['nginx'], risk_score=70, valid_until='2025-01-01T00:00:00'), 'job1')
+    
+    def tearDown(self):
+        self.index.local.connection.close()
+        self.directory.cleanup()
+    
+    def _domains(self, **filters):
+        results, _ = self.index.query(**filters)
+        return [(record['domain'], record['scan_date']) for record in results]
+    
+    def test_port_filter_uses_latest_scan(self):
+        # a.com no longer has port 22 open in its latest scan
+        self.assertEqual(self._domains(ports=[22]), [('b.com', '2024-01-01')])
+        self.assertEqual(self._domains(ports=[22], latest=False), [('a.com', '2024-01-01'), ('b.com', '2024-01-01')])
+    
+    def test_filters_combine(self):
+        self.assertEqual(self._domains(ports=[22, 3389]), [('b.com', '2024-01-01')])
+        self.assertEqual(self._domains(ports=[3389], risk_score_lt=60), [('b.com', '2024-01-01')])
+        self.assertEqual(self._domains(technologies=['nginx'], ports=[443]), [('a.com', '2024-02-01')])
+    
+    def test_tech_filter_ignores_case(self):
+        self.assertEqual(self._domains(technologies=['php']), [('a.com', '2024-02-01')])
+        self.assertEqual(self._domains(technologies=['NGINX']), [('a.com', '2024-02-01'), ('c.com', '2024-01-01')])
+    
+    def test_tls_expiry_and_job(self):
+        self.assertEqual(self._domains(tls_expires_before='2024-06-01'), [('b.com', '2024-01-01')])
+        self.assertEqual(self._domains(job_id='job1', latest=False, tls_expires_after='2024-06-01'), [('c.com', '2024-01-01')])
+    
+    def test_cursor_paging(self):
+        results, cursor = self.index.query(limit=2)
+        self.assertEqual([record['domain'] for record in results], ['a.com', 'b.com'])
+        self.assertEqual(cursor, ('b.com', '2024-01-01'))
+        results, cursor = self.index.query(cursor=cursor, limit=2)
+        self.assertEqual([record['domain'] for record in results], ['c.com'])
+        self.assertIsNone(cursor)
+    
+    def test_add_replaces_a_scan(self):
+        self.index.add(result('c.com', '2024-01-01', ports=[80]))
+        
+        self.assertEqual(self._domains(ports=[3389]), [('b.com', '2024-01-01')])
+        self.assertEqual(self._domains(ports=[80]), [('c.com', '2024-01-01')])
+        self.assertEqual(self.index.latest('a.com')['scan_date'], '2024-02-01')
+
+class QueryRouteTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        index = ResultIndex(os.path.join(self.directory.name, 'results.db'))
+        index.add(result('a.com', '2024-01-01', ports=[3389], tech=['IIS'], risk_score=40))
+        index.add(result('b.com', '2024-01-01', ports=[3389], risk_score=90))
+        index.add(result('c.com', '2024-01-01', ports=[443], risk_score=20))
+        patch = mock.patch.object(routes, 'result_index', index)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.client = app.test_client()
+    
+    def _domains(self, query):
+        return [record['domain'] for record in self.client.get(f'/results/query?{query}').get_json()['results']]
+    
+    def test_filters(self):
+        self.assertEqual(self._domains('risk_score_lt=60&port=3389'), ['a.com'])
+        self.assertEqual(self._domains('tech=iis'), ['a.com'])
+    
+    def test_paging(self):
+        page = self.client.get('/results/query?limit=2').get_json()
+        self.assertEqual(page['next_cursor'], 'b.com|2024-01-01')
+        self.assertEqual(self._domains(f"cursor={page['next_cursor']}"), ['c.com'])
+    
+    def test_malformed_filters_are_rejected(self):
+        for query in ('risk_score_lt=high', 'risk_score_gte=', 'port=rdp', 'cursor=b.com'):
+            self.assertEqual(self.client.get(f'/results/query?{query}').status_code, 400, query)
\ No newline at end of file
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import unittest
+from app.utils.result_sink import ResultSink
+
+class ResultSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sink = ResultSink(self.directory.name, fsync=False)
+    
+    def tearDown(self):
+        self.sink.close()
+        self.directory.cleanup()
+    
+    def _document(self):
+        with open(self.sink.compact()) as f:
+            return json.load(f)
+    
+    def test_compact_keeps_latest_record_per_domain(self):
+        self.sink.append({'domain': 'a.com', 'risk_score': 10})
+        self.sink.append({'domain': 'b.com', 'risk_score': 20})
+        self.sink.append({'domain': 'a.com', 'risk_score': 30})
+        
+        self.assertEqual(self._document(), {
+            'a.com': {'domain': 'a.com', 'risk_score': 30},
+            'b.com': {'domain': 'b.com', 'risk_score': 20}
+        })
+        self.assertFalse(self.sink.is_stale())
+    
+    def test_compact_without_records(self):
+        self.assertEqual(self._document(), {})
+        self.assertEqual(os.listdir(self.directory.name), ['scan_results.json'])
+    
+    def test_document_streams_without_writing(self):
+        self.sink.append({'domain': 'a.com', 'risk_score': 10})
+        self.sink.append({'domain': 'a.com', 'risk_score': 30})
+        
+        self.assertEqual(json.loads(''.join(self.sink.document())), {'a.com': {'domain': 'a.com', 'risk_score': 30}})
+        self.assertEqual(json.loads(''.join(self.sink.document())), self._document())
+        self.sink.append({'domain': 'b.com'})
+        self.assertTrue(self.sink.is_stale())
+        self.assertEqual(list(json.loads(''.join(self.sink.document()))), ['a.com', 'b.com'])
+    
+    def test_partial_record_is_skipped_and_overwritten(self):
+        self.sink.append({'domain': 'a.com'})
+        with open(self.sink.records_file, 'a') as f:
+            f.write('{"domain": "b.c')
+        self.assertEqual([record for _, record in self.sink.read()], [{'domain': 'a.com'}])
+        
+        sink = ResultSink(self.directory.name, fsync=False)
+        sink.append({'domain': 'c.com'})
+        sink.close()
+        self.assertEqual(list(self._document()), ['a.com', 'c.com'])
+    
+    def test_page_cursor(self):
+        for index in range(5):
+            self.sink.append({'domain': f'{index}.com'})
+        
+        records, cursor, more = self.sink.page(limit=2)
+        self.assertEqual([record['domain'] for record in records], ['0.com', '1.com'])
+        self.assertTrue(more)
+        records, cursor, more = self.sink.page(cursor, limit=10)
+        self.assertEqual([record['domain'] for record in records], ['2.com', '3.com', '4.com'])
+        self.assertFalse(more)
+        with self.assertRaises(ValueError):
+            self.sink.page(cursor - 1)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+from app import app, routes
+from app.modules.job_manager import JobManager
+from app.utils.result_sink import ResultSink
+
+class ResultsPagingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.jobs = JobManager(self.directory.name)
+        patch = mock.patch.object(routes, 'jobs', self.jobs)
+        patch.start()
+        self.addCleanup(patch.stop)
+        
+        self.job_id = uuid.uuid4().hex
+        os.makedirs(self.jobs.job_dir(self.job_id))
+        self.sink = ResultSink(self.jobs.job_dir(self.job_id), fsync=False)
+        for index in range(5):
+            self.sink.append({'domain': f'{index}.com', 'risk_score': index * 10, 'headers': {'server': 'nginx'}})
+        self.sink.close()
+        self.client = app.test_client()
+    
+    def _get(self, query=''):
+        return self.client.get(f'/jobs/{self.job_id}/results{query}')
+    
+    def test_pages_follow_the_cursor(self):
+        first = self._get('?limit=2').get_json()
+        self.assertEqual([record['domain'] for record in first['results']], ['0.com', '1.com'])
+        self.assertTrue(first['has_more'])
+        
+        rest = self._get(f"?limit=10&cursor={first['next_cursor']}").get_json()
+        self.assertEqual([record['domain'] for record in rest['results']], ['2.com', '3.com', '4.com'])
+        self.assertFalse(rest['has_more'])
+    
+    def test_fields_keep_the_domain(self):
+        page = self._get('?fields=risk_score&limit=1').get_json()
+        self.assertEqual(page['results'], [{'domain': '0.com', 'risk_score': 0}])
+    
+    def test_ndjson_stream(self):
+        response = self._get('?format=ndjson&limit=3&fields=domain')
+        
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in response.get_data(as_text=True).splitlines()],
+                         [{'domain': '0.com'}, {'domain': '1.com'}, {'domain': '2.com'}])
+    
+    def test_invalid_requests(self):
+        self.assertEqual(self._get('?cursor=3').status_code, 400)
+        self.assertEqual(self._get('?cursor=3&format=ndjson').status_code, 400)
+        self.assertEqual(self._get('?limit=0').status_code, 400)
+        self.assertEqual(self._get('?limit=many').status_code, 400)
+        self.assertEqual(self.client.get(f'/jobs/{uuid.uuid4().hex}/results?limit=1').status_code, 404)
+    
+    def test_document_while_running_and_after(self):
+        self.jobs.scanners[self.job_id] = None
+        running = self._get()
+        self.assertEqual(sorted(running.get_json()), ['0.com', '1.com', '2.com', '3.com', '4.com'])
+        self.assertFalse(os.path.exists(self.sink.results_file))
+        
+        # Once the job has stopped, the document is written once and served from disk
+        del self.jobs.scanners[self.job_id]
+        finished = self._get()
+        self.assertEqual(finished.get_json(), running.get_json())
+        self.assertTrue(os.path.exists(self.sink.results_file))
+        finished.close()
\ No newline at end of file
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from app.modules.scanner import ASMScanner
+from app.utils.deadline import DeadlineCancelled
+from app.utils.scan_control import ScanControl, ScanInterrupted
+
+DOMAINS = ['a.com', 'b.com', 'c.com', 'd.com', 'e.com', 'f.com']
+# Scanned until the job is stopped
+SLOW = {'c.com', 'd.com'}
+
+def scan_domain(self, domain):
+    deadline = self.control.deadline()
+    try:
+        deadline.sleep(30 if domain in SLOW else 0)
+    except DeadlineCancelled:
+        self.control.check()
+    return self.empty_result(domain)
+
+def scan_quickly(self, domain):
+    return self.empty_result(domain)
+
+class ScanControlTest(unittest.TestCase):
+    def test_stopping_cancels_deadlines(self):
+        control = ScanControl()
+        deadline = control.deadline(60)
+        control.check()
+        
+        self.assertEqual(control.pause(), 'paused')
+        self.assertTrue(deadline.cancelled)
+        self.assertTrue(control.deadline().cancelled)
+        with self.assertRaises(ScanInterrupted) as raised:
+            control.check()
+        self.assertEqual(raised.exception.state, 'paused')
+    
+    def test_cancel_overrides_pause(self):
+        control = ScanControl()
+        control.pause()
+        
+        self.assertEqual(control.cancel(), 'cancelled')
+        self.assertEqual(control.pause(), 'cancelled')
+        self.assertEqual(control.state, 'cancelled')
+
+class ScannerPauseTest(unittest.TestCase):
+    """
+    Pausing a scan interrupts the domains in flight without recording them,
+    so resuming it scans them again and skips the ones already done
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.input_file = os.path.join(self.directory.name, 'input.csv')
+        with open(self.input_file, 'w') as f:
+            f.write('domain\n' + '\n'.join(DOMAINS) + '\n')
+    
+    def _scanner(self):
+        return ASMScanner(self.input_file, max_workers=2, status_interval=0)
+    
+    def _stop_while_slow(self, stop):
+        scanner = self._scanner()
+        with mock.patch.object(ASMScanner, 'scan_domain', scan_domain):
+            thread = threading.Thread(target=scanner.scan_domains)
+            thread.start()
+            give_up = time.monotonic() + 10
+            while sorted(scanner.status['in_progress']) != sorted(SLOW) and time.monotonic() < give_up:
+                time.sleep(0.01)
+            self.assertEqual(getattr(scanner, stop)(), 'paused' if stop == 'pause' else 'cancelled')
+            thread.join(10)
+        self.assertFalse(thread.is_alive())
+        return scanner
+    
+    def _scanned(self, scanner):
+        return [record['domain'] for _, record in scanner.sink.read()]
+    
+    def test_pause_and_resume(self):
+        paused = self._stop_while_slow('pause')
+        
+        self.assertEqual(paused.status['status'], 'paused')
+        self.assertEqual(paused.status['in_progress'], [])
+        self.assertEqual(sorted(self._scanned(paused)), ['a.com', 'b.com'])
+        self.assertEqual(paused.checkpoint.load()['status'], 'paused')
+        
+        resumed = self._scanner()
+        with mock.patch.object(ASMScanner, 'scan_domain', scan_quickly):
+            resumed.scan_domains()
+        
+        self.assertEqual(resumed.status['status'], 'completed')
+        self.assertEqual(resumed.status['resumed'], 2)
+        self.assertEqual(resumed.status['completed'], 6)
+        self.assertEqual(resumed.status['total'], 6)
+        self.assertEqual(sorted(self._scanned(resumed)), DOMAINS)
+    
+    def test_cancelled_scan_is_not_resumed(self):
+        cancelled = self._stop_while_slow('cancel')
+        
+        self.assertEqual(cancelled.status['status'], 'cancelled')
+        self.assertEqual(sorted(self._scanned(cancelled)), ['a.com', 'b.com'])
+        
+        again = self._scanner()
+        with mock.patch.object(ASMScanner, 'scan_domain', scan_quickly):
+            again.scan_domains()
+        
+        # Starts over rather than skipping a.com and b.com
+        self.assertEqual(again.status['resumed'], 0)
+        self.assertEqual(again.status['completed'], 6)
+        self.assertEqual(sorted(self._scanned(again)), DOMAINS)
\ No newline at end of file
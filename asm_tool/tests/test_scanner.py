@@ -0,0 +1,72 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from app.modules.scanner import ASMScanner
+
+class ConcurrentScanTest(unittest.TestCase):
+    """
+    scan_domains scans up to max_workers domains at once and records each
+    as it finishes
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.input_file = os.path.join(self.directory.name, 'input.csv')
+        self.domains = [f'{index}.example.com' for index in range(8)]
+        with open(self.input_file, 'w') as f:
+            f.write('domain\n' + '\n'.join(self.domains + ['0.example.com']) + '\n')
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+    
+    def _scan(self, max_workers, fail=()):
+        def scan_domain(scanner, domain):
+            with self.lock:
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+            try:
+                time.sleep(0.05)
+                if domain in fail:
+                    raise RuntimeError(domain)
+                result = scanner.empty_result(domain)
+                result['stage_timings'] = {'dns_records': 0.5, 'open_ports': 2}
+                return result
+            finally:
+                with self.lock:
+                    self.running -= 1
+        
+        scanner = ASMScanner(self.input_file, max_workers=max_workers, status_interval=0)
+        with mock.patch.object(ASMScanner, 'scan_domain', scan_domain):
+            scanner.scan_domains()
+        return scanner
+    
+    def test_domains_are_scanned_concurrently(self):
+        scanner = self._scan(max_workers=3)
+        
+        self.assertEqual(self.peak, 3)
+        self.assertEqual(sorted(record['domain'] for _, record in scanner.sink.read()), self.domains)
+        self.assertEqual(scanner.status['status'], 'completed')
+        self.assertEqual((scanner.status['total'], scanner.status['completed']), (8, 8))
+        self.assertEqual(scanner.status['in_progress'], [])
+        self.assertEqual(scanner.status['stage_seconds'], {'dns_records': 4.0, 'open_ports': 16})
+        self.assertEqual(scanner.status['slowest_stage'], 'open_ports')
+    
+    def test_one_worker_scans_in_order(self):
+        scanner = self._scan(max_workers=1)
+        
+        self.assertEqual(self.peak, 1)
+        self.assertEqual([record['domain'] for _, record in scanner.sink.read()], self.domains)
+    
+    def test_failed_domain_does_not_stop_the_scan(self):
+        scanner = self._scan(max_workers=2, fail={'3.example.com'})
+        
+        errors = {record['domain']: record.get('error') for _, record in scanner.sink.read()}
+        self.assertEqual(sorted(errors), self.domains)
+        self.assertEqual(errors['3.example.com'], '3.example.com')
+        self.assertIsNone(errors['4.example.com'])
+        self.assertEqual(scanner.status['status'], 'completed')
+        self.assertEqual(scanner.status['completed'], 8)
+        self.assertEqual(scanner.status['in_progress'], [])
\ No newline at end of file
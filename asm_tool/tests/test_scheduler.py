@@ -0,0 +1,67 @@
+import threading
+import unittest
+from app.utils.scheduler import FairScheduler
+
+class FairSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.gate = threading.Event()
+        self.addCleanup(self.gate.set)
+    
+    def _hold(self, scheduler, workers):
+        """
+        Occupy every worker until the gate opens, so tasks queue up behind them
+        """
+        started = threading.Semaphore(0)
+        
+        def hold():
+            started.release()
+            self.gate.wait(10)
+        
+        for _ in range(workers):
+            scheduler.submit('hold', hold)
+        for _ in range(workers):
+            self.assertTrue(started.acquire(timeout=5))
+    
+    def test_jobs_take_turns(self):
+        scheduler = FairScheduler(max_workers=1)
+        self._hold(scheduler, 1)
+        order = []
+        futures = [scheduler.submit('big', order.append, f'big{index}') for index in range(4)]
+        futures += [scheduler.submit('small', order.append, f'small{index}') for index in range(2)]
+        
+        self.gate.set()
+        for future in futures:
+            future.result(timeout=5)
+        
+        self.assertEqual(order, ['big0', 'small0', 'big1', 'small1', 'big2', 'big3'])
+    
+    def test_stats_and_worker_cap(self):
+        scheduler = FairScheduler(max_workers=2)
+        self._hold(scheduler, 2)
+        queued = scheduler.submit('job', lambda: 'done')
+        
+        self.assertEqual(scheduler.stats(), {'hold': {'queued': 0, 'running': 2}, 'job': {'queued': 1, 'running': 0}})
+        self.gate.set()
+        self.assertEqual(queued.result(timeout=5), 'done')
+        self.assertEqual(len(scheduler.workers), 2)
+    
+    def test_cancelled_tasks_are_skipped(self):
+        scheduler = FairScheduler(max_workers=1)
+        self._hold(scheduler, 1)
+        calls = []
+        cancelled = scheduler.submit('job', calls.append, 'cancelled')
+        kept = scheduler.submit('job', calls.append, 'kept')
+        
+        self.assertTrue(cancelled.cancel())
+        self.gate.set()
+        kept.result(timeout=5)
+        self.assertEqual(calls, ['kept'])
+    
+    def test_errors_are_set_on_the_future(self):
+        scheduler = FairScheduler(max_workers=1)
+        future = scheduler.submit('job', int, 'not a number')
+        
+        with self.assertRaises(ValueError):
+            future.result(timeout=5)
+        # The worker survives the failed task
+        self.assertEqual(scheduler.submit('job', int, '7').result(timeout=5), 7)
\ No newline at end of file
@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from app.utils.stage_graph import StageGraph
+
+class StageGraphTest(unittest.TestCase):
+    def test_dependents_run_after_their_requirements(self):
+        order = []
+        lock = threading.Lock()
+        
+        def stage(name, value):
+            def run(outputs):
+                with lock:
+                    order.append(name)
+                return value(outputs)
+            return run
+        
+        graph = StageGraph()
+        graph.add('fetch', stage('fetch', lambda outputs: 'page'))
+        graph.add('dns', stage('dns', lambda outputs: 'records'))
+        graph.add('headers', stage('headers', lambda outputs: outputs['fetch'] + ' headers'), requires=['fetch'])
+        graph.add('risk', stage('risk', lambda outputs: sorted(outputs)), requires=['headers', 'dns'])
+        
+        outputs = graph.run()
+        
+        self.assertEqual(outputs['headers'], 'page headers')
+        self.assertEqual(outputs['risk'], ['dns', 'fetch', 'headers'])
+        self.assertLess(order.index('fetch'), order.index('headers'))
+        self.assertEqual(order[-1], 'risk')
+        self.assertEqual(set(graph.timings), {'fetch', 'dns', 'headers', 'risk'})
+    
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+        graph = StageGraph()
+        for name in ('a', 'b', 'c'):
+            graph.add(name, lambda outputs: barrier.wait())
+        
+        # Deadlocks on the barrier unless all three run at once
+        self.assertEqual(len(graph.run(timeout=10)), 3)
+    
+    def test_failure_skips_dependents_only(self):
+        def fail(outputs):
+            raise RuntimeError('boom')
+        
+        graph = StageGraph()
+        graph.add('fetch', fail)
+        graph.add('dns', lambda outputs: 'records')
+        graph.add('headers', lambda outputs: 'headers', requires=['fetch'])
+        graph.add('tech', lambda outputs: 'tech', requires=['headers'])
+        
+        outputs = graph.run()
+        
+        self.assertEqual(outputs, {'dns': 'records'})
+        self.assertEqual(str(graph.first_error()), 'boom')
+        self.assertEqual(graph.skipped, ['headers', 'tech'])
+    
+    def test_unknown_requirement(self):
+        with self.assertRaises(ValueError):
+            StageGraph().add('headers', lambda outputs: None, requires=['fetch'])
+    
+    def test_timeout_abandons_stuck_stages(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        graph = StageGraph()
+        graph.add('quick', lambda outputs: 1)
+        graph.add('stuck', lambda outputs: release.wait())
+        graph.add('after', lambda outputs: 2, requires=['stuck'])
+        
+        started = time.monotonic()
+        outputs = graph.run(timeout=0.2)
+        
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(outputs, {'quick': 1})
+        self.assertEqual(graph.timed_out, ['stuck'])
+        self.assertEqual(graph.skipped, ['after'])
+    
+    def test_cancel_stops_waiting(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        graph = StageGraph()
+        graph.add('stuck', lambda outputs: release.wait())
+        graph.add('after', lambda outputs: 2, requires=['stuck'])
+        threading.Timer(0.1, graph.cancel).start()
+        
+        started = time.monotonic()
+        self.assertEqual(graph.run(), {})
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(sorted(graph.skipped), ['after', 'stuck'])
+    
+    def test_stage_context_wraps_each_stage(self):
+        entered = []
+        
+        @contextmanager
+        def stage_context(name):
+            entered.append(name)
+            yield
+        
+        graph = StageGraph(stage_context=stage_context)
+        graph.add('a', lambda outputs: 1)
+        graph.add('b', lambda outputs: 2, requires=['a'])
+        graph.run()
+        
+        self.assertEqual(entered, ['a', 'b'])
\ No newline at end of file
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app.utils.status_publisher import StatusPublisher
+
+class StatusPublisherTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.status_file = os.path.join(self.directory.name, 'scan_status.json')
+        self.emitted = []
+        self.lock = threading.Lock()
+    
+    def _emit(self, status):
+        with self.lock:
+            self.emitted.append(status)
+    
+    def _read(self):
+        with open(self.status_file) as f:
+            return json.load(f)
+    
+    def test_updates_are_coalesced(self):
+        publisher = StatusPublisher(self.status_file, emit=self._emit, min_interval=0.2)
+        for completed in range(100):
+            publisher.publish({'completed': completed})
+        time.sleep(0.1)
+        publisher.close()
+        
+        # The first update goes out at once; the rest collapse into the last one
+        self.assertLess(len(self.emitted), 5)
+        self.assertEqual(self.emitted[-1], {'completed': 99})
+        self.assertEqual(self._read(), {'completed': 99})
+    
+    def test_publish_takes_a_snapshot(self):
+        publisher = StatusPublisher(self.status_file, emit=self._emit, min_interval=10)
+        status = {'in_progress': ['a.com']}
+        publisher.publish(status)
+        status['in_progress'].append('b.com')
+        publisher.close()
+        
+        self.assertEqual(self.emitted[-1], {'in_progress': ['a.com']})
+    
+    def test_rate_is_limited(self):
+        publisher = StatusPublisher(self.status_file, emit=self._emit, min_interval=0.1)
+        started = time.monotonic()
+        while time.monotonic() - started < 0.5:
+            publisher.publish({'time': time.monotonic()})
+            time.sleep(0.005)
+        publisher.close()
+        
+        self.assertLessEqual(len(self.emitted), 8)
+        self.assertGreaterEqual(len(self.emitted), 3)
+    
+    def test_failing_emit_still_writes_the_file(self):
+        def emit(status):
+            raise RuntimeError('socket closed')
+        
+        publisher = StatusPublisher(self.status_file, emit=emit, min_interval=0)
+        publisher.publish({'status': 'scanning'})
+        publisher.close()
+        
+        self.assertEqual(self._read(), {'status': 'scanning'})
+        self.assertEqual([name for name in os.listdir(self.directory.name) if name.endswith('.tmp')], [])
\ No newline at end of file
@@ -0,0 +1,89 @@
+import asyncio
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from app.modules.async_engine import AsyncScanEngine
+from app.modules.subdomain_enum import SubdomainEnumerator
+from app.utils.deadline import Deadline
+
+# Prints one name at once and another after a pause, like amass does
+SLOW_TOOL = [sys.executable, '-u', '-c', 'import time; print("a.example.com"); time.sleep(0.5); print("b.example.com")']
+HANGING_TOOL = [sys.executable, '-u', '-c', 'import time; print("a.example.com"); time.sleep(30)']
+FAILING_TOOL = [sys.executable, '-c', 'print("a.example.com"); raise SystemExit(1)']
+
+class Collector:
+    def __init__(self):
+        self.names = []
+        self.times = []
+    
+    def __call__(self, name):
+        self.names.append(name)
+        self.times.append(time.monotonic())
+
+class ToolStreamingTest(unittest.TestCase):
+    """
+    Names printed by amass and subfinder are passed on as each line arrives,
+    and the tool is killed when its domain's deadline runs out or the scan stops
+    """
+    def _run(self, cmd, deadline):
+        found = Collector()
+        completed = SubdomainEnumerator('example.com', deadline=deadline)._run_tool('tool', cmd, found)
+        return completed, found
+    
+    def test_names_arrive_while_the_tool_runs(self):
+        completed, found = self._run(SLOW_TOOL, Deadline(30))
+        
+        self.assertTrue(completed)
+        self.assertEqual(found.names, ['a.example.com', 'b.example.com'])
+        self.assertGreater(found.times[1] - found.times[0], 0.3)
+    
+    def test_deadline_kills_the_tool(self):
+        deadline = Deadline(1)
+        started = time.monotonic()
+        completed, found = self._run(HANGING_TOOL, deadline)
+        
+        self.assertFalse(completed)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(found.names, ['a.example.com'])
+        self.assertIn('tool', deadline.probes_timed_out())
+    
+    def test_stopping_the_scan_kills_the_tool(self):
+        deadline = Deadline(60)
+        threading.Timer(0.3, deadline.cancel).start()
+        started = time.monotonic()
+        completed, found = self._run(HANGING_TOOL, deadline)
+        
+        self.assertFalse(completed)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(found.names, ['a.example.com'])
+    
+    def test_failed_tool_is_not_complete(self):
+        completed, found = self._run(FAILING_TOOL, Deadline(30))
+        
+        self.assertFalse(completed)
+        self.assertEqual(found.names, ['a.example.com'])
+
+class AsyncToolStreamingTest(unittest.TestCase):
+    def _run(self, cmd, deadline):
+        found = Collector()
+        engine = AsyncScanEngine(SimpleNamespace(max_workers=1))
+        return asyncio.run(engine._run_tool(cmd, found, deadline)), found
+    
+    def test_names_arrive_while_the_tool_runs(self):
+        completed, found = self._run(SLOW_TOOL, Deadline(30))
+        
+        self.assertTrue(completed)
+        self.assertEqual(found.names, ['a.example.com', 'b.example.com'])
+        self.assertGreater(found.times[1] - found.times[0], 0.3)
+    
+    def test_deadline_kills_the_tool(self):
+        deadline = Deadline(1)
+        started = time.monotonic()
+        completed, found = self._run(HANGING_TOOL, deadline)
+        
+        self.assertFalse(completed)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(found.names, ['a.example.com'])
+        self.assertIn(HANGING_TOOL[0], deadline.probes_timed_out())
\ No newline at end of file
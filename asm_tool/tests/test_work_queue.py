@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import unittest
+from app.utils.work_queue import WorkQueue
+
+class WorkQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.queue = WorkQueue(os.path.join(self.directory.name, 'queue.db'), max_attempts=2)
+        self.queue.add_job('job', self.directory.name)
+        self.queue.enqueue('job', ['a.com', 'b.com', 'c.com', 'a.com'])
+        self.queue.finish_enqueue('job')
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def _expire(self, task):
+        self.queue._connection().execute('UPDATE tasks SET lease_expires = ? WHERE id = ?', (time.time() - 1, task['task_id']))
+    
+    def test_lease_claims_each_task_once(self):
+        first = self.queue.lease('worker-1', limit=2)
+        second = self.queue.lease('worker-2', limit=2)
+        
+        self.assertEqual([task['domain'] for task in first], ['a.com', 'b.com'])
+        self.assertEqual([task['domain'] for task in second], ['c.com'])
+        self.assertEqual({task['attempts'] for task in first + second}, {1})
+        self.assertEqual(self.queue.lease('worker-3'), [])
+    
+    def test_expired_lease_is_retried_until_attempts_run_out(self):
+        task, = self.queue.lease('worker-1')
+        self._expire(task)
+        
+        retried, = self.queue.lease('worker-2')
+        self.assertEqual((retried['task_id'], retried['attempts']), (task['task_id'], 2))
+        # The lost worker can no longer complete the task
+        self.queue.complete('worker-1', task['task_id'])
+        self.assertEqual(self.queue.job_status('job')['completed'], 0)
+        
+        self._expire(retried)
+        self.assertNotIn(task['task_id'], [leased['task_id'] for leased in self.queue.lease('worker-3', limit=5)])
+        failed, = self.queue.reap_failed()
+        self.assertEqual(failed['domain'], 'a.com')
+        self.assertEqual(self.queue.reap_failed(), [])
+    
+    def test_heartbeat_keeps_lease(self):
+        task, = self.queue.lease('worker-1', lease_seconds=0)
+        self.queue.heartbeat('worker-1', [task['task_id']], lease_seconds=60)
+        self.assertNotIn(task['task_id'], [leased['task_id'] for leased in self.queue.lease('worker-2', limit=5)])
+    
+    def test_release_does_not_count_attempt(self):
+        task, = self.queue.lease('worker-1')
+        self.queue.release('worker-1', task['task_id'])
+        self.assertEqual(self.queue.lease('worker-2')[0]['attempts'], 1)
+    
+    def test_paused_job_is_not_leased(self):
+        self.queue.set_job_state('job', 'paused')
+        self.assertEqual(self.queue.lease('worker-1'), [])
+        self.queue.set_job_state('job', 'active')
+        self.assertEqual(len(self.queue.lease('worker-1')), 1)
+    
+    def test_job_status(self):
+        tasks = self.queue.lease('worker-1', limit=3)
+        self.queue.complete('worker-1', tasks[0]['task_id'])
+        self.queue.complete('worker-1', tasks[1]['task_id'])
+        self.queue.fail('worker-1', tasks[2]['task_id'], 'Scan failed')
+        
+        status = self.queue.job_status('job')
+        self.assertEqual((status['total'], status['completed'], status['failed']), (3, 2, 1))
+        self.assertEqual(status['status'], 'completed')
+    
+    def test_stage_seconds_add_up_across_tasks(self):
+        tasks = self.queue.lease('worker-1', limit=3)
+        self.queue.complete('worker-1', tasks[0]['task_id'], {'dns_records': 1.5, 'open_ports': 4.0})
+        self.queue.complete('worker-1', tasks[1]['task_id'], {'dns_records': 3.0, 'open_ports': 0.25})
+        # Timings of a task the worker no longer holds are not counted
+        self.queue.complete('worker-2', tasks[2]['task_id'], {'dns_records': 100})
+        
+        status = self.queue.job_status('job')
+        self.assertEqual(status['stage_seconds'], {'dns_records': 4.5, 'open_ports': 4.25})
+        self.assertEqual(status['slowest_stage'], 'dns_records')
\ No newline at end of file
@@ -0,0 +1,54 @@
+import argparse
+import signal
+from app import app
+from app.modules.queue_worker import QueueWorker
+from app.utils.discovery_cache import DiscoveryCache
+from app.utils.metrics import serve
+from app.utils.result_index import ResultIndex
+from app.utils.work_queue import WorkQueue
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan domains from the shared work queue')
+    parser.add_argument('--queue', default=app.config['WORK_QUEUE'], help='path of the SQLite work queue')
+    parser.add_argument('--result-db', default=app.config['RESULT_DB'], help='path of the SQLite result index')
+    parser.add_argument('--concurrency', type=int, default=app.config['SCAN_CONCURRENCY'], help='domains scanned in parallel')
+    parser.add_argument('--worker-id', default=None, help='identifier recorded on leased tasks (default: host-pid)')
+    parser.add_argument('--lease-seconds', type=int, default=120, help='lease duration, renewed by heartbeats')
+    parser.add_argument('--incremental', action='store_true', default=app.config['INCREMENTAL_SCANS'],
+                        help='reuse unchanged stages from the previous result of each domain')
+    parser.add_argument('--exit-when-idle', action='store_true', help='exit once the queue is empty')
+    parser.add_argument('--metrics-port', type=int, default=app.config['WORKER_METRICS_PORT'],
+                        help='serve this worker\'s Prometheus metrics on this port (default: off)')
+    args = parser.parse_args()
+    
+    worker = QueueWorker(
+        WorkQueue(args.queue),
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        result_index=ResultIndex(args.result_db),
+        incremental=args.incremental,
+        incremental_max_age=app.config['INCREMENTAL_MAX_AGE_DAYS'],
+        profile=app.config['SCAN_PROFILE'],
+        profile_top=app.config['SCAN_PROFILE_TOP'],
+        domain_timeout=app.config['DOMAIN_TIMEOUT'],
+        discovery_cache=DiscoveryCache(
+            app.config['DISCOVERY_CACHE'],
+            ttl=app.config['DISCOVERY_CACHE_TTL_HOURS'] * 3600,
+            max_bytes=app.config['DISCOVERY_CACHE_MAX_MB'] * 1024 * 1024
+        ) if app.config['DISCOVERY_CACHE_TTL_HOURS'] > 0 else None
+    )
+    
+    # Finish in-flight domains on Ctrl+C / SIGTERM instead of dropping them
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    
+    if args.metrics_port:
+        serve(args.metrics_port)
+        print(f"Serving metrics on port {args.metrics_port}")
+    
+    print(f"Worker {worker.worker_id} processing {args.queue}")
+    worker.run(exit_when_idle=args.exit_when_idle)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file